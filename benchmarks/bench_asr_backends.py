@@ -0,0 +1,122 @@
+# benchmarks/bench_asr_backends.py
+#
+# ASR backends (src/common/asr_backends.py) side by side on real audio: load time, real-time
+# factor (transcription wall time / audio duration, lower is better), peak RSS and word error
+# rate. Each backend runs in its own process with the same thread budget, in chunks of the
+# length transcribe_chunked.py uses. WER is measured against --reference transcripts (one
+# plain-text file per audio file) when given, otherwise against the fp32 whisper backend's
+# output, which then shows how much quantization changes the transcript rather than how
+# right it is. Backends whose library isn't installed are skipped.
+#
+#   python benchmarks/bench_asr_backends.py input/audio/meeting.mp3 --reference meeting.txt
+#   python benchmarks/bench_asr_backends.py --backends whisper whisper-int8 --model small
+
+import os
+import re
+import sys
+import time
+import argparse
+import importlib.util
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from common.audio import SAMPLE_RATE, iter_audio_windows
+from common.asr_backends import ASR_BACKENDS, DEFAULT_ASR_BACKEND
+from common.asr_process import WhisperProcess
+from common.metrics import peak_rss_mb
+from pipeline.batch_runner import AUDIO_DIR, scan_audio
+from transcription.transcribe_chunked import CHUNK_LENGTH_MS
+
+# Library each backend needs; checked up front, since a worker that fails to load only
+# reports a broken pool
+BACKEND_MODULES = {"whisper": "whisper", "whisper-int8": "whisper", "faster-whisper": "faster_whisper"}
+
+# ------------------ WER ------------------
+
+def normalize(text):
+    # Lower case, punctuation dropped (apostrophes kept), so only word choices count
+    return re.sub(r"[^\w' ]+", " ", text.lower()).split()
+
+def word_errors(reference, hypothesis):
+    # Word-level Levenshtein distance (substitutions + deletions + insertions), two rows at a time
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1]
+
+def wer(references, hypotheses):
+    # Corpus WER: errors summed over files, divided by the total reference length
+    errors = sum(word_errors(normalize(r), normalize(h)) for r, h in zip(references, hypotheses))
+    words = sum(len(normalize(r)) for r in references)
+    return errors / words if words else 0.0
+
+# ------------------ RUNS ------------------
+
+def run_backend(backend, model_name, threads, audio_paths):
+    # (load s, transcription s, audio s, peak RSS MB, [text per file])
+    process = WhisperProcess(model_name, threads, backend)
+    try:
+        start = time.perf_counter()
+        process.pool.submit(peak_rss_mb).result()   # the worker loads the model before its first task
+        load_s = time.perf_counter() - start
+
+        texts, audio_s, transcribe_s = [], 0.0, 0.0
+        for path in audio_paths:
+            pieces = []
+            for chunk in iter_audio_windows(path, CHUNK_LENGTH_MS):
+                audio_s += len(chunk) / SAMPLE_RATE
+                start = time.perf_counter()
+                pieces.append(process.transcribe(chunk, language="en", fp16=False)["text"].strip())
+                transcribe_s += time.perf_counter() - start
+            texts.append(" ".join(pieces))
+        return load_s, transcribe_s, audio_s, process.pool.submit(peak_rss_mb).result(), texts
+    finally:
+        process.close()
+
+# ------------------ ENTRY ------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Real-time factor and WER of each ASR backend.")
+    parser.add_argument("audio", nargs="*", type=Path, help=f"Audio files (default: everything in {AUDIO_DIR})")
+    parser.add_argument("--backends", nargs="+", choices=ASR_BACKENDS, default=list(ASR_BACKENDS))
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1, help="Threads per backend")
+    parser.add_argument("--reference", nargs="+", type=Path,
+                        help="Ground-truth transcripts, one per audio file in the same order (default: fp32 whisper output)")
+    parser.add_argument("--save", type=Path, help="Write each backend's transcripts to this directory")
+    args = parser.parse_args()
+
+    audio_paths = args.audio or scan_audio()
+    if not audio_paths:
+        parser.error(f"no audio given and none found in {AUDIO_DIR}")
+    if args.reference and len(args.reference) != len(audio_paths):
+        parser.error("give one --reference transcript per audio file")
+    references = [p.read_text(encoding="utf-8") for p in args.reference] if args.reference else None
+    backends = args.backends
+    if references is None and DEFAULT_ASR_BACKEND in backends:
+        # The fp32 run is the reference, so it goes first
+        backends = [DEFAULT_ASR_BACKEND] + [b for b in backends if b != DEFAULT_ASR_BACKEND]
+
+    print(f"{len(audio_paths)} file(s) | model {args.model} | {args.threads} thread(s) | "
+          f"WER vs {'reference transcripts' if references else 'fp32 whisper'}")
+    print(f"{'backend':<16} {'load s':>7} {'wall s':>8} {'RTF':>7} {'speed-up':>8} {'peak MB':>8} {'WER':>7}")
+
+    baseline = None
+    for backend in backends:
+        if importlib.util.find_spec(BACKEND_MODULES[backend]) is None:
+            print(f"{backend:<16} skipped: {BACKEND_MODULES[backend]} is not installed")
+            continue
+        load_s, transcribe_s, audio_s, rss, texts = run_backend(backend, args.model, args.threads, audio_paths)
+        if references is None and backend == DEFAULT_ASR_BACKEND:
+            references = texts
+        baseline = baseline or transcribe_s
+        error_rate = f"{wer(references, texts) * 100:>6.1f}%" if references is not None else f"{'-':>7}"
+        print(f"{backend:<16} {load_s:>7.1f} {transcribe_s:>8.1f} {transcribe_s / audio_s:>7.3f} "
+              f"{baseline / transcribe_s:>7.2f}x {rss:>8.0f} {error_rate}")
+        if args.save:
+            args.save.mkdir(parents=True, exist_ok=True)
+            for path, text in zip(audio_paths, texts):
+                (args.save / f"{path.stem}_{backend}.txt").write_text(text, encoding="utf-8")
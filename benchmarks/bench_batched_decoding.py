@@ -0,0 +1,50 @@
+# benchmarks/bench_batched_decoding.py
+#
+# Aggregate generation throughput (generated tokens / wall second) of the per-chunk loop
+# (one Llama.__call__ per prompt) against multi-sequence batched decoding in one llama.cpp
+# context, on the summary prompts of a transcript. The completion cache is off.
+#
+#   python benchmarks/bench_batched_decoding.py output/diarized_transcripts/podcast2_diarized.txt --repeat 8 --parallel 2 4 8
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from common.llm import load_llm
+from common.llm_batch import BatchedGenerator
+from summarization import summarize_diarized
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark batched multi-sequence decoding against the per-chunk loop.")
+    parser.add_argument("transcript", help="Path to a *_diarized.txt transcript")
+    parser.add_argument("--repeat", type=int, default=4, help="Concatenate the transcript N times for more chunks")
+    parser.add_argument("--parallel", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--max-tokens", type=int, default=256)
+    args = parser.parse_args()
+
+    transcript = "\n".join([Path(args.transcript).read_text(encoding="utf-8").strip()] * args.repeat)
+    prompts = [summarize_diarized.format_prompt(chunk) for chunk in summarize_diarized.split_chunks(transcript)]
+    llm = load_llm(use_cache=False)
+    print(f"{len(prompts)} prompt(s), max_tokens {args.max_tokens}")
+    print(f"{'mode':<12} {'wall s':>8} {'gen tok':>8} {'gen tok/s':>9} {'speed-up':>8}")
+
+    start = time.perf_counter()
+    generated = 0
+    for prompt in prompts:
+        llm.reset()
+        generated += llm(prompt, max_tokens=args.max_tokens)["usage"]["completion_tokens"]
+    loop = time.perf_counter() - start
+    baseline = generated / loop
+    print(f"{'loop':<12} {loop:>8.1f} {generated:>8} {baseline:>9.1f} {1.0:>7.2f}x")
+
+    for n_parallel in args.parallel:
+        generator = BatchedGenerator(llm, n_parallel=n_parallel)
+        start = time.perf_counter()
+        responses = generator.generate(prompts, max_tokens=args.max_tokens)
+        elapsed = time.perf_counter() - start
+        generator.close()
+        generated = sum(r["usage"]["completion_tokens"] for r in responses)
+        print(f"{f'batched x{n_parallel}':<12} {elapsed:>8.1f} {generated:>8} {generated / elapsed:>9.1f} "
+              f"{generated / elapsed / baseline:>7.2f}x")
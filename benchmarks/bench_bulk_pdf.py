@@ -0,0 +1,86 @@
+# benchmarks/bench_bulk_pdf.py
+#
+# Bulk PDF export (export_pdf.export_many) on synthetic meetings: reports/sec and peak RSS
+# per worker for each --workers count, with and without the transcript appendix, against
+# the one-process-per-report baseline (`python export_pdf.py <name>` per meeting). The
+# synthetic inputs and reports are written under output/ with a bench_bulk_ prefix and
+# deleted afterwards.
+#
+#   python benchmarks/bench_bulk_pdf.py --meetings 64 --workers 1 2 4 --minutes 60
+
+import sys
+import time
+import argparse
+import subprocess
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+import synthetic
+from report import export_pdf
+
+PREFIX = "bench_bulk_"
+
+# ------------------ CORPUS ------------------
+
+def input_files(name):
+    return [
+        export_pdf.DIARIZED_SUMMARY_DIR / f"{name}_summary.txt",
+        export_pdf.ACTIONS_DIR / f"{name}_action_items.txt",
+        export_pdf.TRANSCRIPT_DIR / f"{name}_diarized.txt",
+    ]
+
+def write_meetings(n, minutes):
+    names = [f"{PREFIX}{i:04d}" for i in range(n)]
+    for i, name in enumerate(names):
+        summary, actions, transcript = input_files(name)
+        summary.parent.mkdir(parents=True, exist_ok=True)
+        summary.write_text(synthetic.synthetic_summary(minutes, seed=i), encoding="utf-8")
+        actions.write_text(synthetic.synthetic_actions(minutes, seed=i), encoding="utf-8")
+        transcript.write_text(synthetic.synthetic_transcript(minutes, seed=i), encoding="utf-8")
+    return names
+
+def clean_up(names):
+    for name in names:
+        for path in input_files(name) + [export_pdf.OUTPUT_DIR / f"{name}_report.pdf"]:
+            path.unlink(missing_ok=True)
+
+# ------------------ RUNS ------------------
+
+def per_process_baseline(names):
+    # What regenerating a month of reports cost before: one interpreter per report
+    start = time.perf_counter()
+    for name in names:
+        subprocess.run([sys.executable, str(Path(export_pdf.__file__)), name], capture_output=True, check=True)
+    return len(names) / (time.perf_counter() - start)
+
+def bulk_run(names, workers, appendix):
+    start = time.perf_counter()
+    results = export_pdf.export_many(names, workers, appendix)
+    wall = time.perf_counter() - start
+    rss = {}
+    for r in results:
+        rss[r["pid"]] = max(rss.get(r["pid"], 0.0), r["peak_rss_mb"])
+    return len(names) / wall, max(rss.values()), len(rss)
+
+# ------------------ ENTRY ------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reports/sec and per-worker peak RSS of the bulk PDF export.")
+    parser.add_argument("--meetings", type=int, default=64)
+    parser.add_argument("--minutes", type=int, default=60, help="Length of each synthetic meeting")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--baseline", type=int, default=8, help="Reports rendered one process each (0 to skip)")
+    args = parser.parse_args()
+
+    names = write_meetings(args.meetings, args.minutes)
+    try:
+        if args.baseline:
+            rate = per_process_baseline(names[:args.baseline])
+            print(f"{'one process per report':<34} {rate:>8.2f} reports/s")
+        for appendix in (False, True):
+            for workers in args.workers:
+                rate, rss, used = bulk_run(names, workers, appendix)
+                label = f"bulk, {workers} worker(s){' + transcript' if appendix else ''}"
+                print(f"{label:<34} {rate:>8.2f} reports/s  peak RSS/worker {rss:>5.0f} MB  ({used} process(es) used)")
+    finally:
+        clean_up(names)
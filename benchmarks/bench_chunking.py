@@ -0,0 +1,43 @@
+# benchmarks/bench_chunking.py
+#
+# Chunk count and context fill (transcript tokens / tokens available for the transcript)
+# of the old 3500-character textwrap chunker against the token-budget chunker, counted with
+# Mistral's tokenizer (vocab only, no weights loaded). Fewer, fuller chunks = fewer LLM calls.
+#
+#   python benchmarks/bench_chunking.py                       # every output/diarized_transcripts/*_diarized.txt
+#   python benchmarks/bench_chunking.py meeting.txt --repeat 20   # the transcript 20x, as a long meeting
+
+import sys
+import textwrap
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from common.chunking import fill_ratio
+from common.llm import BASE_DIR, chunk_token_budget, token_counter, transcript_block
+from summarization import summarize_diarized
+
+OLD_MAX_CHARS_PER_CHUNK = 3500
+
+def old_split_chunks(transcript):
+    return textwrap.wrap(transcript, OLD_MAX_CHARS_PER_CHUNK, break_long_words=False, break_on_hyphens=False)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare character-based and token-budget transcript chunking.")
+    parser.add_argument("transcripts", nargs="*", help="Diarized transcripts (default: output/diarized_transcripts/*_diarized.txt)")
+    parser.add_argument("--repeat", type=int, default=1, help="Concatenate each transcript N times")
+    args = parser.parse_args()
+
+    paths = [Path(p) for p in args.transcripts] or sorted((BASE_DIR / "output" / "diarized_transcripts").glob("*_diarized.txt"))
+    count_tokens = token_counter()
+    template = transcript_block("") + summarize_diarized.SUMMARY_INSTRUCTION
+    budget = chunk_token_budget(template, summarize_diarized.MAX_TOKENS, count_tokens)
+    print(f"token budget per chunk: {budget} (n_ctx - template - max_tokens - margin)")
+    print(f"{'transcript':<28} {'tokens':>7} {'old chunks':>10} {'old fill':>8} {'new chunks':>10} {'new fill':>8}")
+
+    for path in paths:
+        transcript = "\n".join([path.read_text(encoding="utf-8").strip()] * args.repeat)
+        old = old_split_chunks(transcript)
+        new = summarize_diarized.split_chunks(transcript, count_tokens)
+        print(f"{path.name:<28} {count_tokens(transcript):>7} {len(old):>10} {fill_ratio(old, count_tokens, budget):>8.0%} "
+              f"{len(new):>10} {fill_ratio(new, count_tokens, budget):>8.0%}")
@@ -0,0 +1,72 @@
+# benchmarks/bench_columnar.py
+#
+# Text vs columnar (.cols) diarized transcripts on synthetic meetings of increasing length:
+# file size, and the time to pull a 5-minute window, one speaker's turns and one speaker in
+# a window. The text path reads and parses the whole file on every lookup; the columnar path
+# mmaps the file and bisects. Each columnar result is checked against the text path.
+#
+#   python benchmarks/bench_columnar.py --minutes 60 300 1000
+
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+import synthetic
+from common.columnar_transcript import ColumnarTranscript, columnar_path, convert, format_line, parse_transcript
+
+WINDOW_SEC = 5 * 60
+
+def text_lookup(path, start=None, end=None, speaker=None):
+    segments = [
+        s for s in parse_transcript(path.read_text(encoding="utf-8"))
+        if (start is None or s[1] > start) and (end is None or s[0] < end) and (speaker is None or s[2] == speaker)
+    ]
+    return "\n".join(format_line(*s) for s in segments)
+
+def columnar_lookup(path, start=None, end=None, speaker=None):
+    with ColumnarTranscript(columnar_path(path)) as transcript:
+        return transcript.window(start, end, speaker)
+
+def best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+# ------------------ ENTRY ------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare window / speaker lookups on text and columnar transcripts.")
+    parser.add_argument("--minutes", type=int, nargs="+", default=[60, 300, 1000],
+                        help="Meeting lengths to generate (float32 times match the text to 0.01 s up to ~18 h)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'minutes':>7} {'text KB':>9} {'cols KB':>9} {'convert':>9}  "
+          f"{'lookup':<20} {'text':>9} {'cols':>9} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for minutes in args.minutes:
+            path = Path(tmp) / f"meeting_{minutes}_diarized.txt"
+            path.write_text(synthetic.synthetic_transcript(minutes), encoding="utf-8")
+            convert_s, _ = best_of(lambda: convert(path), 1)
+            middle = minutes * 60 / 2
+            lookups = {
+                "5-min window": (middle, middle + WINDOW_SEC, None),
+                "one speaker": (None, None, "SPEAKER_01"),
+                "speaker in window": (middle, middle + WINDOW_SEC, "SPEAKER_01"),
+            }
+            for i, (name, query) in enumerate(lookups.items()):
+                text_s, expected = best_of(lambda: text_lookup(path, *query), args.repeat)
+                cols_s, result = best_of(lambda: columnar_lookup(path, *query), args.repeat)
+                assert result == expected, f"{name}: columnar result differs from the text path"
+                sizes = (
+                    f"{minutes:>7} {path.stat().st_size / 1024:>9.0f} {columnar_path(path).stat().st_size / 1024:>9.0f} "
+                    f"{convert_s * 1000:>7.1f}ms" if i == 0 else f"{'':>7} {'':>9} {'':>9} {'':>9}"
+                )
+                print(f"{sizes}  {name:<20} {text_s * 1000:>7.2f}ms {cols_s * 1000:>7.2f}ms {text_s / cols_s:>7.0f}x")
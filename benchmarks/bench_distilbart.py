@@ -0,0 +1,68 @@
+# benchmarks/bench_distilbart.py
+#
+# CPU throughput (chunks/sec) of the distilBART summarizer per batch size, with and without
+# int8 dynamic quantization, plus a quality check: every configuration's summaries are
+# compared with the unbatched fp32 ones (ROUGE-1 F1), and the script exits 1 if the mean
+# drops below --tolerance.
+#
+#   python benchmarks/bench_distilbart.py output/transcripts/meeting_transcripts/meeting_transcript.txt
+#   python benchmarks/bench_distilbart.py                 # the sample diarized transcripts, speaker tags removed
+
+import re
+import sys
+import time
+import argparse
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from summarization.summarize import BASE_DIR, chunk_text, load_summarizer, summarize_chunks
+
+SAMPLE_DIR = Path(BASE_DIR) / "output" / "diarized_transcripts"
+SPEAKER_TAG = re.compile(r"^SPEAKER_\d+ \[[^\]]*\]: ", re.MULTILINE)
+
+def rouge1_f1(reference, candidate):
+    ref, cand = Counter(reference.lower().split()), Counter(candidate.lower().split())
+    overlap = sum((ref & cand).values())
+    if not overlap:
+        return 0.0
+    precision, recall = overlap / sum(cand.values()), overlap / sum(ref.values())
+    return 2 * precision * recall / (precision + recall)
+
+def run(chunks, summarizer, batch_size):
+    start = time.perf_counter()
+    summaries = summarize_chunks(chunks, summarizer, batch_size)
+    return summaries, time.perf_counter() - start
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark batched / quantized distilBART summarization.")
+    parser.add_argument("transcripts", nargs="*", help="Plain-text transcripts (default: the sample diarized ones)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--repeat", type=int, default=4, help="Concatenate the input N times for more chunks")
+    parser.add_argument("--tolerance", type=float, default=0.8, help="Minimum mean ROUGE-1 F1 against unbatched fp32")
+    args = parser.parse_args()
+
+    paths = [Path(p) for p in args.transcripts] or sorted(SAMPLE_DIR.glob("*_diarized.txt"))
+    text = "\n".join(SPEAKER_TAG.sub("", p.read_text(encoding="utf-8")) for p in paths)
+    text = "\n".join([text] * args.repeat)
+
+    fp32 = load_summarizer(quantize=False)
+    chunks = chunk_text(text, fp32.tokenizer)
+    print(f"{len(chunks)} chunk(s) from {len(paths)} transcript(s) x{args.repeat}")
+
+    reference, baseline = run(chunks, fp32, 1)
+    print(f"{'model':<6} {'batch':>5} {'wall s':>8} {'chunks/s':>9} {'speed-up':>8} {'ROUGE-1':>8}")
+    print(f"{'fp32':<6} {1:>5} {baseline:>8.1f} {len(chunks) / baseline:>9.2f} {1.0:>7.2f}x {1.0:>8.3f}")
+
+    failed = False
+    for name, summarizer in (("fp32", fp32), ("int8", load_summarizer(quantize=True))):
+        for batch_size in args.batch_sizes:
+            if name == "fp32" and batch_size == 1:
+                continue
+            summaries, elapsed = run(chunks, summarizer, batch_size)
+            quality = sum(rouge1_f1(r, s) for r, s in zip(reference, summaries)) / len(chunks)
+            failed |= quality < args.tolerance
+            print(f"{name:<6} {batch_size:>5} {elapsed:>8.1f} {len(chunks) / elapsed:>9.2f} "
+                  f"{baseline / elapsed:>7.2f}x {quality:>8.3f}{'  < tolerance' if quality < args.tolerance else ''}")
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,89 @@
+# benchmarks/bench_import_time.py
+#
+# Startup cost of every entry point: `python -X importtime` on its module (cumulative
+# import time, slowest top-level imports) and the wall time of `<script> --help`. Exits
+# non-zero if a script's --help takes longer than --budget seconds, or if any heavy library
+# (torch, transformers, whisper, pyannote, llama_cpp) is imported before a model is needed.
+#
+#   python benchmarks/bench_import_time.py --budget 1.0
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+SRC_DIR = BASE_DIR / "src"
+
+ENTRY_POINTS = [
+    "pipeline/run_pipeline.py",
+    "pipeline/batch_runner.py",
+    "diarization/transcribe_diarized_chunked.py",
+    "diarization/convert_transcripts.py",
+    "transcription/transcribe_chunked.py",
+    "summarization/summarize.py",
+    "summarization/summarize_diarized.py",
+    "action_extraction/extract_actions.py",
+    "action_extraction/extract_actions_diarized.py",
+    "report/export_pdf.py",
+    "search/search_meetings.py",
+    "service/server.py",
+]
+HEAVY_MODULES = {"torch", "transformers", "whisper", "faster_whisper", "ctranslate2", "pyannote", "llama_cpp"}
+
+# ------------------ MEASUREMENT ------------------
+
+def import_times(module):
+    # [(cumulative µs, nesting level, module)] from -X importtime, which reports on stderr
+    env = {**os.environ, "PYTHONPATH": str(SRC_DIR)}
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True, env=env
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), (len(name) - len(name.lstrip())) // 2, name.strip()))
+    return out.returncode, rows
+
+def help_wall_time(script, repeat=3):
+    # Best of `repeat`, so a cold page cache on the first run doesn't count
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, str(SRC_DIR / script), "--help"], capture_output=True)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+# ------------------ ENTRY ------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that entry points start fast and import no model libraries.")
+    parser.add_argument("--budget", type=float, default=1.0, help="Max seconds for `<script> --help`")
+    parser.add_argument("--top", type=int, default=3, help="Slowest top-level imports to show per script")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'entry point':<46} {'import':>8} {'--help':>8}  slowest imports")
+    for script in ENTRY_POINTS:
+        module = script[:-3].replace("/", ".")
+        returncode, rows = import_times(module)
+        heavy = sorted({name.split(".")[0] for _, _, name in rows} & HEAVY_MODULES)
+        total_ms = sum(us for us, level, _ in rows if level == 1) / 1000
+        top = sorted((row for row in rows if row[1] == 1), reverse=True)[:args.top]
+        help_s = help_wall_time(script)
+
+        ok = returncode == 0 and help_s <= args.budget and not heavy
+        failed |= not ok
+        slowest = ", ".join(f"{name} {us / 1000:.0f}ms" for us, _, name in top)
+        print(f"{script:<46} {total_ms:>6.0f}ms {help_s:>7.2f}s  {slowest} {'✅' if ok else '❌'}")
+        if heavy:
+            print(f"{'':<46} imports at startup: {', '.join(heavy)}")
+        if returncode != 0:
+            print(f"{'':<46} import failed")
+
+    sys.exit(1 if failed else 0)
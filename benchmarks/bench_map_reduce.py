@@ -0,0 +1,49 @@
+# benchmarks/bench_map_reduce.py
+#
+# Wall-clock and token totals of map-reduce summarization for each worker count K
+# (K llama.cpp processes x cores // K threads). The completion cache is off so every
+# run does the full work.
+#
+#   python benchmarks/bench_map_reduce.py output/diarized_transcripts/meeting_diarized.txt --workers 1 2 4 --repeat 10
+
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from common.llm_process import LlamaPool
+from summarization.summarize_diarized import map_reduce_summary
+
+if __name__ == "__main__":
+    cores = os.cpu_count() or 1
+    default_workers = [k for k in (1, 2, 4) if k <= cores]
+
+    parser = argparse.ArgumentParser(description="Benchmark map-reduce summarization per worker count.")
+    parser.add_argument("transcript", help="Path to a *_diarized.txt transcript")
+    parser.add_argument("--workers", type=int, nargs="+", default=default_workers)
+    parser.add_argument("--repeat", type=int, default=1, help="Concatenate the transcript N times, as a long meeting")
+    args = parser.parse_args()
+
+    transcript = "\n".join([Path(args.transcript).read_text(encoding="utf-8").strip()] * args.repeat)
+    print(f"{cores} cores")
+    print(f"{'K':>3} {'threads':>7} {'load s':>7} {'wall s':>8} {'calls':>6} {'levels':>6} "
+          f"{'prompt tok':>10} {'gen tok':>8} {'gen tok/s':>9}")
+
+    for workers in args.workers:
+        start = time.perf_counter()
+        pool = LlamaPool(workers, use_cache=False)
+        # Start the workers (each loads the model in its initializer) before timing the summary
+        pool.map(["Hello"] * workers, max_tokens=1)
+        load = time.perf_counter() - start
+
+        stats = {}
+        start = time.perf_counter()
+        map_reduce_summary(transcript, pool, stats)
+        elapsed = time.perf_counter() - start
+        pool.close()
+
+        print(f"{workers:>3} {pool.threads:>7} {load:>7.1f} {elapsed:>8.1f} {stats['llm_calls']:>6} "
+              f"{stats['reduce_levels']:>6} {stats['prompt_tokens']:>10} {stats['completion_tokens']:>8} "
+              f"{stats['completion_tokens'] / elapsed:>9.1f}")
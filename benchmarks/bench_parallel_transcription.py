@@ -0,0 +1,43 @@
+# benchmarks/bench_parallel_transcription.py
+#
+# Real-time factor (wall time / audio duration, lower is better) of chunked Whisper
+# transcription for each worker count, to find the sweet spot on a given host.
+#
+#   python benchmarks/bench_parallel_transcription.py input/audio/meeting.mp3 --workers 1 2 4 8
+
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from common.audio import iter_audio_windows
+from transcription.transcribe_chunked import CHUNK_LENGTH_MS, count_audio, transcribe_chunks
+
+if __name__ == "__main__":
+    cores = os.cpu_count() or 1
+    default_workers = [n for n in (1, 2, 4, 8, 16) if n <= cores]
+
+    parser = argparse.ArgumentParser(description="Benchmark parallel chunk transcription.")
+    parser.add_argument("audio", help="Path to an audio file")
+    parser.add_argument("--workers", type=int, nargs="+", default=default_workers)
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--chunk-min", type=float, default=CHUNK_LENGTH_MS / 60000,
+                        help="Chunk length in minutes (shorter chunks give more parallelism on short files)")
+    args = parser.parse_args()
+
+    chunk_ms = int(args.chunk_min * 60000)
+    print(f"{cores} cores | model {args.model} | {args.chunk_min:g}-min chunks")
+    print(f"{'workers':>7} {'threads':>7} {'wall s':>8} {'RTF':>7} {'speed-up':>8}")
+
+    baseline = None
+    for workers in args.workers:
+        stats = {}
+        start = time.perf_counter()
+        transcribe_chunks(count_audio(iter_audio_windows(args.audio, chunk_ms), stats),
+                          model_name=args.model, workers=workers)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>7} {max(1, cores // workers):>7} {elapsed:>8.1f} "
+              f"{elapsed / stats['audio_sec']:>7.3f} {baseline / elapsed:>7.2f}x")
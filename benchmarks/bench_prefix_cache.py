@@ -0,0 +1,77 @@
+# benchmarks/bench_prefix_cache.py
+#
+# Prompt-eval tokens (and wall time) for summary + action extraction on one diarized
+# transcript: separate stages vs. both tasks sharing one evaluated transcript prefix.
+#
+#   python benchmarks/bench_prefix_cache.py output/diarized_transcripts/meeting_diarized.txt
+#   python benchmarks/bench_prefix_cache.py <transcript> --tokens-only   # tokenizer only, no generation
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from common.llm import MODEL_PATH, load_llm, transcript_block
+from summarization import summarize_diarized
+from action_extraction import extract_actions_diarized
+from pipeline.llm_stages import summarize_and_extract
+
+def count_tokens_only(transcript):
+    from llama_cpp import Llama
+    llm = Llama(model_path=str(MODEL_PATH), vocab_only=True, verbose=False)
+    tokenize = lambda text: llm.tokenize(text.encode("utf-8"))
+
+    separate = shared = 0
+    for chunk in summarize_diarized.split_chunks(transcript):
+        prefix = len(tokenize(transcript_block(chunk)))
+        summary = len(tokenize(summarize_diarized.format_prompt(chunk)))
+        actions = len(tokenize(extract_actions_diarized.format_prompt(chunk)))
+        separate += summary + actions
+        # the second prompt only evaluates what follows the shared prefix (+1 for fresh logits)
+        shared += summary + (actions - prefix + 1)
+    return {"separate": separate, "shared": shared}
+
+def run_generation(transcript):
+    # No completion cache: both runs have to reach llama.cpp to be comparable
+    llm = load_llm(use_cache=False)
+    results = {}
+
+    stats = {}
+    start = time.perf_counter()
+    summarize_diarized.summarize_transcript(transcript, llm, stats=stats)
+    extract_actions_diarized.extract_actions_diarized(transcript, llm, stats=stats)
+    results["separate"] = (stats.get("evaluated_tokens", 0), time.perf_counter() - start)
+
+    llm.reset()
+    stats = {}
+    start = time.perf_counter()
+    summarize_and_extract(transcript, llm, stats=stats)
+    results["shared"] = (stats.get("evaluated_tokens", 0), time.perf_counter() - start)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark transcript-prefix KV reuse between summary and action extraction.")
+    parser.add_argument("transcript", help="Path to a *_diarized.txt transcript")
+    parser.add_argument("--tokens-only", action="store_true", help="Only count prompt-eval tokens with the model tokenizer")
+    args = parser.parse_args()
+
+    transcript = Path(args.transcript).read_text(encoding="utf-8")
+    chunks = len(summarize_diarized.split_chunks(transcript))
+
+    if args.tokens_only:
+        counts = count_tokens_only(transcript)
+        saved = counts["separate"] - counts["shared"]
+        print(f"chunks: {chunks}")
+        print(f"prompt-eval tokens, separate stages: {counts['separate']}")
+        print(f"prompt-eval tokens, shared prefix:   {counts['shared']}")
+        print(f"saved: {saved} ({saved / counts['separate']:.0%})")
+    else:
+        results = run_generation(transcript)
+        separate_tokens, separate_time = results["separate"]
+        shared_tokens, shared_time = results["shared"]
+        saved = separate_tokens - shared_tokens
+        print(f"chunks: {chunks}")
+        print(f"separate stages: {separate_tokens} prompt-eval tokens, {separate_time:.1f}s")
+        print(f"shared prefix:   {shared_tokens} prompt-eval tokens, {shared_time:.1f}s")
+        print(f"saved: {saved} tokens ({saved / separate_tokens:.0%}), {separate_time - shared_time:.1f}s")
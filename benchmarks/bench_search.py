@@ -0,0 +1,122 @@
+# benchmarks/bench_search.py
+#
+# The cross-meeting search index (src/common/search_index.py) on a synthetic corpus: N
+# meetings, each with a diarized transcript, a summary and action items, dated over the past
+# year. Every meeting mentions one of PROJECTS, so some keywords are rare and some are
+# everywhere. Reports the full build (files/s, rows, index size), a no-op incremental
+# update, re-indexing after 1% of the files change, and p50 / p99 latency per query type.
+# The synthetic vocabulary is tiny, so "common keyword" matches nearly every row and shows
+# the worst case: bm25 has to rank every match before the top hits come back.
+#
+#   python benchmarks/bench_search.py --meetings 10000 --minutes 10
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+import synthetic
+from common.search_index import SearchIndex
+
+PROJECTS = [f"project{k:03d}" for k in range(500)]
+DAY = 24 * 3600
+
+# ------------------ CORPUS ------------------
+
+def write_corpus(root, n_meetings, minutes, seed=0):
+    rng = random.Random(seed)
+    dirs = [root / "diarized_transcripts", root / "summaries", root / "action_items"]
+    for d in dirs:
+        d.mkdir(parents=True, exist_ok=True)
+    now = time.time()
+    for i in range(n_meetings):
+        name = f"meeting{i:05d}"
+        project = rng.choice(PROJECTS)
+        transcript = synthetic.synthetic_transcript(minutes, seed=i).splitlines()
+        k = rng.randrange(len(transcript))
+        transcript[k] += f" the {project} budget is due"
+        actions = synthetic.synthetic_actions(minutes, seed=i) + f"\n- SPEAKER_{i % 4:02d}: send the {project} budget"
+        files = {
+            dirs[0] / f"{name}_diarized.txt": "\n".join(transcript),
+            dirs[1] / f"{name}_summary.txt": synthetic.synthetic_summary(minutes, seed=i) + f"\n- Decisions: {project} approved",
+            dirs[2] / f"{name}_action_items.txt": actions,
+        }
+        date = now - rng.uniform(0, 365) * DAY
+        for path, text in files.items():
+            path.write_text(text, encoding="utf-8")
+            os.utime(path, (date, date))
+    return dirs
+
+def queries(rng, now):
+    # (name, search kwargs) drawn fresh for every repetition
+    quarter_start = now - 180 * DAY
+    project = lambda: rng.choice(PROJECTS)
+    return {
+        "rare keyword": lambda: {"query": project()},
+        "common keyword": lambda: {"query": rng.choice(synthetic.VOCABULARY)},
+        "phrase": lambda: {"query": f"{project()} budget is due", "phrase": True},
+        "speaker + quarter": lambda: {
+            "query": project(), "speaker": f"SPEAKER_{rng.randrange(4):02d}",
+            "since": quarter_start, "until": quarter_start + 90 * DAY,
+        },
+        "action owner": lambda: {"query": f"send {project()}", "kinds": ["action"], "speaker": f"SPEAKER_{rng.randrange(4):02d}"},
+        "time window": lambda: {"query": project(), "kinds": ["segment"], "start": 60.0, "end": 300.0},
+    }
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+# ------------------ ENTRY ------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build and query the search index on a synthetic multi-meeting corpus.")
+    parser.add_argument("--meetings", type=int, default=10000)
+    parser.add_argument("--minutes", type=int, default=10, help="Length of each synthetic meeting")
+    parser.add_argument("--repeat", type=int, default=200, help="Queries per query type")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        t0 = time.perf_counter()
+        dirs = write_corpus(root / "output", args.meetings, args.minutes, args.seed)
+        print(f"📝 {args.meetings} meetings written in {time.perf_counter() - t0:.1f}s")
+
+        index = SearchIndex(root / "index.sqlite3")
+        t0 = time.perf_counter()
+        indexed, _ = index.update(dirs)
+        build_s = time.perf_counter() - t0
+        stats = index.stats()
+        size_mb = sum(p.stat().st_size for p in root.glob("index.sqlite3*")) / 1024 ** 2
+        print(f"🔎 Full build: {indexed} files, {stats['rows']} rows in {build_s:.1f}s "
+              f"({indexed / build_s:.0f} files/s), {size_mb:.0f} MB")
+
+        t0 = time.perf_counter()
+        indexed, _ = index.update(dirs)
+        print(f"🔎 No-op update: {indexed} files re-indexed in {time.perf_counter() - t0:.2f}s")
+
+        changed = sorted(dirs[0].glob("*.txt"))[::100]
+        for path in changed:
+            path.write_text(path.read_text(encoding="utf-8") + "\nSPEAKER_00 [9999.00 - 9999.50]: late addition",
+                            encoding="utf-8")
+        t0 = time.perf_counter()
+        indexed, _ = index.update(dirs)
+        print(f"🔎 Incremental update: {indexed} changed files re-indexed in {time.perf_counter() - t0:.2f}s")
+
+        rng = random.Random(args.seed)
+        print(f"\n{'query':<20} {'p50':>9} {'p99':>9} {'hits':>6}")
+        for name, make in queries(rng, time.time()).items():
+            latencies, hits = [], 0
+            for _ in range(args.repeat):
+                kwargs = make()
+                t0 = time.perf_counter()
+                hits += len(index.search(**kwargs))
+                latencies.append(time.perf_counter() - t0)
+            print(f"{name:<20} {percentile(latencies, 50) * 1000:>7.2f}ms {percentile(latencies, 99) * 1000:>7.2f}ms "
+                  f"{hits / args.repeat:>6.1f}")
+        index.close()
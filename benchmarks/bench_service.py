@@ -0,0 +1,169 @@
+# benchmarks/bench_service.py
+#
+# Latency of the local inference service (src/service/server.py) under synthetic load.
+# Jobs arrive as a Poisson process at --rate per second, a --high-priority share of them
+# with priority 10, and each is submitted and awaited over HTTP the way the thin clients do.
+# Reports p50 / p99 end-to-end latency per job kind and priority, the split between queue
+# wait and run time, and throughput.
+#
+# By default the service runs in this process on the stub backends, with an LLM that sleeps
+# as long as a model generating --tokens-per-sec would, so the numbers show the queueing and
+# concurrency behaviour on any CPU. --url points the load at an already running service
+# with the real models instead.
+#
+#   python benchmarks/bench_service.py --jobs 200 --rate 4 --concurrency 4 --llm-slots 2
+#   python benchmarks/bench_service.py --url http://127.0.0.1:8765 --jobs 50 --rate 0.5
+
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import tempfile
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+import synthetic
+from stub_backends import StubDiarization, StubLlama, StubWhisper, count_tokens
+from service.client import ServiceClient
+
+HIGH_PRIORITY = 10
+
+# ------------------ STUB SERVICE ------------------
+
+class SlowStubLlama(StubLlama):
+    # Stub answers, delivered as slowly as a real model would: prompt eval at 10x the
+    # generation rate, as on a typical CPU
+    def __init__(self, tokens_per_sec):
+        self.tokens_per_sec = tokens_per_sec
+
+    def __call__(self, prompt, max_tokens=1024, **params):
+        response = super().__call__(prompt, max_tokens, **params)
+        usage = response["usage"]
+        time.sleep(usage["prompt_tokens"] / (10 * self.tokens_per_sec) + usage["completion_tokens"] / self.tokens_per_sec)
+        return response
+
+def start_stub_service(concurrency, llm_slots, tokens_per_sec):
+    from service.server import InferenceService, make_server
+    service = InferenceService(concurrency, use_cache=False)
+    service.whisper_model, service.diarization_pipeline = StubWhisper(), StubDiarization()
+    service.llm = SlowStubLlama(tokens_per_sec)
+    service.count_tokens = count_tokens
+    # llm_slots stub "workers" instead of K real llama.cpp processes
+    service.llm_slots = threading.Semaphore(llm_slots)
+    service.start()
+    logging.disable(logging.INFO)   # per-stage logs of hundreds of jobs would bury the report
+    server = make_server(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return service, server, f"http://127.0.0.1:{server.server_address[1]}"
+
+# ------------------ LOAD ------------------
+
+def job_params(kind, transcript, wav_path):
+    if kind == "transcribe":
+        return {"audio_path": str(wav_path)}
+    return {"transcript": transcript}
+
+def run_job(client, kind, params, priority, submitted):
+    job = client.wait(client.submit(kind, params, priority))
+    return {
+        "kind": kind, "priority": priority,
+        "latency": time.perf_counter() - submitted,
+        "queue_wait": job["started_at"] - job["submitted_at"],
+        "run": job["finished_at"] - job["started_at"],
+    }
+
+def generate_load(client, kinds, n_jobs, rate, high_share, transcript, wav_path, seed):
+    rng = random.Random(seed)
+    futures = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+        for _ in range(n_jobs):
+            time.sleep(rng.expovariate(rate))
+            kind = rng.choice(kinds)
+            priority = HIGH_PRIORITY if rng.random() < high_share else 0
+            futures.append(pool.submit(
+                run_job, client, kind, job_params(kind, transcript, wav_path), priority, time.perf_counter()
+            ))
+        results = [f.result() for f in futures]
+    return results, time.perf_counter() - start
+
+# ------------------ REPORT ------------------
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+def summarize(results, wall):
+    groups = defaultdict(list)
+    for r in results:
+        groups[(r["kind"], "high" if r["priority"] else "normal")].append(r)
+        groups[("all", "all")].append(r)
+    rows = []
+    for (kind, priority), group in sorted(groups.items()):
+        latencies = [r["latency"] for r in group]
+        rows.append({
+            "kind": kind, "priority": priority, "jobs": len(group),
+            "p50_s": percentile(latencies, 50), "p99_s": percentile(latencies, 99),
+            "queue_wait_p50_s": percentile([r["queue_wait"] for r in group], 50),
+            "run_p50_s": percentile([r["run"] for r in group], 50),
+        })
+    return {"jobs": len(results), "wall_s": wall, "jobs_per_s": len(results) / wall, "groups": rows}
+
+def print_report(report):
+    print(f"{'kind':<12} {'priority':<8} {'jobs':>5} {'p50':>8} {'p99':>8} {'wait p50':>9} {'run p50':>8}")
+    for row in report["groups"]:
+        print(f"{row['kind']:<12} {row['priority']:<8} {row['jobs']:>5} {row['p50_s']:>7.2f}s {row['p99_s']:>7.2f}s "
+              f"{row['queue_wait_p50_s']:>8.2f}s {row['run_p50_s']:>7.2f}s")
+    print(f"\n{report['jobs']} jobs in {report['wall_s']:.1f}s → {report['jobs_per_s']:.2f} jobs/s")
+
+# ------------------ ENTRY ------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="p50 / p99 latency of the inference service under Poisson load.")
+    parser.add_argument("--url", help="Running service (http://host:port or unix:/path); default: in-process stub service")
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=4.0, help="Mean job arrivals per second")
+    parser.add_argument("--kinds", nargs="+", choices=["transcribe", "summarize", "actions"],
+                        default=["summarize", "actions"])
+    parser.add_argument("--high-priority", type=float, default=0.2, help="Share of jobs submitted with high priority")
+    parser.add_argument("--minutes", type=int, default=5, help="Length of the synthetic meeting each job works on")
+    parser.add_argument("--concurrency", type=int, default=4, help="Stub service: jobs running at once")
+    parser.add_argument("--llm-slots", type=int, default=2, help="Stub service: LLM jobs in flight (like --llm-workers)")
+    parser.add_argument("--tokens-per-sec", type=float, default=400.0, help="Stub LLM generation speed")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, help="Also write the report as JSON")
+    args = parser.parse_args()
+
+    service = server = None
+    if args.url:
+        url = args.url
+    else:
+        service, server, url = start_stub_service(args.concurrency, args.llm_slots, args.tokens_per_sec)
+    client = ServiceClient(url)
+    print(f"🛰️ Service at {url}: {client.health()}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        wav_path = Path(tmp) / "meeting.wav"
+        if "transcribe" in args.kinds:
+            synthetic.write_meeting_wav(wav_path, args.minutes)
+        transcript = synthetic.synthetic_transcript(args.minutes)
+        results, wall = generate_load(
+            client, args.kinds, args.jobs, args.rate, args.high_priority, transcript, wav_path, args.seed
+        )
+
+    if server is not None:
+        server.shutdown()
+        service.stop()
+
+    report = summarize(results, wall)
+    report["config"] = {**vars(args), "out": str(args.out) if args.out else None}
+    print_report(report)
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\n📄 Results saved to: {args.out}")
@@ -0,0 +1,88 @@
+# benchmarks/bench_speaker_assignment.py
+#
+# Speaker assignment on a synthetic meeting: the previous per-segment crop (first label of
+# the cropped annotation, O(segments × turns)) vs. the single-pass sweep in
+# diarization.speaker_assignment. Also reports how often each picks the max-overlap speaker.
+#
+#   python benchmarks/bench_speaker_assignment.py --turns 10000
+
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from diarization.speaker_assignment import UNKNOWN_SPEAKER, assign_speakers
+
+# ------------------ SYNTHETIC MEETING ------------------
+
+def synthetic_meeting(n_turns, n_speakers=6, seed=0):
+    rng = random.Random(seed)
+    turns, segments = [], []
+    t = 0.0
+    speaker = 0
+    for _ in range(n_turns):
+        duration = rng.uniform(1.0, 20.0)
+        turns.append((t, t + duration, f"SPEAKER_{speaker:02d}"))
+        # occasional overlapping interjection from someone else
+        if rng.random() < 0.15:
+            other = (speaker + rng.randint(1, n_speakers - 1)) % n_speakers
+            start = t + rng.uniform(0, duration)
+            turns.append((start, start + rng.uniform(0.3, 2.0), f"SPEAKER_{other:02d}"))
+        t += duration + rng.uniform(0.0, 1.5)
+        speaker = (speaker + rng.randint(1, n_speakers - 1)) % n_speakers
+
+    # Whisper-like segments that ignore turn boundaries
+    s = 0.0
+    while s < t:
+        length = rng.uniform(2.0, 12.0)
+        segments.append({"start": s, "end": s + length, "text": " lorem ipsum"})
+        s += length
+    return sorted(turns), segments
+
+# ------------------ REFERENCE IMPLEMENTATIONS ------------------
+
+def crop_first_label(segment, turns):
+    # What diarization.crop(Segment(start, end)).labels()[0] did: every turn is visited and
+    # the alphabetically first label that overlaps at all wins
+    labels = sorted({spk for start, end, spk in turns if start < segment["end"] and end > segment["start"]})
+    return labels[0] if labels else UNKNOWN_SPEAKER
+
+def max_overlap_label(segment, turns):
+    overlap = {}
+    for start, end, spk in turns:
+        shared = min(end, segment["end"]) - max(start, segment["start"])
+        if shared > 0:
+            overlap[spk] = overlap.get(spk, 0.0) + shared
+    return max(overlap, key=overlap.get) if overlap else UNKNOWN_SPEAKER
+
+# ------------------ BENCHMARK ------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmark speaker assignment.")
+    parser.add_argument("--turns", type=int, default=10000)
+    parser.add_argument("--crop-sample", type=int, default=500,
+                        help="Segments timed with the O(n×m) crop baseline (extrapolated to all segments)")
+    args = parser.parse_args()
+
+    turns, segments = synthetic_meeting(args.turns)
+    print(f"turns: {len(turns)} | segments: {len(segments)}")
+
+    start = time.perf_counter()
+    assigned = assign_speakers(segments, turns)
+    sweep_time = time.perf_counter() - start
+
+    sample = segments[:: max(1, len(segments) // args.crop_sample)]
+    start = time.perf_counter()
+    crop_labels = [crop_first_label(segment, turns) for segment in sample]
+    crop_time = (time.perf_counter() - start) * len(segments) / len(sample)
+
+    sweep_by_start = {start: speaker for start, _, speaker, _ in assigned}
+    reference = [max_overlap_label(segment, turns) for segment in sample]
+    sweep_agree = sum(sweep_by_start[s["start"]] == ref for s, ref in zip(sample, reference)) / len(sample)
+    crop_agree = sum(label == ref for label, ref in zip(crop_labels, reference)) / len(sample)
+
+    print(f"crop (estimated): {crop_time * 1000:9.1f} ms | matches max-overlap speaker {crop_agree:.1%}")
+    print(f"sweep:            {sweep_time * 1000:9.1f} ms | matches max-overlap speaker {sweep_agree:.1%}")
+    print(f"speed-up: {crop_time / sweep_time:.0f}x")
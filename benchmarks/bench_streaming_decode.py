@@ -0,0 +1,92 @@
+# benchmarks/bench_streaming_decode.py
+#
+# Peak RSS of common.audio.iter_audio_windows on a short and a long generated recording,
+# for both the memory-mapped WAV path and the ffmpeg pipe path. Exits non-zero if the long
+# recording's peak RSS grows more than --tolerance-mb over the short one's.
+#
+#   python benchmarks/bench_streaming_decode.py --short-min 10 --long-min 180
+
+import sys
+import json
+import wave
+import argparse
+import resource
+import subprocess
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from common.audio import SAMPLE_RATE, iter_audio_windows
+
+WINDOW_MS = 5 * 60 * 1000
+
+# ------------------ INPUT GENERATION ------------------
+
+def write_wav(path, minutes):
+    # Written one minute at a time so generating the input stays flat too
+    rng = np.random.default_rng(0)
+    t = np.arange(SAMPLE_RATE * 60) / SAMPLE_RATE
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        for minute in range(minutes):
+            tone = 0.3 * np.sin(2 * np.pi * (200 + 10 * (minute % 20)) * t)
+            noise = 0.05 * rng.standard_normal(len(t))
+            w.writeframes(((tone + noise) * 32767).astype("<i2").tobytes())
+
+def write_flac(path, minutes):
+    subprocess.run(
+        ["ffmpeg", "-nostdin", "-loglevel", "error", "-y", "-f", "lavfi",
+         "-i", f"sine=frequency=220:sample_rate=44100:duration={minutes * 60}", "-ac", "2", str(path)],
+        check=True
+    )
+
+# ------------------ MEASUREMENT ------------------
+
+def consume(path):
+    samples = 0
+    for window in iter_audio_windows(path, WINDOW_MS):
+        samples += len(window)
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"seconds": samples / SAMPLE_RATE, "peak_rss_mb": peak_mb}))
+
+def measure(path):
+    out = subprocess.run([sys.executable, __file__, "--consume", str(path)], capture_output=True, check=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that streaming decode keeps peak RSS flat.")
+    parser.add_argument("--short-min", type=int, default=10)
+    parser.add_argument("--long-min", type=int, default=180)
+    parser.add_argument("--tolerance-mb", type=float, default=32.0)
+    parser.add_argument("--consume", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.consume:
+        consume(args.consume)
+        sys.exit(0)
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        for kind, writer in (("wav (mmap)", write_wav), ("flac (ffmpeg pipe)", write_flac)):
+            results = {}
+            for minutes in (args.short_min, args.long_min):
+                path = Path(tmp) / f"synthetic_{minutes}min{'.wav' if writer is write_wav else '.flac'}"
+                writer(path, minutes)
+                results[minutes] = measure(path)
+                path.unlink()
+
+            short, long = results[args.short_min], results[args.long_min]
+            growth = long["peak_rss_mb"] - short["peak_rss_mb"]
+            ok = growth <= args.tolerance_mb
+            failed |= not ok
+            print(
+                f"{kind:<20} {args.short_min:>4} min: {short['peak_rss_mb']:7.1f} MB | "
+                f"{args.long_min:>4} min: {long['peak_rss_mb']:7.1f} MB | growth {growth:+.1f} MB "
+                f"{'✅' if ok else '❌'}"
+            )
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,57 @@
+# benchmarks/bench_structured_actions.py
+#
+# Generated tokens per chunk for free-text action items ("- Speaker_X: Do <task>") against
+# grammar-constrained JSON records, which stop as soon as the array closes. The completion
+# cache is off so both modes really generate.
+#
+#   python benchmarks/bench_structured_actions.py output/diarized_transcripts/meeting_diarized.txt
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from common.llm import load_llm
+from action_extraction import extract_actions_diarized, structured_actions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure generated tokens for free-text vs JSON-grammar action items.")
+    parser.add_argument("transcripts", nargs="+", help="Paths to *_diarized.txt transcripts")
+    args = parser.parse_args()
+
+    llm = load_llm(use_cache=False)
+    max_tokens = extract_actions_diarized.MAX_TOKENS
+    totals = {"text": [0, 0.0], "json": [0, 0.0]}
+    chunks_seen = items_found = items_kept = 0
+
+    print(f"{'transcript':<28} {'chunk':>5} {'text tok':>8} {'json tok':>8} {'items':>5}")
+    for path in args.transcripts:
+        transcript = Path(path).read_text(encoding="utf-8")
+        items = []
+        instruction = structured_actions.STRUCTURED_ACTIONS_INSTRUCTION
+        for idx, chunk in enumerate(extract_actions_diarized.split_chunks(transcript, instruction=instruction)):
+            start = time.perf_counter()
+            text = llm(extract_actions_diarized.format_prompt(chunk), max_tokens=max_tokens)
+            totals["text"][1] += time.perf_counter() - start
+            start = time.perf_counter()
+            json_response = structured_actions.complete_json(llm, structured_actions.format_prompt(chunk), max_tokens)
+            totals["json"][1] += time.perf_counter() - start
+
+            chunk_items = structured_actions.parse_action_items(json_response)
+            items.extend(chunk_items)
+            text_tokens = text["usage"]["completion_tokens"]
+            json_tokens = json_response["usage"]["completion_tokens"]
+            totals["text"][0] += text_tokens
+            totals["json"][0] += json_tokens
+            chunks_seen += 1
+            print(f"{Path(path).name:<28} {idx + 1:>5} {text_tokens:>8} {json_tokens:>8} {len(chunk_items):>5}")
+        items_found += len(items)
+        items_kept += len(structured_actions.deduplicate(items))
+
+    text_tokens, text_time = totals["text"]
+    json_tokens, json_time = totals["json"]
+    print(f"\ngenerated tokens per chunk: text {text_tokens / chunks_seen:.0f} | json {json_tokens / chunks_seen:.0f} "
+          f"({1 - json_tokens / max(text_tokens, 1):.0%} fewer)")
+    print(f"wall: text {text_time:.1f}s | json {json_time:.1f}s")
+    print(f"items: {items_found} extracted, {items_kept} after de-duplication")
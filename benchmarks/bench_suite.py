@@ -0,0 +1,278 @@
+# benchmarks/bench_suite.py
+#
+# Offline, CPU-only regression suite. Every stage runs on synthetic meetings of increasing
+# length (benchmarks/synthetic.py), each (stage, backend, length) in a fresh process so peak
+# RSS belongs to that run alone. Results, including a log-log scaling exponent per stage
+# (1.0 = linear in meeting length), are written as JSON that can be compared between commits.
+#
+# Stages: decode (transcribe_chunked.split_audio), transcribe_diarized (decode + diarization
+# + Whisper + speaker assignment), assign_speakers, chunking, prompts, llm, pdf. The stub
+# backends (benchmarks/stub_backends.py) isolate this project's own code; with
+# --backends stub,real the stages that use models run again on whichever real models are
+# available locally, and the rest are marked as skipped.
+#
+#   python benchmarks/bench_suite.py --minutes 5 15 30 60
+#   python benchmarks/bench_suite.py --compare output/benchmarks/suite-<old>.json
+
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import platform
+import resource
+import subprocess
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+import synthetic
+from stub_backends import StubWhisper, real_backends, stub_backends
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+RESULTS_DIR = BASE_DIR / "output" / "benchmarks"
+MIN_WALL_DELTA_S = 0.02   # slowdowns smaller than this are timer noise, whatever the ratio
+
+# ------------------ STAGES ------------------
+
+def stage_decode(backends, wav_path, transcript, minutes):
+    from transcription.transcribe_chunked import split_audio
+    chunks, _ = split_audio(wav_path)
+    return {"audio_sec": sum(len(chunk) for chunk in chunks) / synthetic.SAMPLE_RATE}
+
+def stage_transcribe_diarized(backends, wav_path, transcript, minutes):
+    from diarization import transcribe_diarized_chunked as diarization
+    segments = diarization.transcribe_diarized(wav_path, backends["asr"], backends["diarization"], cache=None)
+    return {"segments": len(segments)}
+
+def stage_assign_speakers(backends, wav_path, transcript, minutes):
+    from diarization.speaker_assignment import assign_speakers
+    # Whole-meeting segments with word timings against the synthetic turns, so the sweep
+    # and the word-level split are timed without decode or models
+    turns = synthetic.synthetic_turns(minutes)
+    segments = StubWhisper().segments(minutes * 60.0, word_timestamps=True)
+    assigned = assign_speakers(segments, turns, split_on_speaker_change=True)
+    return {"segments": len(segments), "pieces": len(assigned)}
+
+def stage_chunking(backends, wav_path, transcript, minutes):
+    from summarization import summarize_diarized
+    chunks = summarize_diarized.split_chunks(transcript, backends["count_tokens"])
+    return {"chunks": len(chunks), "chars": len(transcript)}
+
+def stage_prompts(backends, wav_path, transcript, minutes):
+    from summarization import summarize_diarized
+    from action_extraction import extract_actions_diarized, structured_actions
+    chunks = summarize_diarized.split_chunks(transcript, backends["count_tokens"])
+    prompts = [
+        format_prompt(chunk)
+        for chunk in chunks
+        for format_prompt in (summarize_diarized.format_prompt, extract_actions_diarized.format_prompt,
+                              structured_actions.format_prompt)
+    ]
+    return {"prompts": len(prompts), "prompt_tokens": sum(backends["count_tokens"](p) for p in prompts)}
+
+def stage_llm(backends, wav_path, transcript, minutes):
+    from common.llm import complete
+    from summarization import summarize_diarized
+    from action_extraction import extract_actions_diarized
+    llm = backends["llm"]
+    prompt_tokens = completion_tokens = calls = 0
+    for chunk in summarize_diarized.split_chunks(transcript, backends["count_tokens"]):
+        for module in (summarize_diarized, extract_actions_diarized):
+            usage = complete(llm, module.format_prompt(chunk), max_tokens=module.MAX_TOKENS)["usage"]
+            prompt_tokens += usage["prompt_tokens"]
+            completion_tokens += usage["completion_tokens"]
+            calls += 1
+    return {"llm_calls": calls, "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
+
+def stage_pdf(backends, wav_path, transcript, minutes):
+    from report import export_pdf
+    name = f"bench_suite_{minutes}min"
+    path = export_pdf.export_to_pdf(name, summary=synthetic.synthetic_summary(minutes),
+                                    actions=synthetic.synthetic_actions(minutes))
+    size = path.stat().st_size
+    path.unlink()
+    return {"pdf_bytes": size}
+
+# name: (function, backends it needs, throughput unit: key of its counters per wall second)
+STAGES = {
+    "decode": (stage_decode, (), "audio_sec"),
+    "transcribe_diarized": (stage_transcribe_diarized, ("asr", "diarization"), "segments"),
+    "assign_speakers": (stage_assign_speakers, (), "segments"),
+    "chunking": (stage_chunking, ("count_tokens",), "chars"),
+    "prompts": (stage_prompts, ("count_tokens",), "prompts"),
+    "llm": (stage_llm, ("llm", "count_tokens"), "llm_calls"),
+    "pdf": (stage_pdf, (), "pdf_bytes"),
+}
+
+# ------------------ MEASUREMENT ------------------
+
+def cpu_seconds():
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)   # ffmpeg decoders, Whisper workers
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+def run_stage(stage, backend, wav_path, transcript_path, minutes):
+    # Runs in its own process; prints one JSON line
+    fn, need, unit = STAGES[stage]
+    backends = stub_backends()
+    if backend == "real":
+        try:
+            backends.update(real_backends(need))
+        except (LookupError, ImportError) as e:
+            print(json.dumps({"skipped": str(e)}))
+            return
+    transcript = Path(transcript_path).read_text(encoding="utf-8")
+    base_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    cpu = cpu_seconds()
+    start = time.perf_counter()
+    counters = fn(backends, Path(wav_path), transcript, minutes)
+    wall = time.perf_counter() - start
+    cpu = cpu_seconds() - cpu
+
+    input_sec = minutes * 60
+    print(json.dumps({
+        "wall_s": wall,
+        "cpu_s": cpu,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "base_rss_mb": base_rss_mb,
+        "rtf": wall / input_sec,
+        "throughput": {"value": counters[unit] / wall if wall > 0 else None, "unit": f"{unit}/s"},
+        "counters": counters,
+    }))
+
+def measure(stage, backend, wav_path, transcript_path, minutes):
+    out = subprocess.run(
+        [sys.executable, __file__, "--run", stage, "--backend", backend,
+         "--wav", str(wav_path), "--transcript", str(transcript_path), "--minutes", str(minutes)],
+        capture_output=True, text=True
+    )
+    if out.returncode != 0:
+        return {"error": (out.stderr.strip().splitlines() or ["exit code %d" % out.returncode])[-1]}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def scaling_exponent(points):
+    # Least-squares slope of log(wall) against log(minutes)
+    points = [(math.log(m), math.log(w)) for m, w in points if w and w > 0]
+    if len(points) < 2:
+        return None
+    mx = sum(x for x, _ in points) / len(points)
+    my = sum(y for _, y in points) / len(points)
+    var = sum((x - mx) ** 2 for x, _ in points)
+    return sum((x - mx) * (y - my) for x, y in points) / var if var else None
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# ------------------ REPORTING ------------------
+
+def format_result(r):
+    if "skipped" in r or "error" in r:
+        return f"{r['backend']:<5} {r['stage']:<20} {r['minutes']:>5} min  " + (
+            f"skipped: {r['skipped']}" if "skipped" in r else f"❌ {r['error']}")
+    throughput = r["throughput"]["value"]
+    return (
+        f"{r['backend']:<5} {r['stage']:<20} {r['minutes']:>5} min  wall {r['wall_s']:8.3f}s  cpu {r['cpu_s']:8.3f}s  "
+        f"RTF {r['rtf']:.5f}  peak {r['peak_rss_mb']:7.1f} MB  "
+        f"{throughput or 0:10.1f} {r['throughput']['unit']}"
+    )
+
+def compare(results, baseline, tolerance):
+    # Wall time and peak RSS against an earlier run; True if any stage got slower or bigger
+    # than the tolerance allows
+    old = {(r["backend"], r["stage"], r["minutes"]): r for r in baseline["results"] if "wall_s" in r}
+    regressed = False
+    print(f"\nvs {baseline.get('commit') or 'baseline'} (tolerance {tolerance:.0%}):")
+    for r in results:
+        before = old.get((r["backend"], r["stage"], r["minutes"]))
+        if before is None or "wall_s" not in r:
+            continue
+        wall_ratio = r["wall_s"] / before["wall_s"] if before["wall_s"] > 0 else 1.0
+        rss_ratio = r["peak_rss_mb"] / before["peak_rss_mb"] if before["peak_rss_mb"] > 0 else 1.0
+        slower = wall_ratio > 1 + tolerance and r["wall_s"] - before["wall_s"] > MIN_WALL_DELTA_S
+        bad = slower or rss_ratio > 1 + tolerance
+        regressed |= bad
+        print(f"{r['backend']:<5} {r['stage']:<20} {r['minutes']:>5} min  wall x{wall_ratio:5.2f}  "
+              f"peak RSS x{rss_ratio:5.2f}  {'❌' if bad else '✅'}")
+    return regressed
+
+# ------------------ ENTRY ------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark every stage on synthetic meetings of increasing length.")
+    parser.add_argument("--minutes", type=int, nargs="+", default=[5, 15, 30, 60], help="Meeting lengths to generate")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--backends", default="stub", help="Comma-separated: stub, real")
+    parser.add_argument("--out", type=Path, help="Result JSON (default: output/benchmarks/suite-<commit>.json)")
+    parser.add_argument("--compare", type=Path, help="Earlier result JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown / RSS growth in --compare")
+    parser.add_argument("--run", choices=list(STAGES), help=argparse.SUPPRESS)
+    parser.add_argument("--backend", help=argparse.SUPPRESS)
+    parser.add_argument("--wav", help=argparse.SUPPRESS)
+    parser.add_argument("--transcript", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_stage(args.run, args.backend, args.wav, args.transcript, args.minutes[0])
+        sys.exit(0)
+
+    backends = args.backends.split(",")
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for minutes in args.minutes:
+            wav_path = synthetic.write_meeting_wav(Path(tmp) / f"meeting_{minutes}min.wav", minutes)
+            transcript_path = Path(tmp) / f"meeting_{minutes}min_diarized.txt"
+            transcript_path.write_text(synthetic.synthetic_transcript(minutes), encoding="utf-8")
+            for backend in backends:
+                for stage in args.stages:
+                    # Stages without models behave the same on both backends; run them once
+                    if backend == "real" and not STAGES[stage][1]:
+                        continue
+                    result = {"backend": backend, "stage": stage, "minutes": minutes,
+                              **measure(stage, backend, wav_path, transcript_path, minutes)}
+                    results.append(result)
+                    print(format_result(result))
+            wav_path.unlink()
+
+    scaling = {}
+    for backend in backends:
+        for stage in args.stages:
+            points = [(r["minutes"], r["wall_s"], r["peak_rss_mb"]) for r in results
+                      if r["backend"] == backend and r["stage"] == stage and "wall_s" in r]
+            if points:
+                scaling[f"{backend}/{stage}"] = {
+                    "points": [{"minutes": m, "wall_s": w, "peak_rss_mb": rss} for m, w, rss in points],
+                    "wall_exponent": scaling_exponent([(m, w) for m, w, _ in points]),
+                }
+
+    print("\nscaling (wall ∝ minutes^k):")
+    for key, curve in scaling.items():
+        k = curve["wall_exponent"]
+        print(f"{key:<26} k = {k:.2f}" if k is not None else f"{key:<26} k = n/a")
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "processor": platform.processor(), "cpus": os.cpu_count()},
+        "minutes": args.minutes,
+        "results": results,
+        "scaling": scaling,
+    }
+    out_path = args.out or RESULTS_DIR / f"suite-{commit or 'local'}.json"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"\n📄 Results saved to: {out_path}")
+
+    failed = any("error" in r for r in results)
+    if args.compare:
+        failed |= compare(results, json.loads(args.compare.read_text(encoding="utf-8")), args.tolerance)
+    sys.exit(1 if failed else 0)
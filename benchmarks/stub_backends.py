@@ -0,0 +1,123 @@
+# benchmarks/stub_backends.py
+#
+# Stand-ins for Whisper, the pyannote pipeline and llama.cpp with the same call signatures
+# the pipeline uses. They return deterministic, plausibly shaped output in next to no time,
+# so a benchmark run measures this project's own code (decode, chunking, speaker
+# assignment, prompt building, PDF) rather than model inference, offline and on any CPU.
+# real_backends() loads the real models instead, for whichever of them are present.
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from synthetic import SAMPLE_RATE, WORDS_PER_SEC, VOCABULARY
+
+SEGMENT_SEC = 4.0
+TURN_SEC = 8.0
+
+# ------------------ ASR ------------------
+
+class StubWhisper:
+    # whisper_model.transcribe(audio, **options) -> {"text", "segments"}
+
+    def transcribe(self, audio, word_timestamps=False, **options):
+        segments = self.segments(len(audio) / SAMPLE_RATE, word_timestamps)
+        return {"text": "".join(s["text"] for s in segments), "segments": segments}
+
+    def segments(self, duration, word_timestamps=False):
+        # SEGMENT_SEC segments of WORDS_PER_SEC words, optionally with evenly spaced word timings
+        segments, start, n = [], 0.0, 0
+        while start < duration:
+            end = min(duration, start + SEGMENT_SEC)
+            count = max(1, int((end - start) * WORDS_PER_SEC))
+            words = [VOCABULARY[(n + k) % len(VOCABULARY)] for k in range(count)]
+            segment = {"start": start, "end": end, "text": " " + " ".join(words)}
+            if word_timestamps:
+                step = (end - start) / count
+                segment["words"] = [
+                    {"start": start + k * step, "end": start + (k + 1) * step, "word": " " + word}
+                    for k, word in enumerate(words)
+                ]
+            segments.append(segment)
+            start, n = end, n + count
+        return segments
+
+# ------------------ DIARIZATION ------------------
+
+class _Turn:
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+
+class StubAnnotation:
+    def __init__(self, turns):
+        self.turns = turns
+
+    def itertracks(self, yield_label=False):
+        for start, end, speaker in self.turns:
+            yield (_Turn(start, end), None, speaker) if yield_label else (_Turn(start, end), None)
+
+class StubDiarization:
+    # pipeline({"waveform": (1, time) tensor, "sample_rate": sr}) -> Annotation-like turns,
+    # rotating through four speakers every TURN_SEC with a short overlap
+
+    def __call__(self, audio):
+        duration = audio["waveform"].shape[-1] / audio["sample_rate"]
+        turns, start, i = [], 0.0, 0
+        while start < duration:
+            end = min(duration, start + TURN_SEC)
+            turns.append((start, min(duration, end + 0.3), f"SPEAKER_{i % 4:02d}"))
+            start, i = end, i + 1
+        return StubAnnotation(turns)
+
+# ------------------ LLM ------------------
+
+class StubLlama:
+    # llm(prompt, max_tokens=...) -> llama-cpp completion dict with a short bullet answer
+
+    def tokenize(self, text, add_bos=True):
+        return list(range(count_tokens(text.decode("utf-8", errors="ignore")) + int(add_bos)))
+
+    def __call__(self, prompt, max_tokens=1024, **params):
+        text = "\n".join(f"- SPEAKER_{i:02d}: {' '.join(VOCABULARY[i:i + 8])}" for i in range(4))
+        return {
+            "choices": [{"text": text, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": count_tokens(prompt), "completion_tokens": count_tokens(text)},
+        }
+
+def count_tokens(text):
+    # Roughly what a SentencePiece vocabulary gives for English: ~4/3 tokens per word
+    return (len(text.split()) * 4 + 2) // 3
+
+# ------------------ SELECTION ------------------
+
+def stub_backends():
+    return {"asr": StubWhisper(), "diarization": StubDiarization(), "llm": StubLlama(), "count_tokens": count_tokens}
+
+def real_backends(need):
+    # Only what `need` names is loaded; a backend whose model isn't available offline raises
+    # LookupError so the suite can mark the stage as skipped instead of downloading weights
+    backends = {}
+    if "asr" in need:
+        import whisper
+        from diarization import transcribe_diarized_chunked as diarization
+        cache_dir = Path(os.getenv("XDG_CACHE_HOME", Path.home() / ".cache")) / "whisper"
+        if not (cache_dir / f"{diarization.WHISPER_MODEL}.pt").exists():
+            raise LookupError(f"Whisper '{diarization.WHISPER_MODEL}' weights not in {cache_dir}")
+        backends["asr"] = whisper.load_model(diarization.WHISPER_MODEL)
+    if "diarization" in need:
+        from pyannote.audio import Pipeline
+        from diarization import transcribe_diarized_chunked as diarization
+        if not diarization.HF_TOKEN:
+            raise LookupError("HF_TOKEN not set for pyannote")
+        backends["diarization"] = Pipeline.from_pretrained(diarization.PYANNOTE_MODEL_ID, use_auth_token=diarization.HF_TOKEN)
+    if "llm" in need or "count_tokens" in need:
+        from common.llm import MODEL_PATH, load_llm, token_counter
+        if not MODEL_PATH.exists():
+            raise LookupError(f"LLM not found: {MODEL_PATH}")
+        backends["count_tokens"] = token_counter()
+        if "llm" in need:
+            backends["llm"] = load_llm(use_cache=False)
+    return backends
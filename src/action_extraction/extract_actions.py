@@ -3,7 +3,12 @@ import sys
 import argparse
 import logging
 from pathlib import Path
-from llama_cpp import Llama
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.chunking import pack_by_tokens, sentences
+from common.completion_cache import CachedLlama, log_cache_stats
+from common.metrics import METRICS, run_id
+from common.llm import chunk_token_budget, token_counter
 
 # ------------------ CONFIG ------------------
 
@@ -11,7 +16,7 @@ BASE_DIR = Path(__file__).resolve().parents[2]
 MODEL_PATH = BASE_DIR / "input" / "models" / "mistral-7b-instruct-v0.3-gguf" / "mistral-7b-instruct-v0.3.Q4_K_M.gguf"
 INPUT_DIR = BASE_DIR / "output" / "transcripts"
 OUTPUT_DIR = BASE_DIR / "output" / "action_items"
-CHUNK_CHAR_LENGTH = 3000
+N_CTX = 4096
 MAX_TOKENS = 512
 
 # ------------------ SETUP ------------------
@@ -21,8 +26,10 @@ logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
 # ------------------ UTILS ------------------
 
-def chunk_text(text, max_chars):
-    return [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+def chunk_text(text, count_tokens):
+    # Whole sentences, packed into the context left by the prompt template and the answer
+    budget = chunk_token_budget(build_prompt(""), MAX_TOKENS, count_tokens, n_ctx=N_CTX)
+    return pack_by_tokens(sentences(text), count_tokens, budget, sep=" ")
 
 def build_prompt(transcript_chunk):
     return f"""
@@ -44,7 +51,7 @@ Respond ONLY with the formatted action items, no explanations.
 """
 
 def extract_action_items(llm, transcript_text):
-    chunks = chunk_text(transcript_text, CHUNK_CHAR_LENGTH)
+    chunks = chunk_text(transcript_text, token_counter(MODEL_PATH))
     action_items = []
 
     for idx, chunk in enumerate(chunks):
@@ -59,7 +66,7 @@ def extract_action_items(llm, transcript_text):
 
 # ------------------ MAIN ------------------
 
-def main(base_filename):
+def main(base_filename, use_cache=True):
     input_path = INPUT_DIR / f"{base_filename}_transcripts" / f"{base_filename}_transcript.txt"
     output_path = OUTPUT_DIR / f"{base_filename}_action_items.txt"
 
@@ -73,25 +80,33 @@ def main(base_filename):
         logging.error(f"❌ Model file not found: {MODEL_PATH}")
         sys.exit(1)
 
-    logging.info(f"🔄 Loading GGUF model from: {MODEL_PATH}")
-    llm = Llama(
-        model_path=str(MODEL_PATH),
-        n_ctx=4096,
-        n_threads=6,
-        verbose=False
-    )
+    def load():
+        from llama_cpp import Llama
+        logging.info(f"🔄 Loading GGUF model from: {MODEL_PATH}")
+        return Llama(
+            model_path=str(MODEL_PATH),
+            n_ctx=N_CTX,
+            n_threads=6,
+            verbose=False
+        )
+
+    # Unchanged chunks are answered from the completion cache without loading the model
+    llm = CachedLlama(MODEL_PATH, load, n_ctx=N_CTX) if use_cache else load()
 
     logging.info(f"📄 Processing transcript: {base_filename}")
     extracted = extract_action_items(llm, transcript_text)
 
     output_path.write_text(extracted, encoding="utf-8")
+    log_cache_stats(llm)
     logging.info(f"✅ Action items saved to: {output_path}")
+    METRICS.export(run_id(base_filename))
 
 # ------------------ ENTRY ------------------
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Extract action items from transcript.")
     parser.add_argument("filename", help="Base filename without extension")
+    parser.add_argument("--no-cache", action="store_true", help="Always run the model instead of reusing cached completions")
     args = parser.parse_args()
 
-    main(args.filename)
+    main(args.filename, use_cache=not args.no_cache)
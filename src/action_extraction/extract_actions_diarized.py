@@ -1,70 +1,31 @@
 import sys
 import logging
-import textwrap
+import argparse
 from pathlib import Path
-from llama_cpp import Llama
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.completion_cache import log_cache_stats
+from common.chunking import pack_by_tokens, speaker_lines
+from common.columnar_transcript import read_window, window_tag
+from common.metrics import METRICS, run_id
+from common.search_index import index_outputs
+from common.llm import MODEL_PATH, chunk_token_budget, complete, load_llm, token_counter, transcript_block
+from action_extraction import structured_actions
+from service import client as service_client
 
 # ------------------ CONFIG ------------------
 
 BASE_DIR = Path(__file__).resolve().parents[2]
-MODEL_PATH = BASE_DIR / "input" / "models" / "mistral-7b-instruct-v0.3-gguf" / "mistral-7b-instruct-v0.3.Q4_K_M.gguf"
 INPUT_DIR = BASE_DIR / "output" / "diarized_transcripts"
 OUTPUT_DIR = BASE_DIR / "output" / "action_items"
-MAX_CHARS_PER_CHUNK = 3500
+MAX_TOKENS = 1024
 
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
-# ------------------ INPUT CHECK ------------------
-
-if len(sys.argv) < 2:
-    logging.error("❌ Usage: python extract_actions_diarized.py <diarized_transcript_filename>")
-    sys.exit(1)
-
-input_filename = sys.argv[1]
-input_path = INPUT_DIR / input_filename
-
-if not input_path.exists():
-    logging.error(f"❌ File not found: {input_path}")
-    sys.exit(1)
-
-base_name = input_path.stem.replace("_diarized", "")
-output_path = OUTPUT_DIR / f"{base_name}_action_items.txt"
-
-# ------------------ LOAD MODEL ------------------
-
-if not MODEL_PATH.exists():
-    logging.error(f"❌ Model not found: {MODEL_PATH}")
-    sys.exit(1)
-
-logging.info("🧠 Loading local Mistral model via llama-cpp...")
-llm = Llama(
-    model_path=str(MODEL_PATH),
-    n_ctx=4096,
-    n_threads=8,
-    n_batch=512,
-    temperature=0.3,
-    stop=["</s>"],
-    verbose=False
-)
-
-# ------------------ READ INPUT ------------------
-
-transcript = input_path.read_text(encoding="utf-8")
-logging.info(f"📄 Loaded transcript: {len(transcript)} characters")
-
-# ------------------ CHUNKING ------------------
-
-chunks = textwrap.wrap(transcript, MAX_CHARS_PER_CHUNK, break_long_words=False, break_on_hyphens=False)
-logging.info(f"✂️ Split transcript into {len(chunks)} chunk(s)")
-
 # ------------------ PROMPT TEMPLATE ------------------
 
-def format_prompt(text):
-    return f"""### Meeting Transcript:
-{text}
-
-### Instruction:
+ACTIONS_INSTRUCTION = """### Instruction:
 From the above transcript, extract all actionable items discussed by the speakers.
 
 For each action item, include:
@@ -78,23 +39,131 @@ For each action item, include:
 ### Action Items:
 """
 
-# ------------------ EXTRACT ACTIONS ------------------
+def format_prompt(text):
+    return transcript_block(text) + ACTIONS_INSTRUCTION
 
-action_items = []
+# ------------------ EXTRACT ACTIONS ------------------
 
-for idx, chunk in enumerate(chunks):
-    logging.info(f"📌 Extracting from chunk {idx+1}/{len(chunks)}...")
-    prompt = format_prompt(chunk)
-    response = llm(prompt, max_tokens=1024)
+def split_chunks(transcript, count_tokens=None, instruction=ACTIONS_INSTRUCTION):
+    # Whole speaker lines, packed into the context left by the prompt template and the answer
+    count_tokens = count_tokens or token_counter()
+    budget = chunk_token_budget(transcript_block("") + instruction, MAX_TOKENS, count_tokens)
+    return pack_by_tokens(speaker_lines(transcript), count_tokens, budget)
 
+def format_chunk_actions(idx, response):
     if isinstance(response, dict) and "choices" in response:
         output_text = response["choices"][0]["text"].strip()
     else:
         output_text = response.strip()
 
-    action_items.append(f"🔹 Chunk {idx+1}:\n{output_text}\n")
-
-# ------------------ SAVE OUTPUT ------------------
-
-output_path.write_text("\n".join(action_items), encoding="utf-8")
-logging.info(f"✅ Done! Action items saved to: {output_path}")
+    return f"🔹 Chunk {idx+1}:\n{output_text}\n"
+
+def extract_actions_diarized(transcript, llm, stats=None, n_parallel=None, count_tokens=None):
+    chunks = split_chunks(transcript, count_tokens)
+    logging.info(f"✂️ Split transcript into {len(chunks)} chunk(s)")
+
+    if n_parallel:
+        from common.llm_batch import complete_batch   # numpy + llama.cpp's low-level API
+        logging.info(f"📌 Extracting from {len(chunks)} chunk(s) as up to {n_parallel} parallel sequences...")
+        responses = complete_batch(llm, [format_prompt(chunk) for chunk in chunks], MAX_TOKENS, n_parallel)
+        return "\n".join(format_chunk_actions(idx, response) for idx, response in enumerate(responses))
+
+    action_items = []
+
+    for idx, chunk in enumerate(chunks):
+        logging.info(f"📌 Extracting from chunk {idx+1}/{len(chunks)}...")
+        response = complete(llm, format_prompt(chunk), max_tokens=MAX_TOKENS, stats=stats)
+        action_items.append(format_chunk_actions(idx, response))
+
+    return "\n".join(action_items)
+
+def extract_action_items_json(transcript, llm, count_tokens=None):
+    # Grammar-constrained {task, owner, deadline, source_time} records, de-duplicated across chunks
+    chunks = split_chunks(transcript, count_tokens, instruction=structured_actions.STRUCTURED_ACTIONS_INSTRUCTION)
+    logging.info(f"✂️ Split transcript into {len(chunks)} chunk(s)")
+
+    items = []
+    for idx, chunk in enumerate(chunks):
+        logging.info(f"📌 Extracting structured items from chunk {idx+1}/{len(chunks)}...")
+        response = structured_actions.complete_json(llm, structured_actions.format_prompt(chunk), max_tokens=MAX_TOKENS)
+        items.extend(structured_actions.parse_action_items(response))
+
+    unique = structured_actions.deduplicate(items)
+    logging.info(f"🧹 {len(items)} item(s) extracted, {len(unique)} after de-duplication")
+    return unique
+
+# ------------------ MAIN ------------------
+
+def main(input_filename, n_parallel=None, as_json=False, server=None, start=None, end=None, speaker=None, output=None):
+    input_path = INPUT_DIR / input_filename
+
+    if not input_path.exists():
+        logging.error(f"❌ File not found: {input_path}")
+        sys.exit(1)
+
+    base_name = input_path.stem.replace("_diarized", "")
+    tag = window_tag(start, end, speaker)
+    output_path = output or OUTPUT_DIR / (f"{base_name}_action_items.{tag}.txt" if tag else f"{base_name}_action_items.txt")
+
+    client = service_client.connect(server)
+    unsupported = service_client.local_only(client, parallel=n_parallel)
+    if unsupported:
+        logging.error(f"❌ {', '.join(unsupported)} can't be used with the inference service at {client.address}; "
+                      f"run without --server / ${service_client.SERVER_ENV}")
+        sys.exit(1)
+    if client is not None:
+        logging.info(f"🛰️ Sending to the inference service at {client.address}...")
+        result = client.run("actions", {
+            "transcript": read_window(input_path, start, end, speaker), "json_actions": as_json
+        }, name=base_name)
+        # Text first: the PDF export only trusts a JSONL that is at least as new as the text
+        output_path.write_text(result["actions"], encoding="utf-8")
+        if result["action_items"] is not None:
+            structured_actions.write_jsonl(result["action_items"], output_path.with_suffix(".jsonl"))
+        index_outputs([output_path, output_path.with_suffix(".jsonl")])
+        logging.info(f"✅ Done! Action items saved to: {output_path}")
+        return
+
+    if not MODEL_PATH.exists():
+        logging.error(f"❌ Model not found: {MODEL_PATH}")
+        sys.exit(1)
+
+    llm = load_llm()
+
+    transcript = read_window(input_path, start, end, speaker)
+    logging.info(f"📄 Loaded transcript: {len(transcript)} characters")
+
+    if as_json:
+        items = extract_action_items_json(transcript, llm)
+        output_path.write_text(structured_actions.format_action_items(items), encoding="utf-8")
+        structured_actions.write_jsonl(items, output_path.with_suffix(".jsonl"))
+    else:
+        output_path.write_text(extract_actions_diarized(transcript, llm, n_parallel=n_parallel), encoding="utf-8")
+    log_cache_stats(llm)
+    index_outputs([output_path, output_path.with_suffix(".jsonl")])
+    logging.info(f"✅ Done! Action items saved to: {output_path}")
+    METRICS.export(run_id(output_path.stem))
+
+# ------------------ ENTRY ------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract action items from a diarized transcript.")
+    parser.add_argument("filename", help="Diarized transcript filename (e.g., sample_diarized.txt)")
+    parser.add_argument("--parallel", type=int, metavar="N",
+                        help="Decode up to N chunk prompts together as parallel sequences of one llama.cpp context")
+    parser.add_argument("--json", action="store_true",
+                        help="Grammar-constrained JSON items {task, owner, deadline, source_time}, also saved as JSONL")
+    parser.add_argument("--server", help=f"Run on a warm inference service (default: ${service_client.SERVER_ENV})")
+    parser.add_argument("--start", type=float, help="Only the part of the meeting from this many seconds in")
+    parser.add_argument("--end", type=float, help="Only the part of the meeting before this many seconds in")
+    parser.add_argument("--speaker", help="Only this speaker's turns (e.g., SPEAKER_01)")
+    parser.add_argument("--output", type=Path,
+                        help="Write the action items here (default: <name>_action_items.txt, or "
+                             "<name>_action_items.<window>.txt with --start / --end / --speaker)")
+    args = parser.parse_args()
+
+    if args.json and args.parallel:
+        parser.error("--json extracts chunk by chunk with a grammar; it can't be combined with --parallel")
+
+    main(args.filename, n_parallel=args.parallel, as_json=args.json, server=args.server,
+         start=args.start, end=args.end, speaker=args.speaker, output=args.output)
@@ -0,0 +1,121 @@
+# src/action_extraction/structured_actions.py
+
+import re
+import sys
+import json
+import logging
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.completion_cache import CachedLlama
+from common.llm import transcript_block
+from common.metrics import timed_completion
+
+# ------------------ SCHEMA ------------------
+
+ACTION_ITEM_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "task": {"type": "string"},
+            "owner": {"type": "string"},
+            "deadline": {"type": "string"},
+            "source_time": {"type": "number"},
+        },
+        "required": ["task", "owner", "deadline", "source_time"],
+    },
+}
+
+STRUCTURED_ACTIONS_INSTRUCTION = """### Instruction:
+From the above transcript, extract all actionable items discussed by the speakers as a JSON array.
+Each item has:
+- "task": what needs to be done, in a few words
+- "owner": the speaker who will do it (e.g., SPEAKER_01), or "" if nobody was assigned
+- "deadline": the deadline or time if mentioned, else ""
+- "source_time": start time in seconds of the transcript line where the task is discussed
+Return [] if there are no action items.
+
+### Action Items (JSON):
+"""
+
+def format_prompt(text):
+    return transcript_block(text) + STRUCTURED_ACTIONS_INSTRUCTION
+
+# ------------------ GENERATION ------------------
+
+_grammar = None
+
+def action_items_grammar():
+    # GBNF built from the schema: the model can only emit a JSON array of items, and
+    # generation ends as soon as the array closes
+    global _grammar
+    if _grammar is None:
+        from llama_cpp import LlamaGrammar
+        _grammar = LlamaGrammar.from_json_schema(json.dumps(ACTION_ITEM_SCHEMA), verbose=False)
+    return _grammar
+
+def complete_json(llm, prompt, max_tokens=1024):
+    # The grammar object can't be part of a cache key, so the schema stands in for it
+    schema = json.dumps(ACTION_ITEM_SCHEMA, sort_keys=True)
+    if isinstance(llm, CachedLlama):
+        response = llm.lookup(prompt, max_tokens=max_tokens, json_schema=schema)
+        if response is not None:
+            return response
+        response = timed_completion(llm.llm, prompt, max_tokens=max_tokens, grammar=action_items_grammar())
+        llm.store(prompt, response, max_tokens=max_tokens, json_schema=schema)
+        return response
+    return timed_completion(llm, prompt, max_tokens=max_tokens, grammar=action_items_grammar())
+
+def parse_action_items(response):
+    # A response cut off by max_tokens isn't valid JSON; its complete items are lost
+    try:
+        items = json.loads(response["choices"][0]["text"])
+    except (KeyError, IndexError, TypeError, json.JSONDecodeError):
+        logging.warning("⚠️ Could not parse action items JSON; skipping chunk")
+        return []
+    return [
+        {
+            "task": str(item.get("task", "")).strip(),
+            "owner": str(item.get("owner", "")).strip(),
+            "deadline": str(item.get("deadline", "")).strip(),
+            "source_time": float(item.get("source_time") or 0.0),
+        }
+        for item in items
+        if isinstance(item, dict) and str(item.get("task", "")).strip()
+    ]
+
+# ------------------ POST-PROCESSING ------------------
+
+def _normalize(text):
+    return re.sub(r"[^a-z0-9 ]", "", re.sub(r"\s+", " ", text.lower())).strip()
+
+def deduplicate(items):
+    # Chunks overlap in topic, so the same task is often extracted twice; keep its earliest mention
+    seen = {}
+    for item in sorted(items, key=lambda item: item["source_time"]):
+        key = (_normalize(item["task"]), item["owner"].lower())
+        seen.setdefault(key, item)
+    return sorted(seen.values(), key=lambda item: item["source_time"])
+
+def format_time(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes:02d}:{seconds:02d}"
+
+def format_action_items(items):
+    lines = []
+    for item in items:
+        line = f"- {item['owner'] or 'Unassigned'}: {item['task']}"
+        if item["deadline"]:
+            line += f" [by {item['deadline']}]"
+        lines.append(line + f" ({format_time(item['source_time'])})")
+    return "\n".join(lines)
+
+def write_jsonl(items, path: Path):
+    with open(path, "w", encoding="utf-8") as f:
+        for item in items:
+            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+
+def read_jsonl(path: Path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
@@ -0,0 +1,85 @@
+# src/common/asr_backends.py
+
+from common.models import MODELS
+
+# Every backend's model has whisper's .transcribe(audio, **options) and returns the same
+# {"text", "segments"} dict, with "words" on each segment when word_timestamps=True.
+# whisper:        openai-whisper, fp32 PyTorch (the reference)
+# whisper-int8:   the same model with its Linear layers dynamically quantized to int8
+# faster-whisper: CTranslate2 int8 engine (optional: pip install faster-whisper)
+ASR_BACKENDS = ("whisper", "whisper-int8", "faster-whisper")
+DEFAULT_ASR_BACKEND = "whisper"
+
+# ------------------ LOADERS ------------------
+
+@MODELS.register("whisper")
+def load_whisper(model_name="base"):
+    import whisper
+    return whisper.load_model(model_name)
+
+@MODELS.register("whisper-int8")
+def load_whisper_int8(model_name="base"):
+    import torch
+    import whisper
+    model = whisper.load_model(model_name, device="cpu")
+    # whisper's Linear subclass only adds a cast for fp16; on CPU it is a plain nn.Linear,
+    # which is what quantize_dynamic looks for
+    for module in model.modules():
+        if isinstance(module, torch.nn.Linear):
+            module.__class__ = torch.nn.Linear
+    # Weights go to int8, activations are quantized on the fly; convs and embeddings stay fp32
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+@MODELS.register("faster-whisper")
+def load_faster_whisper(model_name="base", threads=0):
+    from faster_whisper import WhisperModel
+    return FasterWhisperModel(WhisperModel(model_name, device="cpu", compute_type="int8", cpu_threads=threads))
+
+def load_asr(backend=DEFAULT_ASR_BACKEND, model_name="base", threads=0):
+    # The torch backends follow torch's process-wide thread count; CTranslate2 takes its own
+    if backend == "faster-whisper":
+        return load_faster_whisper(model_name, threads)
+    if backend == "whisper-int8":
+        return load_whisper_int8(model_name)
+    if backend == "whisper":
+        return load_whisper(model_name)
+    raise ValueError(f"Unknown ASR backend '{backend}' (choose from {', '.join(ASR_BACKENDS)})")
+
+def asr_cache_params(backend, model_name):
+    # Chunk-cache key parameters; plain whisper keeps its old key so existing caches stay valid
+    if backend == DEFAULT_ASR_BACKEND:
+        return {"model": model_name}
+    return {"model": model_name, "backend": backend}
+
+# ------------------ FASTER-WHISPER ADAPTER ------------------
+
+def segment_dict(segment):
+    result = {
+        "id": segment.id, "seek": segment.seek, "start": float(segment.start), "end": float(segment.end),
+        "text": segment.text, "tokens": list(segment.tokens), "temperature": segment.temperature,
+        "avg_logprob": segment.avg_logprob, "compression_ratio": segment.compression_ratio,
+        "no_speech_prob": segment.no_speech_prob,
+    }
+    if segment.words is not None:
+        result["words"] = [
+            {"word": w.word, "start": float(w.start), "end": float(w.end), "probability": float(w.probability)}
+            for w in segment.words
+        ]
+    return result
+
+class FasterWhisperModel:
+    # faster-whisper behind whisper's model.transcribe(): same options, same result shape
+
+    IGNORED_OPTIONS = ("fp16", "verbose")
+
+    def __init__(self, model):
+        self.model = model
+
+    def transcribe(self, audio, **options):
+        for name in self.IGNORED_OPTIONS:
+            options.pop(name, None)
+        # whisper's transcribe() decodes greedily unless asked otherwise; faster-whisper defaults to beam 5
+        options.setdefault("beam_size", 1)
+        segments, _ = self.model.transcribe(audio, **options)
+        segments = [segment_dict(segment) for segment in segments]
+        return {"text": "".join(s["text"] for s in segments), "segments": segments}
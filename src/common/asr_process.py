@@ -0,0 +1,46 @@
+# src/common/asr_process.py
+
+from concurrent.futures import ProcessPoolExecutor
+
+from common.asr_backends import DEFAULT_ASR_BACKEND, load_asr
+
+# ------------------ WORKER SIDE ------------------
+
+_worker_model = None
+
+def init_whisper_worker(model_name, threads, backend=DEFAULT_ASR_BACKEND):
+    global _worker_model
+    import torch
+    # Whisper on CPU stops scaling after a few threads, so each process gets its own budget
+    torch.set_num_threads(threads)
+    _worker_model = load_asr(backend, model_name, threads)
+
+def transcribe_in_worker(audio, options=None):
+    return _worker_model.transcribe(audio, **(options or {}))
+
+# ------------------ CALLER SIDE ------------------
+
+class WhisperProcess:
+    # An ASR backend loaded once in a dedicated process with its own thread budget.
+    # .transcribe() has the same signature and result as whisper's model.transcribe.
+
+    def __init__(self, model_name, threads, backend=DEFAULT_ASR_BACKEND):
+        self.pool = ProcessPoolExecutor(max_workers=1, initializer=init_whisper_worker,
+                                        initargs=(model_name, threads, backend))
+
+    def transcribe(self, audio, **options):
+        return self.pool.submit(transcribe_in_worker, audio, options).result()
+
+    def close(self):
+        self.pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def close_asr(model):
+    # Stops the worker process behind a WhisperProcess; an in-process model has nothing to release
+    if isinstance(model, WhisperProcess):
+        model.close()
@@ -0,0 +1,133 @@
+# src/common/audio.py
+
+import struct
+import subprocess
+from pathlib import Path
+import numpy as np
+
+# ------------------ CONFIG ------------------
+
+# Whisper and pyannote both work on 16 kHz mono
+SAMPLE_RATE = 16000
+
+# ------------------ DECODE ------------------
+
+def ffmpeg_command(path, sr: int = SAMPLE_RATE):
+    return [
+        "ffmpeg", "-nostdin", "-loglevel", "error", "-threads", "0", "-i", str(path),
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sr), "-"
+    ]
+
+def load_audio(path, sr: int = SAMPLE_RATE) -> np.ndarray:
+    # Decode the whole file into memory as mono float32 in [-1, 1] (short clips only;
+    # long recordings should go through iter_audio_windows)
+    try:
+        out = subprocess.run(ffmpeg_command(path, sr), capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to load audio: {e.stderr.decode(errors='ignore')}") from e
+
+    return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+
+def probe_duration(path):
+    # Duration in seconds, or None when it can't be determined up front
+    layout = wav_data_layout(path)
+    if layout is not None:
+        return layout[1] / SAMPLE_RATE
+    try:
+        out = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", str(path)],
+            capture_output=True, check=True, text=True
+        ).stdout
+        return float(out.strip())
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+
+# ------------------ STREAMING ------------------
+
+def wav_data_layout(path, sr: int = SAMPLE_RATE):
+    # (data offset, sample count) if `path` is already 16-bit PCM mono WAV at `sr`, else None
+    path = Path(path)
+    if path.suffix.lower() != ".wav":
+        return None
+    with open(path, "rb") as f:
+        header = f.read(12)
+        if len(header) < 12:
+            return None
+        riff, _, wave_id = struct.unpack("<4sI4s", header)
+        if riff != b"RIFF" or wave_id != b"WAVE":
+            return None
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                return None
+            chunk_id, size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                fmt = struct.unpack("<HHIIHH", f.read(16))
+                f.seek(size - 16 + (size & 1), 1)
+            elif chunk_id == b"data":
+                if fmt is None:
+                    return None
+                audio_format, channels, rate, _, _, bits = fmt
+                if (audio_format, channels, rate, bits) != (1, 1, sr, 16):
+                    return None
+                # Streamed WAVs may carry a bogus size; trust the file length instead
+                available = (path.stat().st_size - f.tell()) // 2
+                return f.tell(), min(size // 2, available)
+            else:
+                f.seek(size + (size & 1), 1)
+
+def _to_float(pcm):
+    window = pcm.astype(np.float32)
+    window /= 32768.0
+    return window
+
+def _iter_wav_windows(path, offset, n_samples, window_samples):
+    # Map one window at a time so resident pages never exceed a single window
+    for start in range(0, n_samples, window_samples):
+        length = min(window_samples, n_samples - start)
+        pcm = np.memmap(path, dtype="<i2", mode="r", offset=offset + 2 * start, shape=(length,))
+        window = _to_float(pcm)
+        del pcm
+        yield window
+
+def _iter_ffmpeg_windows(path, window_samples, sr):
+    proc = subprocess.Popen(ffmpeg_command(path, sr), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    # One PCM buffer is reused for every window
+    buffer = bytearray(window_samples * 2)
+    view = memoryview(buffer)
+    try:
+        while True:
+            filled = 0
+            while filled < len(buffer):
+                n = proc.stdout.readinto(view[filled:])
+                if not n:
+                    break
+                filled += n
+            if filled == 0:
+                break
+            yield _to_float(np.frombuffer(buffer, np.int16, count=filled // 2))
+            if filled < len(buffer):
+                break
+        if proc.wait() != 0:
+            raise RuntimeError(f"Failed to load audio: {proc.stderr.read().decode(errors='ignore')}")
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+
+def iter_audio_windows(path, window_ms: int, sr: int = SAMPLE_RATE):
+    # Yield consecutive mono float32 windows of `window_ms` (the last may be shorter).
+    # Only one window is decoded in memory at a time, so peak memory does not grow
+    # with the length of the recording.
+    window_samples = window_ms * sr // 1000
+    layout = wav_data_layout(path, sr)
+    if layout is not None:
+        yield from _iter_wav_windows(path, layout[0], layout[1], window_samples)
+    else:
+        yield from _iter_ffmpeg_windows(path, window_samples, sr)
+
+def waveform_dict(chunk: np.ndarray, sr: int = SAMPLE_RATE):
+    # pyannote accepts in-memory audio as {"waveform": (channel, time) tensor, "sample_rate": int}
+    import torch
+    return {"waveform": torch.from_numpy(chunk).unsqueeze(0), "sample_rate": sr}
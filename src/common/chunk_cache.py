@@ -0,0 +1,125 @@
+# src/common/chunk_cache.py
+
+import os
+import json
+import pickle
+import hashlib
+import tempfile
+import threading
+import numpy as np
+from pathlib import Path
+
+# ------------------ CONFIG ------------------
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+CHUNK_CACHE_DIR = BASE_DIR / "output" / "cache" / "chunks"
+CHUNK_CACHE_MAX_BYTES = 2 * 1024 ** 3
+# Puts between full rescans of the directory, which pick up files other processes wrote
+CHUNK_CACHE_RESCAN_EVERY = 256
+# Eviction trims to this fraction of max_bytes, so a full cache isn't rescanned on every write
+CHUNK_CACHE_LOW_WATER = 0.9
+
+# ------------------ CACHE ------------------
+
+class ChunkCache:
+    # ASR / diarization results per audio chunk, stored on disk under
+    # sha256(kind, parameters, chunk PCM). Identical chunks (a re-run, or every chunk but
+    # the last when audio is appended to a recording) come back without touching a model.
+    # Reads refresh a file's mtime, and the least recently used files are deleted once the
+    # directory grows past `max_bytes`. The directory size is tracked as a running total
+    # (one scan on the first write), so a write only rescans it when the total crosses
+    # `max_bytes` or every CHUNK_CACHE_RESCAN_EVERY writes.
+
+    def __init__(self, directory=CHUNK_CACHE_DIR, max_bytes=CHUNK_CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.size = None     # bytes on disk as of the last scan, plus our writes since
+        self.puts = 0
+
+    def key(self, kind, chunk, params):
+        digest = hashlib.sha256(json.dumps([kind, params], sort_keys=True).encode("utf-8"))
+        digest.update(np.ascontiguousarray(chunk, dtype=np.float32).tobytes())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return self.directory / key[:2] / f"{key}.pkl"
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            os.utime(path)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            with self.lock:
+                self.misses += 1
+            return None
+        with self.lock:
+            self.hits += 1
+        return value
+
+    def put(self, key, value):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Written under a temporary name and renamed, so readers never see half a file
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                written = f.tell()
+            try:
+                replaced = path.stat().st_size
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        with self.lock:
+            self.puts += 1
+            if self.size is not None:
+                self.size += written - replaced
+            rescan = (self.size is None or self.size > self.max_bytes
+                      or self.puts % CHUNK_CACHE_RESCAN_EVERY == 0)
+        if rescan:
+            self.evict()
+
+    def evict(self):
+        # Full scan: resets the running total and, past max_bytes, deletes the least recently
+        # used files down to the low-water mark
+        entries = []
+        for path in self.directory.glob("*/*.pkl"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * CHUNK_CACHE_LOW_WATER if total > self.max_bytes else total
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            if total <= target:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        with self.lock:
+            self.size = total
+
+    def fetch(self, kind, chunk, params, compute):
+        key = self.key(kind, chunk, params)
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def summary(self):
+        return f"💾 Chunk cache: {self.hits} hit(s), {self.misses} miss(es)"
+
+def cached(cache, kind, chunk, params, compute):
+    # compute() through `cache`, or directly when caching is off (cache=None)
+    if cache is None:
+        return compute()
+    return cache.fetch(kind, chunk, params, compute)
@@ -0,0 +1,60 @@
+# src/common/chunking.py
+
+import re
+from collections import deque
+
+# ------------------ UNITS ------------------
+
+SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\n+")
+
+def speaker_lines(transcript):
+    # Diarized transcripts: one "SPEAKER_XX [start - end]: text" turn per line
+    return [line for line in transcript.splitlines() if line.strip()]
+
+def sentences(text):
+    return [s for s in SENTENCE_BREAK.split(text) if s.strip()]
+
+# ------------------ PACKING ------------------
+
+def _split_long(unit, count_tokens, budget):
+    words = unit.split(" ")
+    if len(words) > 1:
+        return pack_by_tokens(words, count_tokens, budget, sep=" ")
+    half = len(unit) // 2
+    return [unit[:half], unit[half:]]
+
+def pack_by_tokens(units, count_tokens, budget, sep="\n"):
+    # Greedily packs whole units (speaker lines, sentences) into chunks of at most `budget`
+    # tokens as counted by `count_tokens`. Only a unit that is over budget on its own is
+    # broken up, at word boundaries.
+    sep_tokens = count_tokens(sep) if sep.strip() else 1
+    pending = deque(units)
+    chunks, current, used = [], [], 0
+
+    def close():
+        # Per-unit counts only estimate the joined text; hand units back until it fits exactly
+        while len(current) > 1 and count_tokens(sep.join(current)) > budget:
+            pending.appendleft(current.pop())
+        chunks.append(sep.join(current))
+        current.clear()
+
+    while pending:
+        unit = pending.popleft()
+        n = count_tokens(unit)
+        if n > budget:
+            pending.extendleft(reversed(_split_long(unit, count_tokens, budget)))
+            continue
+        if current and used + sep_tokens + n > budget:
+            close()
+            used = 0
+        used += (sep_tokens if current else 0) + n
+        current.append(unit)
+    if current:
+        close()
+    return chunks
+
+def fill_ratio(chunks, count_tokens, budget):
+    # Share of the token budget the chunks actually use, on average
+    if not chunks:
+        return 0.0
+    return sum(count_tokens(chunk) for chunk in chunks) / (len(chunks) * budget)
@@ -0,0 +1,218 @@
+# src/common/columnar_transcript.py
+
+import os
+import mmap
+import struct
+import tempfile
+import numpy as np
+from pathlib import Path
+
+from common.transcript_lines import format_line, parse_transcript
+
+# ------------------ FORMAT ------------------
+#
+# A diarized transcript as columns in one file, next to `<name>_diarized.txt`:
+#
+#   header       magic, version, segments n, speakers s, bytes of speaker names, bytes of text
+#   start        float32[n]   segment start (s), sorted; float32 holds 0.01 s exactly up to ~18 h
+#   end          float32[n]   segment end (s)
+#   end_max      float32[n]   running max of end, so the first segment still open at t is a bisection
+#   speaker      uint32[n]    index into the speaker names
+#   text_offsets uint64[n+1]  segment i's text is text[text_offsets[i]:text_offsets[i+1]]
+#   by_speaker   uint32[n]    row numbers grouped by speaker, in time order within a speaker
+#   speaker_rows uint64[s+1]  speaker k's rows are by_speaker[speaker_rows[k]:speaker_rows[k+1]]
+#   names        utf-8        speaker names, newline separated
+#   text         utf-8        all segment texts back to back
+#
+# Every section starts on an 8-byte boundary, so the file is mmap'd and each column read
+# in place: opening it costs nothing, and a time-range or per-speaker lookup touches only
+# the pages it bisects and the rows it returns.
+
+MAGIC = b"MMDT"
+VERSION = 1
+HEADER = struct.Struct("<4sIQQQQ")
+SUFFIX = ".cols"
+
+def _layout(n, n_speakers, names_bytes, text_bytes):
+    # [(section, dtype, count, byte offset)]
+    sections = [
+        ("start", np.float32, n), ("end", np.float32, n), ("end_max", np.float32, n),
+        ("speaker", np.uint32, n), ("text_offsets", np.uint64, n + 1), ("by_speaker", np.uint32, n),
+        ("speaker_rows", np.uint64, n_speakers + 1), ("names", np.uint8, names_bytes), ("text", np.uint8, text_bytes),
+    ]
+    layout, offset = [], HEADER.size
+    for name, dtype, count in sections:
+        offset = (offset + 7) // 8 * 8
+        layout.append((name, dtype, count, offset))
+        offset += count * np.dtype(dtype).itemsize
+    return layout
+
+def columnar_path(transcript_path: Path):
+    return Path(transcript_path).with_suffix(SUFFIX)
+
+def up_to_date(transcript_path: Path):
+    # The .cols file exists and is at least as new as the text (a hand-edited transcript wins)
+    cols = columnar_path(transcript_path)
+    return cols.exists() and cols.stat().st_mtime_ns >= Path(transcript_path).stat().st_mtime_ns
+
+# ------------------ WRITER ------------------
+
+def write_columnar(segments, path: Path):
+    segments = sorted(segments, key=lambda s: s[0])
+    speakers = sorted({speaker for _, _, speaker, _ in segments})
+    ids = {name: i for i, name in enumerate(speakers)}
+    texts = [text.encode("utf-8") for _, _, _, text in segments]
+    names = "\n".join(speakers).encode("utf-8")
+
+    columns = {
+        "start": np.array([s[0] for s in segments], dtype=np.float32),
+        "end": np.array([s[1] for s in segments], dtype=np.float32),
+        "speaker": np.array([ids[s[2]] for s in segments], dtype=np.uint32),
+        "text_offsets": np.zeros(len(segments) + 1, dtype=np.uint64),
+        "speaker_rows": np.zeros(len(speakers) + 1, dtype=np.uint64),
+        "names": np.frombuffer(names, dtype=np.uint8),
+        "text": np.frombuffer(b"".join(texts), dtype=np.uint8),
+    }
+    columns["end_max"] = np.maximum.accumulate(columns["end"]) if segments else columns["end"]
+    np.cumsum([len(t) for t in texts], out=columns["text_offsets"][1:])
+    columns["by_speaker"] = np.argsort(columns["speaker"], kind="stable").astype(np.uint32)
+    np.cumsum(np.bincount(columns["speaker"], minlength=len(speakers)), out=columns["speaker_rows"][1:])
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Written under a temporary name and renamed, so readers never see half a file
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(segments), len(speakers), len(names), columns["text"].size))
+            for name, dtype, count, offset in _layout(len(segments), len(speakers), len(names), columns["text"].size):
+                f.write(b"\0" * (offset - f.tell()))
+                f.write(columns[name].tobytes())
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+    return path
+
+def convert(transcript_path: Path):
+    # `<name>_diarized.txt` → `<name>_diarized.cols`
+    transcript = Path(transcript_path).read_text(encoding="utf-8")
+    return write_columnar(parse_transcript(transcript), columnar_path(transcript_path))
+
+# ------------------ READER ------------------
+
+class ColumnarTranscript:
+    # Read-only, memory-mapped view of a .cols file. Row numbers are positions in time order.
+
+    def __init__(self, path: Path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n, n_speakers, names_bytes, text_bytes = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a version {VERSION} columnar transcript: {path}")
+        for name, dtype, count, offset in _layout(n, n_speakers, names_bytes, text_bytes):
+            column = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=offset) if count else np.empty(0, dtype)
+            setattr(self, name, column)
+        self.speakers = bytes(self.names).decode("utf-8").split("\n") if n_speakers else []
+        self.speaker_ids = {name: i for i, name in enumerate(self.speakers)}
+
+    def __len__(self):
+        return len(self.start)
+
+    @property
+    def duration(self):
+        return float(self.end_max[-1]) if len(self) else 0.0
+
+    def text_of(self, row):
+        return bytes(self.text[self.text_offsets[row]:self.text_offsets[row + 1]]).decode("utf-8")
+
+    def segment(self, row):
+        row = int(row)
+        return float(self.start[row]), float(self.end[row]), self.speakers[self.speaker[row]], self.text_of(row)
+
+    def segments(self, rows=None):
+        return [self.segment(row) for row in (range(len(self)) if rows is None else rows)]
+
+    def transcript(self, rows=None):
+        # The rows as diarized transcript lines, ready for the chunkers / prompts
+        return "\n".join(format_line(*segment) for segment in self.segments(rows))
+
+    # Lookups: O(log n) bisection plus the rows returned
+
+    def time_range(self, start=None, end=None):
+        # Rows overlapping [start, end)
+        lo = 0 if start is None else int(np.searchsorted(self.end_max, start, side="right"))
+        hi = len(self) if end is None else int(np.searchsorted(self.start, end, side="left"))
+        rows = np.arange(lo, max(lo, hi))
+        return rows if start is None else rows[self.end[rows] > start]
+
+    def speaker_rows_of(self, speaker, start=None, end=None):
+        # One speaker's rows overlapping [start, end)
+        if speaker not in self.speaker_ids:
+            return np.empty(0, dtype=np.uint32)
+        k = self.speaker_ids[speaker]
+        rows = self.by_speaker[self.speaker_rows[k]:self.speaker_rows[k + 1]]
+        lo, hi = 0, len(rows)
+        if end is not None:
+            hi = _bisect(rows, self.start, end)
+        if start is not None:
+            lo = _bisect(rows, self.start, start, hi=hi)
+            # A speaker's turns rarely overlap each other, so this backs up by one row at most
+            while lo > 0 and self.end[rows[lo - 1]] > start:
+                lo -= 1
+        return rows[lo:hi]
+
+    def window(self, start=None, end=None, speaker=None):
+        rows = self.time_range(start, end) if speaker is None else self.speaker_rows_of(speaker, start, end)
+        return self.transcript(rows)
+
+    def close(self):
+        for name, *_ in _layout(0, 0, 0, 0):
+            setattr(self, name, None)
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _bisect(rows, values, x, hi=None):
+    # First position in `rows` whose value is >= x; values[rows] is sorted
+    lo, hi = 0, len(rows) if hi is None else hi
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if values[rows[mid]] < x:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+# ------------------ CONSUMERS ------------------
+
+def window_tag(start=None, end=None, speaker=None):
+    # "" for the whole meeting, else e.g. "120s-300s.SPEAKER_01". Windowed outputs carry it
+    # before the extension, so they never replace (or get read as) the whole-meeting files.
+    parts = []
+    if start is not None or end is not None:
+        parts.append(f"{'' if start is None else f'{start:g}s'}-{'' if end is None else f'{end:g}s'}")
+    if speaker is not None:
+        parts.append(speaker)
+    return ".".join(parts)
+
+def read_window(transcript_path: Path, start=None, end=None, speaker=None):
+    # Transcript text for [start, end) and / or one speaker, from the .cols file when it is
+    # up to date, otherwise by parsing the text
+    transcript_path = Path(transcript_path)
+    if start is None and end is None and speaker is None:
+        return transcript_path.read_text(encoding="utf-8")
+
+    if up_to_date(transcript_path):
+        with ColumnarTranscript(columnar_path(transcript_path)) as transcript:
+            return transcript.window(start, end, speaker)
+
+    segments = [
+        s for s in parse_transcript(transcript_path.read_text(encoding="utf-8"))
+        if (start is None or s[1] > start) and (end is None or s[0] < end) and (speaker is None or s[2] == speaker)
+    ]
+    return "\n".join(format_line(*s) for s in segments)
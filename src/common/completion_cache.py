@@ -0,0 +1,189 @@
+# src/common/completion_cache.py
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from functools import lru_cache
+from importlib import metadata
+from pathlib import Path
+
+from common.metrics import timed_completion
+
+# ------------------ CONFIG ------------------
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+COMPLETION_CACHE_PATH = BASE_DIR / "output" / "cache" / "completions.sqlite3"
+COMPLETION_CACHE_MAX_BYTES = 256 * 1024 ** 2
+FINGERPRINT_BYTES = 1024 ** 2
+# llama-cpp-python's create_completion defaults. Keys always carry a value for each, so a
+# call that leaves one unset and a call that spells out the default share an entry
+SAMPLING_DEFAULTS = {
+    "max_tokens": 16, "temperature": 0.8, "top_p": 0.95, "top_k": 40, "min_p": 0.05,
+    "repeat_penalty": 1.0, "stop": [], "json_schema": None,
+}
+
+log = logging.getLogger(__name__)
+
+# ------------------ KEYS ------------------
+
+@lru_cache(maxsize=None)
+def model_fingerprint(model_path):
+    # Size plus the first and last MiB: tells GGUF files (and quantizations) apart without
+    # reading gigabytes on every run
+    path = Path(model_path)
+    size = path.stat().st_size
+    digest = hashlib.sha256(str(size).encode("utf-8"))
+    with open(path, "rb") as f:
+        digest.update(f.read(FINGERPRINT_BYTES))
+        f.seek(max(0, size - FINGERPRINT_BYTES))
+        digest.update(f.read(FINGERPRINT_BYTES))
+    return digest.hexdigest()
+
+@lru_cache(maxsize=None)
+def llama_cpp_version():
+    # Read from the package metadata, so building a key never imports llama.cpp. A new
+    # version can change the defaults above or the sampling itself.
+    try:
+        return metadata.version("llama_cpp_python")
+    except metadata.PackageNotFoundError:
+        return None
+
+def completion_key(model_path, prompt, params, n_ctx=None):
+    # Sampling parameters with every default filled in, plus the llama-cpp version and the
+    # context size. Grammar objects can't be hashed; callers key them by their JSON schema.
+    sampling = {**SAMPLING_DEFAULTS, **params}
+    if isinstance(sampling["stop"], str):
+        sampling["stop"] = [sampling["stop"]]
+    payload = json.dumps(
+        [model_fingerprint(str(model_path)), llama_cpp_version(), n_ctx, prompt, sampling], sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+# ------------------ STORE ------------------
+
+class CompletionCache:
+    # llama-cpp completion responses in one SQLite file. WAL mode and a busy timeout let
+    # several worker processes read and write it at once; the least recently used rows are
+    # deleted once the stored responses pass `max_bytes`.
+
+    def __init__(self, path=COMPLETION_CACHE_PATH, max_bytes=COMPLETION_CACHE_MAX_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _connection(self):
+        # A connection must not cross fork(), so each process opens its own
+        if self._conn is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS completions ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS completions_last_used ON completions (last_used)")
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def get(self, key):
+        with self.lock:
+            conn = self._connection()
+            row = conn.execute("SELECT response FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE completions SET last_used = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key, response):
+        data = json.dumps(response)
+        with self.lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO completions (key, response, size, last_used) VALUES (?, ?, ?, ?)",
+                    (key, data, len(data), time.time()),
+                )
+                self._evict(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self, conn):
+        excess = conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0] - self.max_bytes
+        if excess <= 0:
+            return
+        doomed = []
+        for key, size in conn.execute("SELECT key, size FROM completions ORDER BY last_used"):
+            if excess <= 0:
+                break
+            doomed.append((key,))
+            excess -= size
+        conn.executemany("DELETE FROM completions WHERE key = ?", doomed)
+        log.info(f"🧹 Evicted {len(doomed)} cached completion(s)")
+
+    def close(self):
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+
+# ------------------ MODEL WRAPPER ------------------
+
+class CachedLlama:
+    # Stands in for a llama_cpp.Llama: llm(prompt, **params) answers from the cache when
+    # the same model saw the same prompt and parameters before. The model itself is only
+    # loaded (by `load`) on the first miss or the first other attribute access.
+
+    def __init__(self, model_path, load, cache=None, n_ctx=None):
+        self.model_path = str(model_path)
+        self.n_ctx = n_ctx
+        self._load = load
+        self._llm = None
+        self.cache = cache or CompletionCache()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            self._llm = self._load()
+        return self._llm
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+    def lookup(self, prompt, **params):
+        response = self.cache.get(completion_key(self.model_path, prompt, params, self.n_ctx))
+        if response is not None:
+            self.hits += 1
+            log.debug(f"💾 Completion cache hit ({self.hits})")
+        return response
+
+    def store(self, prompt, response, **params):
+        self.misses += 1
+        self.cache.put(completion_key(self.model_path, prompt, params, self.n_ctx), response)
+
+    def __call__(self, prompt, **params):
+        if "grammar" in params:
+            # No key for a grammar object (see completion_key): run it uncached
+            return timed_completion(self.llm, prompt, **params)
+        response = self.lookup(prompt, **params)
+        if response is None:
+            response = timed_completion(self.llm, prompt, **params)
+            self.store(prompt, response, **params)
+        return response
+
+    def log_stats(self):
+        log.info(f"💾 Completion cache: {self.hits} hit(s), {self.misses} miss(es)")
+
+def log_cache_stats(llm):
+    if isinstance(llm, CachedLlama):
+        llm.log_stats()
@@ -0,0 +1,102 @@
+# src/common/llm.py
+
+import logging
+from pathlib import Path
+
+from common.completion_cache import CachedLlama
+from common.metrics import timed_completion
+from common.models import MODELS
+
+# ------------------ CONFIG ------------------
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+MODEL_PATH = BASE_DIR / "input" / "models" / "mistral-7b-instruct-v0.3-gguf" / "mistral-7b-instruct-v0.3.Q4_K_M.gguf"
+N_CTX = 4096
+CHUNK_MARGIN_TOKENS = 32   # slack for tokens merging where the template and the chunk meet
+
+log = logging.getLogger(__name__)
+
+# ------------------ MODEL ------------------
+
+@MODELS.register("llm")
+def load_model(model_path: Path = MODEL_PATH, n_threads: int = 8):
+    from llama_cpp import Llama
+    log.info("🧠 Loading local Mistral model via llama-cpp...")
+    return Llama(
+        model_path=str(model_path),
+        n_ctx=N_CTX,
+        n_threads=n_threads,
+        n_batch=512,
+        temperature=0.3,
+        stop=["</s>"],
+        verbose=False
+    )
+
+def load_llm(model_path: Path = MODEL_PATH, n_threads: int = 8, use_cache: bool = True):
+    # With the completion cache (default), the model is only loaded on the first cache miss
+    def load():
+        return load_model(model_path, n_threads)
+
+    return CachedLlama(model_path, load, n_ctx=N_CTX) if use_cache else load()
+
+# ------------------ TOKENS ------------------
+
+@MODELS.register("llm_vocab")
+def load_vocab(model_path: Path = MODEL_PATH):
+    # vocab_only reads the vocabulary without the weights, so chunking never has to load the model
+    from llama_cpp import Llama
+    return Llama(model_path=str(model_path), vocab_only=True, verbose=False)
+
+def token_counter(model_path: Path = MODEL_PATH):
+    # Counts tokens with the model's own tokenizer
+    vocab = load_vocab(model_path)
+    return lambda text: len(vocab.tokenize(text.encode("utf-8"), add_bos=False))
+
+def chunk_token_budget(template, max_tokens, count_tokens, n_ctx=N_CTX):
+    # Context left for transcript text after BOS, the prompt template and the answer
+    return n_ctx - 1 - count_tokens(template) - max_tokens - CHUNK_MARGIN_TOKENS
+
+# ------------------ PROMPTS ------------------
+
+def transcript_block(text):
+    # Shared by every per-chunk prompt so llama.cpp can reuse the evaluated transcript tokens
+    return f"""### Meeting Transcript:
+{text}
+
+"""
+
+# ------------------ COMPLETION ------------------
+
+def cached_prefix_length(llm, tokens):
+    # Leading tokens of `tokens` already evaluated in the llama.cpp KV cache
+    cached = llm.input_ids[:llm.n_tokens]
+    length = 0
+    for a, b in zip(cached, tokens):
+        if a != b:
+            break
+        length += 1
+    # llama.cpp always re-evaluates the last prompt token to get fresh logits
+    return min(length, len(tokens) - 1)
+
+def complete(llm, prompt, max_tokens=1024, stats=None):
+    # Cached completions never reach llama.cpp, so they don't count as prompt tokens
+    if isinstance(llm, CachedLlama):
+        response = llm.lookup(prompt, max_tokens=max_tokens)
+        if response is not None:
+            return response
+    if stats is not None:
+        tokens = llm.tokenize(prompt.encode("utf-8"))
+        reused = cached_prefix_length(llm, tokens)
+        stats["prompt_tokens"] = stats.get("prompt_tokens", 0) + len(tokens)
+        stats["evaluated_tokens"] = stats.get("evaluated_tokens", 0) + len(tokens) - reused
+    if isinstance(llm, CachedLlama):
+        # Already looked up above, so go straight to the model and store the answer
+        response = timed_completion(llm.llm, prompt, max_tokens=max_tokens)
+        llm.store(prompt, response, max_tokens=max_tokens)
+        return response
+    return timed_completion(llm, prompt, max_tokens=max_tokens)
+
+def complete_with_shared_prefix(llm, prefix, instructions, max_tokens=1024, stats=None):
+    # Running the prompts back to back lets llama.cpp's prefix match keep the KV cache of
+    # `prefix`, so only the first prompt pays for evaluating it.
+    return [complete(llm, prefix + instruction, max_tokens=max_tokens, stats=stats) for instruction in instructions]
@@ -0,0 +1,219 @@
+# src/common/llm_batch.py
+
+import time
+import numpy as np
+import llama_cpp
+
+from common.completion_cache import CachedLlama
+from common.llm import N_CTX
+from common.metrics import span
+
+# ------------------ LOW-LEVEL COMPAT ------------------
+
+# llama.cpp renamed its KV-cache calls (llama_kv_cache_* -> llama_kv_self_*); use whichever this build has
+_kv_seq_rm = getattr(llama_cpp, "llama_kv_self_seq_rm", None) or llama_cpp.llama_kv_cache_seq_rm
+_new_context = getattr(llama_cpp, "llama_init_from_model", None) or llama_cpp.llama_new_context_with_model
+
+# ------------------ SAMPLING ------------------
+
+def sample_token(logits, rng, temperature=0.8, top_k=40, top_p=0.95):
+    # Plain temperature + top-k + top-p with Llama.__call__'s values for those three; no min_p
+    # or repeat penalty, unlike Llama.__call__. Temperature 0 is greedy
+    if temperature <= 0:
+        return int(np.argmax(logits))
+    top = np.argpartition(logits, -top_k)[-top_k:]
+    top = top[np.argsort(logits[top])[::-1]]
+    probs = np.exp((logits[top] - logits[top[0]]) / temperature)
+    probs /= probs.sum()
+    keep = int(np.searchsorted(np.cumsum(probs), top_p)) + 1
+    probs = probs[:keep] / probs[:keep].sum()
+    return int(top[rng.choice(keep, p=probs)])
+
+# ------------------ ENGINE ------------------
+
+class _Sequence:
+    def __init__(self, index, tokens):
+        self.index = index
+        self.tokens = tokens
+        self.seq_id = None
+        self.n_past = 0
+        self.generated = []
+        self.text = b""
+        self.finish_reason = None
+
+class BatchedGenerator:
+    # Decodes many prompts as parallel sequences of one llama.cpp context, sharing the
+    # loaded model's weights: every llama_decode call advances all active sequences by one
+    # token, so the weights are streamed from memory once per step instead of once per
+    # sequence. Sequences join as soon as a slot and KV space are free (finished ones are
+    # evicted from the KV cache), and each stops on EOS, a stop string or max_tokens.
+
+    def __init__(self, llm, n_parallel=4, n_ctx=None, n_batch=512, n_threads=None):
+        self.llm = llm.llm if isinstance(llm, CachedLlama) else llm
+        self.n_parallel = n_parallel
+        self.n_ctx = n_ctx or N_CTX * n_parallel
+        self.n_batch = max(n_batch, n_parallel)
+
+        params = llama_cpp.llama_context_default_params()
+        params.n_ctx = self.n_ctx
+        params.n_batch = self.n_batch
+        params.n_ubatch = self.n_batch
+        params.n_seq_max = n_parallel
+        params.n_threads = params.n_threads_batch = n_threads or self.llm.n_threads
+        self.ctx = _new_context(self.llm.model, params)
+        if not self.ctx:
+            raise RuntimeError("Failed to create a llama.cpp context for batched decoding")
+        self.batch = llama_cpp.llama_batch_init(self.n_batch, 0, 1)
+        self.n_vocab = self.llm.n_vocab()
+        if hasattr(llama_cpp, "llama_vocab_is_eog"):
+            vocab = llama_cpp.llama_model_get_vocab(self.llm.model)
+            self.is_eog = lambda token: llama_cpp.llama_vocab_is_eog(vocab, token)
+        else:
+            eos = self.llm.token_eos()
+            self.is_eog = lambda token: token == eos
+
+    def close(self):
+        if self.ctx:
+            llama_cpp.llama_batch_free(self.batch)
+            llama_cpp.llama_free(self.ctx)
+            self.ctx = None
+
+    def _decode(self, entries):
+        # entries: (token, pos, seq_id, wants_logits); logits are read back by row index
+        b = self.batch
+        for k, (token, pos, seq_id, wants_logits) in enumerate(entries):
+            b.token[k] = token
+            b.pos[k] = pos
+            b.n_seq_id[k] = 1
+            b.seq_id[k][0] = seq_id
+            b.logits[k] = wants_logits
+        b.n_tokens = len(entries)
+        if llama_cpp.llama_decode(self.ctx, b) != 0:
+            raise RuntimeError("llama_decode failed (KV cache full?)")
+
+    def _logits(self, row):
+        return np.ctypeslib.as_array(llama_cpp.llama_get_logits_ith(self.ctx, row), shape=(self.n_vocab,))
+
+    def _prefill(self, seq):
+        # Prompt tokens in n_batch slices; only the last one needs logits
+        for start in range(0, len(seq.tokens), self.n_batch):
+            piece = seq.tokens[start:start + self.n_batch]
+            last = start + len(piece) == len(seq.tokens)
+            self._decode([
+                (token, start + j, seq.seq_id, last and j == len(piece) - 1)
+                for j, token in enumerate(piece)
+            ])
+        seq.n_past = len(seq.tokens)
+        return len(piece) - 1
+
+    def _accept(self, seq, token, max_tokens, stop):
+        if self.is_eog(token):
+            seq.finish_reason = "stop"
+            return
+        seq.generated.append(token)
+        seq.text += self.llm.detokenize([token])
+        text = seq.text.decode("utf-8", errors="ignore")
+        if any(s in text for s in stop):
+            seq.finish_reason = "stop"
+        elif len(seq.generated) >= max_tokens:
+            seq.finish_reason = "length"
+
+    def generate(self, prompts, max_tokens=1024, stop=None, temperature=0.8, top_k=40, top_p=0.95, seed=None):
+        # One llama-cpp style completion dict per prompt, in prompt order
+        stop = [s for s in (stop or []) if s]
+        rng = np.random.default_rng(seed)
+        sequences = [_Sequence(i, self.llm.tokenize(p.encode("utf-8"))) for i, p in enumerate(prompts)]
+        for seq in sequences:
+            if len(seq.tokens) + max_tokens > self.n_ctx:
+                raise ValueError(f"Prompt {seq.index} ({len(seq.tokens)} tokens) + max_tokens does not fit n_ctx={self.n_ctx}")
+
+        pending = list(sequences)
+        active = []
+        free_ids = list(range(self.n_parallel))
+        reserved = 0
+
+        def release(seq):
+            nonlocal reserved
+            _kv_seq_rm(self.ctx, seq.seq_id, -1, -1)
+            free_ids.append(seq.seq_id)
+            reserved -= len(seq.tokens) + max_tokens
+
+        self.prefill_elapsed = 0.0
+        start = time.perf_counter()
+        while pending or active:
+            # Admit waiting prompts while a slot and their worst-case KV footprint are free
+            while pending and free_ids and reserved + len(pending[0].tokens) + max_tokens <= self.n_ctx:
+                seq = pending.pop(0)
+                seq.seq_id = free_ids.pop(0)
+                reserved += len(seq.tokens) + max_tokens
+                prefill_start = time.perf_counter()
+                row = self._prefill(seq)
+                self.prefill_elapsed += time.perf_counter() - prefill_start
+                self._accept(seq, sample_token(self._logits(row), rng, temperature, top_k, top_p), max_tokens, stop)
+                if seq.finish_reason:
+                    release(seq)
+                else:
+                    active.append(seq)
+
+            if not active:
+                continue
+
+            # One token for every active sequence in a single decode
+            self._decode([(seq.generated[-1], seq.n_past, seq.seq_id, True) for seq in active])
+            still_active = []
+            for row, seq in enumerate(active):
+                seq.n_past += 1
+                self._accept(seq, sample_token(self._logits(row), rng, temperature, top_k, top_p), max_tokens, stop)
+                if seq.finish_reason:
+                    release(seq)
+                else:
+                    still_active.append(seq)
+            active = still_active
+
+        self.elapsed = time.perf_counter() - start
+        return [self._response(seq, stop) for seq in sequences]
+
+    def _response(self, seq, stop):
+        text = self.llm.detokenize(seq.generated).decode("utf-8", errors="ignore")
+        for s in stop:
+            if s in text:
+                text = text[:text.index(s)]
+        return {
+            "object": "text_completion",
+            "choices": [{"text": text, "index": 0, "logprobs": None, "finish_reason": seq.finish_reason}],
+            "usage": {
+                "prompt_tokens": len(seq.tokens),
+                "completion_tokens": len(seq.generated),
+                "total_tokens": len(seq.tokens) + len(seq.generated),
+            },
+        }
+
+# ------------------ CACHED ENTRY ------------------
+
+def complete_batch(llm, prompts, max_tokens=1024, n_parallel=4):
+    # Like complete() for a list of prompts: cached answers are returned as is, the rest are
+    # decoded together. The batched sampler is plain top-k / top-p (no min_p or repeat
+    # penalty), unlike Llama.__call__'s, so its answers are cached under their own key.
+    responses = [None] * len(prompts)
+    if isinstance(llm, CachedLlama):
+        for i, prompt in enumerate(prompts):
+            responses[i] = llm.lookup(prompt, max_tokens=max_tokens, engine="batched")
+    missing = [i for i, response in enumerate(responses) if response is None]
+    if not missing:
+        return responses
+
+    generator = BatchedGenerator(llm, n_parallel=min(n_parallel, len(missing)))
+    try:
+        with span("llm_batch", prompts=len(missing), n_parallel=generator.n_parallel) as counters:
+            generated = generator.generate([prompts[i] for i in missing], max_tokens=max_tokens)
+            counters["prompt_tokens"] = counters["prompt_eval_tokens"] = sum(r["usage"]["prompt_tokens"] for r in generated)
+            counters["completion_tokens"] = sum(r["usage"]["completion_tokens"] for r in generated)
+            counters["prompt_eval_s"] = generator.prefill_elapsed
+            counters["generation_s"] = generator.elapsed - generator.prefill_elapsed
+    finally:
+        generator.close()
+    for i, response in zip(missing, generated):
+        responses[i] = response
+        if isinstance(llm, CachedLlama):
+            llm.store(prompts[i], response, max_tokens=max_tokens, engine="batched")
+    return responses
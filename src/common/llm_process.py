@@ -0,0 +1,81 @@
+# src/common/llm_process.py
+
+import os
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+
+from common.llm import MODEL_PATH, complete, load_llm
+from common.metrics import METRICS, span
+
+# ------------------ WORKER SIDE ------------------
+
+_worker_llm = None
+
+def init_llm_worker(model_path, n_threads, use_cache):
+    global _worker_llm
+    _worker_llm = load_llm(model_path, n_threads=n_threads, use_cache=use_cache)
+
+# Each call returns (response, spans): the llm_call spans (with llama.cpp's prompt-eval /
+# generation timings) and the model load live in the worker's recorder, which is never
+# exported, so the parent merges them into its own
+
+def complete_in_worker(prompt, max_tokens):
+    return complete(_worker_llm, prompt, max_tokens=max_tokens), METRICS.take()
+
+def complete_json_in_worker(prompt, max_tokens):
+    # Grammars can't be pickled, so the worker builds the action-items grammar itself
+    from action_extraction import structured_actions
+    return structured_actions.complete_json(_worker_llm, prompt, max_tokens), METRICS.take()
+
+def warm_worker():
+    # A cached llm only loads its model on the first miss; touch it now
+    getattr(_worker_llm, "llm", None)
+    return os.getpid()
+
+# ------------------ CALLER SIDE ------------------
+
+class LlamaPool:
+    # K llama.cpp processes with cores // K threads each. llama.cpp mmaps the GGUF, so the
+    # workers share one copy of the weights through the page cache instead of K.
+
+    def __init__(self, workers, model_path=MODEL_PATH, use_cache=True):
+        self.workers = workers
+        self.threads = max(1, (os.cpu_count() or 1) // workers)
+        self.pool = ProcessPoolExecutor(
+            max_workers=workers, initializer=init_llm_worker, initargs=(model_path, self.threads, use_cache)
+        )
+
+    def map(self, prompts, max_tokens=1024):
+        # Responses in prompt order. The workers' llm_call spans are merged; the parent also
+        # records the level as a whole
+        with span("llm_pool_map", prompts=len(prompts), workers=self.workers) as counters:
+            responses = []
+            for response, spans in self.pool.map(complete_in_worker, prompts, repeat(max_tokens)):
+                METRICS.merge(spans)
+                responses.append(response)
+            counters["prompt_tokens"] = sum(r.get("usage", {}).get("prompt_tokens", 0) for r in responses)
+            counters["completion_tokens"] = sum(r.get("usage", {}).get("completion_tokens", 0) for r in responses)
+        return responses
+
+    def warm(self):
+        # Start every worker and load the model before the first real request
+        return sorted({f.result() for f in [self.pool.submit(warm_worker) for _ in range(self.workers)]})
+
+    def close(self):
+        self.pool.shutdown()
+
+class PooledLlama:
+    # Llama-like front for a LlamaPool: each call runs on a free worker process, so several
+    # threads can share K processes (and one mmap'd copy of the weights)
+
+    thread_safe = True
+    records_spans = True   # timed_completion leaves the llm_call span to the worker
+
+    def __init__(self, pool: LlamaPool):
+        self.pool = pool
+
+    def __call__(self, prompt, max_tokens=1024, grammar=None, **params):
+        fn = complete_json_in_worker if grammar is not None else complete_in_worker
+        response, spans = self.pool.pool.submit(fn, prompt, max_tokens).result()
+        METRICS.merge(spans)
+        return response
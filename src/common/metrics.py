@@ -0,0 +1,330 @@
+# src/common/metrics.py
+
+import os
+import sys
+import json
+import time
+import fcntl
+import logging
+import resource
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+
+# ------------------ CONFIG ------------------
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+METRICS_DIR = BASE_DIR / "output" / "metrics"
+PROMETHEUS_FILE = "meeting_minutes.prom"
+PROMETHEUS_STATE = "meeting_minutes_totals.json"   # running totals behind the .prom counters
+PREFIX = "meeting_minutes"
+LLM_SPANS = ("llm_call", "llm_batch")
+
+log = logging.getLogger(__name__)
+
+# Recording a span belongs to; set per recording by the pipeline and batch runner
+current_recording = ContextVar("current_recording", default="")
+
+# ------------------ PROCESS STATS ------------------
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+# ------------------ RECORDER ------------------
+
+class Metrics:
+    # Spans of named stages: wall time, CPU time, peak RSS when the span ended, plus any
+    # counters the stage adds (tokens, chunks, ...). cpu_s is process CPU, which includes
+    # torch / llama.cpp worker threads but also whatever else ran concurrently (pipelined
+    # stages, batch jobs); thread_cpu_s is the calling thread's own share.
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.spans = []
+        self.exported = 0   # spans already added to the Prometheus totals
+        self.started_at = time.time()
+
+    def record(self, name, wall_s, cpu_s=None, thread_cpu_s=None, **counters):
+        entry = {
+            "name": name,
+            "recording": current_recording.get(),
+            "thread": threading.current_thread().name,
+            "ended_at": time.time(),
+            "wall_s": wall_s,
+            "cpu_s": cpu_s,
+            "thread_cpu_s": thread_cpu_s,
+            "peak_rss_mb": peak_rss_mb(),
+            **counters,
+        }
+        with self.lock:
+            self.spans.append(entry)
+        return entry
+
+    @contextmanager
+    def span(self, name, **counters):
+        # The yielded dict takes counters known only once the stage is done
+        wall, cpu, thread_cpu = time.perf_counter(), time.process_time(), time.thread_time()
+        try:
+            yield counters
+        finally:
+            self.record(
+                name, time.perf_counter() - wall, time.process_time() - cpu, time.thread_time() - thread_cpu,
+                **counters
+            )
+
+    def timed_iter(self, name, iterable):
+        # One span per item, timing how long producing it took (e.g. decoding an audio chunk)
+        iterator = iter(iterable)
+        while True:
+            wall, cpu, thread_cpu = time.perf_counter(), time.process_time(), time.thread_time()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.record(name, time.perf_counter() - wall, time.process_time() - cpu, time.thread_time() - thread_cpu)
+            yield item
+
+    def reset(self):
+        with self.lock:
+            self.spans = []
+            self.exported = 0
+            self.started_at = time.time()
+
+    def trim(self, keep):
+        # Drops all but the newest `keep` spans (a long-running service); already exported
+        # ones go first, and the export position moves with them
+        with self.lock:
+            dropped = max(0, len(self.spans) - keep)
+            del self.spans[:dropped]
+            self.exported = max(0, self.exported - dropped)
+
+    # Worker processes
+
+    def take(self):
+        # Every span recorded so far, removed: a pool worker hands them to its parent with
+        # each result, since only the parent's recorder is exported
+        with self.lock:
+            spans, self.spans = self.spans, []
+            self.exported = 0
+        return spans
+
+    def merge(self, spans):
+        # Spans from a worker process, filed under the caller's recording and thread
+        for entry in spans:
+            entry.update(recording=current_recording.get(), thread=threading.current_thread().name)
+        with self.lock:
+            self.spans.extend(spans)
+
+    # Aggregation
+
+    def totals(self):
+        # {(recording, name): {"count", "wall_s", "cpu_s", "peak_rss_mb", <summed counters>}}
+        with self.lock:
+            spans = list(self.spans)
+        return _aggregate(spans, lambda span: (span["recording"], span["name"]))
+
+    def log_summary(self):
+        totals = self.totals()
+        if not totals:
+            return
+        lines = [f"{'recording':<24} {'stage':<16} {'calls':>5} {'wall s':>8} {'cpu s':>8} {'peak MB':>8}"]
+        for (recording, name), t in sorted(totals.items()):
+            lines.append(
+                f"{recording[:24]:<24} {name:<16} {t['count']:>5} {t['wall_s']:>8.1f} "
+                f"{t.get('cpu_s', 0):>8.1f} {t['peak_rss_mb']:>8.0f}"
+            )
+        llm = [t for (_, name), t in totals.items() if name in LLM_SPANS]
+        generated = sum(t.get("completion_tokens", 0) for t in llm)
+        generation_s = sum(t.get("generation_s", 0) for t in llm)
+        if generation_s:
+            lines.append(f"LLM generation: {generated / generation_s:.1f} tokens/s")
+        log.info("📈 Metrics:\n" + "\n".join(lines))
+
+    # Export
+
+    def write_trace(self, run_id, directory=METRICS_DIR, spans=None, started_at=None):
+        # Every span by default; the service passes one job's spans and start time
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{run_id}_trace.json"
+        with self.lock:
+            trace = {
+                "run_id": run_id,
+                "started_at": datetime.fromtimestamp(started_at or self.started_at).isoformat(timespec="seconds"),
+                "pid": os.getpid(),
+                "spans": list(self.spans) if spans is None else list(spans),
+            }
+        path.write_text(json.dumps(trace, indent=2), encoding="utf-8")
+        return path
+
+    def write_prometheus(self, directory=METRICS_DIR):
+        # Textfile-collector format, one series per stage: recording names as labels would
+        # grow without bound, so per-recording detail stays in the JSON traces. Counters add
+        # up across runs and processes in a small state file next to the .prom; each export
+        # adds only the spans recorded since the previous one.
+        directory.mkdir(parents=True, exist_ok=True)
+        with self.lock:
+            spans = self.spans[self.exported:]
+            self.exported = len(self.spans)
+        latest = _aggregate(spans, lambda span: span["name"])
+
+        with _file_lock(directory / f"{PROMETHEUS_FILE}.lock"):
+            state_path = directory / PROMETHEUS_STATE
+            state = json.loads(state_path.read_text(encoding="utf-8")) if state_path.exists() else {}
+            stages = state.setdefault("stages", {})
+            for name, t in latest.items():
+                merged = stages.setdefault(name, {})
+                for key, value in t.items():
+                    # Peak RSS is a gauge: the latest run's value, not a sum
+                    merged[key] = value if key == "peak_rss_mb" else merged.get(key, 0) + value
+            if any(name in latest for name in LLM_SPANS):
+                state["llm_latest"] = _llm_totals(latest)
+            _write_atomic(state_path, json.dumps(state, indent=2))
+            path = directory / PROMETHEUS_FILE
+            _write_atomic(path, _render_prometheus(stages, _llm_totals(stages), state.get("llm_latest", {})))
+        return path
+
+    def export(self, run_id, directory=METRICS_DIR):
+        if not self.spans:
+            return None   # nothing ran locally (e.g. the work went to the inference service)
+        trace_path = self.write_trace(run_id, directory)
+        self.write_prometheus(directory)
+        self.log_summary()
+        log.info(f"📈 Metrics trace saved to: {trace_path}")
+        return trace_path
+
+def _aggregate(spans, key):
+    # Spans grouped by key(span): count, max peak RSS and every numeric counter summed
+    totals = {}
+    for span in spans:
+        total = totals.setdefault(key(span), {"count": 0, "peak_rss_mb": 0.0})
+        total["count"] += 1
+        total["peak_rss_mb"] = max(total["peak_rss_mb"], span["peak_rss_mb"])
+        for name, value in span.items():
+            if name in ("ended_at", "peak_rss_mb") or isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            total[name] = total.get(name, 0) + value
+    return totals
+
+def _llm_totals(stages):
+    merged = {}
+    for name in LLM_SPANS:
+        for key, value in stages.get(name, {}).items():
+            merged[key] = merged.get(key, 0) + value
+    return merged
+
+def _render_prometheus(stages, llm, llm_latest):
+    # Counters are all-time totals; the tokens/sec gauges are from the latest run with LLM calls
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+        lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+        for labels, value in samples:
+            label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+            lines.append(f"{PREFIX}_{name}{{{label_text}}} {value}" if label_text else f"{PREFIX}_{name} {value}")
+
+    def per_stage(key):
+        return [({"stage": n}, t.get(key, 0)) for n, t in sorted(stages.items())]
+
+    metric("stage_calls_total", "counter", "Spans recorded per stage", per_stage("count"))
+    metric("stage_wall_seconds_total", "counter", "Wall time per stage", per_stage("wall_s"))
+    metric("stage_cpu_seconds_total", "counter", "Process CPU time per stage", per_stage("cpu_s"))
+    metric("stage_peak_rss_bytes", "gauge", "Peak process RSS at the end of the stage, latest run",
+           [(labels, int(mb * 1024 * 1024)) for labels, mb in per_stage("peak_rss_mb")])
+    for key, name, help_text in (
+        ("prompt_tokens", "llm_prompt_tokens_total", "Prompt tokens sent to the LLM"),
+        ("prompt_eval_tokens", "llm_prompt_eval_tokens_total", "Prompt tokens actually evaluated (not reused from the KV cache)"),
+        ("completion_tokens", "llm_generated_tokens_total", "Tokens generated by the LLM"),
+        ("prompt_eval_s", "llm_prompt_eval_seconds_total", "Time spent evaluating prompts"),
+        ("generation_s", "llm_generation_seconds_total", "Time spent generating tokens"),
+    ):
+        metric(name, "counter", help_text, [({}, llm.get(key, 0))])
+    metric("llm_generation_tokens_per_second", "gauge", "Generated tokens per second of generation time, latest run",
+           [({}, _rate(llm_latest.get("completion_tokens", 0), llm_latest.get("generation_s", 0)))])
+    metric("llm_prompt_eval_tokens_per_second", "gauge", "Evaluated prompt tokens per second of prompt-eval time, latest run",
+           [({}, _rate(llm_latest.get("prompt_eval_tokens", 0), llm_latest.get("prompt_eval_s", 0)))])
+    metric("last_run_timestamp_seconds", "gauge", "When these metrics were written", [({}, int(time.time()))])
+    return "\n".join(lines) + "\n"
+
+@contextmanager
+def _file_lock(path):
+    # Several scripts / batch workers may export at once; the state file is read-modify-write
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def _write_atomic(path, text):
+    # Temp file + rename, so node_exporter never reads a half-written file
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    os.replace(tmp_path, path)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _rate(count, seconds):
+    return count / seconds if seconds else 0
+
+def run_id(name):
+    return f"{name}_{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+
+# Process-wide recorder every stage reports to
+METRICS = Metrics()
+span = METRICS.span
+
+@contextmanager
+def recording(name):
+    token = current_recording.set(name)
+    try:
+        yield
+    finally:
+        current_recording.reset(token)
+
+# ------------------ LLM CALLS ------------------
+
+def _perf_reset(llama):
+    try:
+        import llama_cpp
+        ctx = llama._ctx.ctx
+        reset = getattr(llama_cpp, "llama_perf_context_reset", None) or llama_cpp.llama_reset_timings
+        reset(ctx)
+    except Exception:
+        pass
+
+def _perf_read(llama):
+    # (prompt-eval ms, evaluated prompt tokens, generation ms) from llama.cpp's own counters,
+    # or None when this build exposes neither the current nor the older timings call
+    try:
+        import llama_cpp
+        ctx = llama._ctx.ctx
+        read = getattr(llama_cpp, "llama_perf_context", None) or llama_cpp.llama_get_timings
+        perf = read(ctx)
+        return perf.t_p_eval_ms, perf.n_p_eval, perf.t_eval_ms
+    except Exception:
+        return None
+
+def timed_completion(llama, prompt, **params):
+    # llama(prompt, **params) recorded as an "llm_call" span with token counts and the
+    # prompt-eval / generation split. A pooled model's worker records (and returns) its own.
+    if getattr(llama, "records_spans", False):
+        return llama(prompt, **params)
+    _perf_reset(llama)
+    with span("llm_call") as counters:
+        response = llama(prompt, **params)
+        usage = response.get("usage", {}) if isinstance(response, dict) else {}
+        counters["prompt_tokens"] = usage.get("prompt_tokens", 0)
+        counters["completion_tokens"] = usage.get("completion_tokens", 0)
+        perf = _perf_read(llama)
+        if perf is not None:
+            prompt_eval_ms, prompt_eval_tokens, generation_ms = perf
+            counters["prompt_eval_s"] = prompt_eval_ms / 1000
+            counters["prompt_eval_tokens"] = prompt_eval_tokens
+            counters["generation_s"] = generation_ms / 1000
+    return response
@@ -0,0 +1,65 @@
+# src/common/models.py
+
+import inspect
+import logging
+import threading
+from functools import wraps
+
+from common.metrics import span
+
+log = logging.getLogger(__name__)
+
+# ------------------ REGISTRY ------------------
+
+class ModelRegistry:
+    # Named model loaders. A loader runs (and imports its heavy library) the first time its
+    # model is asked for with a given set of arguments; later calls get the same instance.
+    # Modules register their loaders at import, which costs nothing, so `--help`, argument
+    # errors and paths that never touch a model don't pay for torch / transformers / llama.cpp.
+
+    def __init__(self):
+        self.loaders = {}
+        self.models = {}
+        self.lock = threading.Lock()
+        self.key_locks = {}
+
+    def register(self, name):
+        # Decorator: the decorated loader becomes a cached getter with the same signature
+        def decorator(loader):
+            self.loaders[name] = loader
+
+            @wraps(loader)
+            def get(*args, **kwargs):
+                return self.get(name, *args, **kwargs)
+            return get
+        return decorator
+
+    def _key(self, name, args, kwargs):
+        # Bound with defaults filled in, so load(x) and load(x, default) share one instance
+        bound = inspect.signature(self.loaders[name]).bind(*args, **kwargs)
+        bound.apply_defaults()
+        return name, tuple(str(v) for v in bound.arguments.values())
+
+    def get(self, name, *args, **kwargs):
+        key = self._key(name, args, kwargs)
+        with self.lock:
+            if key in self.models:
+                return self.models[key]
+            # One lock per model, so loading Whisper doesn't hold up a pyannote load in another thread
+            key_lock = self.key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            if key not in self.models:
+                with span(f"load_{name}"):
+                    self.models[key] = self.loaders[name](*args, **kwargs)
+            return self.models[key]
+
+    def loaded(self):
+        return list(self.models)
+
+    def unload(self, name=None):
+        with self.lock:
+            for key in [k for k in self.models if name is None or k[0] == name]:
+                del self.models[key]
+
+# Process-wide registry every loader registers with
+MODELS = ModelRegistry()
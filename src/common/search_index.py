@@ -0,0 +1,304 @@
+# src/common/search_index.py
+
+import os
+import re
+import json
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from common.transcript_lines import parse_transcript
+
+# ------------------ CONFIG ------------------
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+SEARCH_INDEX_PATH = BASE_DIR / "output" / "search" / "index.sqlite3"
+OUTPUT_DIRS = [
+    BASE_DIR / "output" / "diarized_transcripts",
+    BASE_DIR / "output" / "summaries",
+    BASE_DIR / "output" / "summary",
+    BASE_DIR / "output" / "action_items",
+]
+
+# (suffix, kind), longest first so "_diarized_actions.txt" isn't taken for a transcript
+SOURCE_SUFFIXES = [
+    ("_diarized_actions.txt", "action"),
+    ("_action_items.jsonl", "action"),
+    ("_action_items.txt", "action"),
+    ("_diarized.txt", "segment"),
+    ("_summary.txt", "summary"),
+]
+SPEAKER = re.compile(r"\bspeaker_(\d+)\b", re.IGNORECASE)
+HEADER_LINE = re.compile(r"^\W*chunk \d+", re.IGNORECASE)   # "🔹 Chunk 3 Summary:" and the like
+
+log = logging.getLogger(__name__)
+
+# ------------------ DOCUMENTS ------------------
+#
+# Every indexed file becomes rows of (kind, speaker, start, end, text): one per transcript
+# segment, per summary line and per action item. Speakers are normalized to SPEAKER_XX, so
+# "Speaker_2" in an LLM answer matches SPEAKER_02 in the transcript.
+
+def normalize_speaker(name):
+    match = SPEAKER.search(name or "")
+    return f"SPEAKER_{int(match[1]):02d}" if match else (name or None)
+
+def source_kind(path: Path):
+    # (meeting name, kind), or None for files the index doesn't cover
+    for suffix, kind in SOURCE_SUFFIXES:
+        if path.name.endswith(suffix):
+            return path.name[:-len(suffix)], kind
+    return None
+
+def segment_docs(text):
+    return [(normalize_speaker(speaker), start, end, body) for start, end, speaker, body in parse_transcript(text)]
+
+def summary_docs(text):
+    return [(None, None, None, line.strip()) for line in text.splitlines() if line.strip() and not HEADER_LINE.match(line.strip())]
+
+def action_docs(text):
+    # Free-text answers: an item starts on an unindented line; indented lines ("Assigned
+    # to", "Deadline") belong to it. The owner is the first speaker the item names.
+    items = []
+    for line in text.splitlines():
+        if not line.strip() or HEADER_LINE.match(line.strip()):
+            continue
+        if line[:1].isspace() and items:
+            items[-1] += " " + line.strip()
+        else:
+            items.append(line.strip())
+    return [(normalize_speaker(item) if SPEAKER.search(item) else None, None, None, item) for item in items]
+
+def action_jsonl_docs(text):
+    # Structured items from --json / --json-actions: owner and source_time are exact
+    docs = []
+    for line in text.splitlines():
+        if line.strip():
+            item = json.loads(line)
+            body = item["task"] + (f" [by {item['deadline']}]" if item.get("deadline") else "")
+            docs.append((normalize_speaker(item.get("owner")), item.get("source_time"), None, body))
+    return docs
+
+def read_docs(path: Path, kind):
+    text = path.read_text(encoding="utf-8")
+    if kind == "segment":
+        return segment_docs(text)
+    if kind == "summary":
+        return summary_docs(text)
+    return action_jsonl_docs(text) if path.suffix == ".jsonl" else action_docs(text)
+
+# ------------------ QUERIES ------------------
+
+def match_expression(query, phrase=False):
+    # Plain words are ANDed, each quoted so punctuation can't break FTS5's query syntax;
+    # phrase=True wants the words adjacent and in order
+    words = re.findall(r"\w+", query)
+    if not words:
+        raise ValueError("Empty search query")
+    if phrase:
+        return '"' + " ".join(words) + '"'
+    return " ".join(f'"{w}"' for w in words)
+
+def parse_date(value):
+    # "YYYY-MM-DD" (or a full ISO timestamp) → epoch seconds
+    return datetime.fromisoformat(value).timestamp() if value else None
+
+# ------------------ INDEX ------------------
+
+class SearchIndex:
+    # Inverted index over transcripts, summaries and action items of every meeting, in one
+    # SQLite file with an FTS5 table. Files are indexed incrementally: a file whose size and
+    # mtime are unchanged is skipped, and a changed one has its rows replaced in one
+    # transaction. Metadata (meeting, kind, speaker, times) lives in a plain table next to
+    # the FTS table, so speaker / time filters use ordinary indexes.
+
+    def __init__(self, path=SEARCH_INDEX_PATH):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _connection(self):
+        # A connection must not cross fork(), so each process opens its own
+        if self._conn is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS meetings (
+                    id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL, date REAL NOT NULL);
+                CREATE TABLE IF NOT EXISTS sources (
+                    path TEXT PRIMARY KEY, meeting_id INTEGER NOT NULL, kind TEXT NOT NULL,
+                    size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL);
+                CREATE TABLE IF NOT EXISTS docs (
+                    id INTEGER PRIMARY KEY, source TEXT NOT NULL, meeting_id INTEGER NOT NULL, kind TEXT NOT NULL,
+                    speaker TEXT, start REAL, end REAL);
+                CREATE INDEX IF NOT EXISTS docs_source ON docs (source);
+                CREATE INDEX IF NOT EXISTS docs_speaker ON docs (speaker, meeting_id);
+                CREATE INDEX IF NOT EXISTS docs_meeting ON docs (meeting_id, start);
+                CREATE INDEX IF NOT EXISTS meetings_date ON meetings (date);
+                CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(text, tokenize='porter unicode61');
+            """)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    # Writing
+
+    def index_file(self, path: Path, meeting_date=None):
+        # True if the file was (re)indexed, False if unchanged or not a meeting output
+        path = Path(path).resolve()
+        source = source_kind(path)
+        if source is None:
+            return False
+        name, kind = source
+        if kind == "action" and path.suffix == ".txt" and path.with_suffix(".jsonl").exists():
+            return False   # the structured items say the same with exact owners and times
+        st = path.stat()
+        with self.lock:
+            conn = self._connection()
+            row = conn.execute("SELECT size, mtime_ns FROM sources WHERE path = ?", (str(path),)).fetchone()
+            if row == (st.st_size, st.st_mtime_ns):
+                return False
+            docs = read_docs(path, kind)
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                meeting_id = self._meeting(conn, name, meeting_date or st.st_mtime)
+                self._delete_source(conn, str(path))
+                if kind == "action" and path.suffix == ".jsonl":
+                    self._delete_source(conn, str(path.with_suffix(".txt")))
+                for speaker, start, end, text in docs:
+                    doc_id = conn.execute(
+                        "INSERT INTO docs (source, meeting_id, kind, speaker, start, end) VALUES (?, ?, ?, ?, ?, ?)",
+                        (str(path), meeting_id, kind, speaker, start, end),
+                    ).lastrowid
+                    conn.execute("INSERT INTO docs_fts (rowid, text) VALUES (?, ?)", (doc_id, text))
+                conn.execute(
+                    "INSERT OR REPLACE INTO sources (path, meeting_id, kind, size, mtime_ns) VALUES (?, ?, ?, ?, ?)",
+                    (str(path), meeting_id, kind, st.st_size, st.st_mtime_ns),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return True
+
+    def _meeting(self, conn, name, date):
+        # A meeting is dated by its oldest output
+        conn.execute(
+            "INSERT INTO meetings (name, date) VALUES (?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET date = MIN(date, excluded.date)", (name, date)
+        )
+        return conn.execute("SELECT id FROM meetings WHERE name = ?", (name,)).fetchone()[0]
+
+    def _delete_source(self, conn, source):
+        ids = [(doc_id,) for doc_id, in conn.execute("SELECT id FROM docs WHERE source = ?", (source,))]
+        conn.executemany("DELETE FROM docs_fts WHERE rowid = ?", ids)
+        conn.execute("DELETE FROM docs WHERE source = ?", (source,))
+        conn.execute("DELETE FROM sources WHERE path = ?", (source,))
+
+    def update(self, directories=OUTPUT_DIRS):
+        # Index new and changed files, drop files that are gone: (indexed, removed)
+        with self.lock:
+            rows = self._connection().execute("SELECT path, size, mtime_ns FROM sources").fetchall()
+        known = {path: (size, mtime_ns) for path, size, mtime_ns in rows}
+        indexed = 0
+        seen = set()
+        for directory in directories:
+            if not Path(directory).is_dir():
+                continue
+            # scandir's cached stat keeps an unchanged file at one syscall and no query
+            with os.scandir(Path(directory).resolve()) as entries:
+                for entry in sorted(entries, key=lambda e: e.name):
+                    if not entry.is_file() or source_kind(Path(entry.name)) is None:
+                        continue
+                    seen.add(entry.path)
+                    st = entry.stat()
+                    if known.get(entry.path) != (st.st_size, st.st_mtime_ns):
+                        indexed += self.index_file(Path(entry.path))
+        with self.lock:
+            conn = self._connection()
+            gone = [p for p in known if p not in seen and not Path(p).exists()]
+            conn.execute("BEGIN IMMEDIATE")
+            for source in gone:
+                self._delete_source(conn, source)
+            conn.execute("DELETE FROM meetings WHERE id NOT IN (SELECT meeting_id FROM sources)")
+            conn.execute("COMMIT")
+        return indexed, len(gone)
+
+    # Reading
+
+    def search(self, query, phrase=False, speaker=None, kinds=None, meeting=None, since=None, until=None,
+               start=None, end=None, limit=20):
+        # Best matches first. since / until are meeting dates (epoch seconds); start / end are
+        # seconds into the meeting and only apply to rows that have times.
+        sql = [
+            "SELECT m.name, m.date, d.kind, d.speaker, d.start, d.end, d.source,",
+            "       snippet(docs_fts, 0, '[', ']', '…', 16)",
+            "FROM docs_fts JOIN docs d ON d.id = docs_fts.rowid JOIN meetings m ON m.id = d.meeting_id",
+            "WHERE docs_fts MATCH ?",
+        ]
+        params = [match_expression(query, phrase)]
+        filters = {
+            "d.speaker = ?": normalize_speaker(speaker) if speaker else None,
+            "m.name = ?": meeting,
+            "m.date >= ?": since,
+            "m.date < ?": until,
+            "d.end > ?": start,
+            "d.start < ?": end,
+        }
+        for clause, value in filters.items():
+            if value is not None:
+                sql.append(f"AND {clause}")
+                params.append(value)
+        if kinds:
+            sql.append(f"AND d.kind IN ({', '.join('?' * len(kinds))})")
+            params.extend(kinds)
+        sql.append("ORDER BY bm25(docs_fts) LIMIT ?")
+        params.append(limit)
+
+        with self.lock:
+            rows = self._connection().execute("\n".join(sql), params).fetchall()
+        return [
+            {"meeting": name, "date": date, "kind": kind, "speaker": spk, "start": s, "end": e, "path": source,
+             "snippet": snippet}
+            for name, date, kind, spk, s, e, source, snippet in rows
+        ]
+
+    def stats(self):
+        with self.lock:
+            conn = self._connection()
+            return {
+                "meetings": conn.execute("SELECT COUNT(*) FROM meetings").fetchone()[0],
+                "files": conn.execute("SELECT COUNT(*) FROM sources").fetchone()[0],
+                "rows": conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0],
+            }
+
+    def close(self):
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+
+# ------------------ PIPELINE HOOK ------------------
+
+_index = None
+_index_lock = threading.Lock()
+
+def index_outputs(paths, meeting_date=None):
+    # Called after a stage writes its files; meeting_date is usually the recording's mtime.
+    # Search is a convenience, so a failure here is logged and never fails the stage.
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SearchIndex()
+    start = time.perf_counter()
+    try:
+        indexed = sum(_index.index_file(path, meeting_date) for path in paths if Path(path).exists())
+    except (sqlite3.Error, OSError, ValueError) as e:
+        log.warning(f"⚠️ Search index not updated: {e}")
+        return
+    if indexed:
+        log.info(f"🔎 Indexed {indexed} file(s) for search in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,168 @@
+# src/common/stages.py
+
+import time
+import queue
+import threading
+import contextvars
+
+# ------------------ STATS ------------------
+
+class StageStats:
+    # busy: time spent doing the work; input stall: waiting for the previous stage;
+    # output stall: blocked on a full queue to the next stage
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.busy_sec = 0.0
+        self.input_stall_sec = 0.0
+        self.output_stall_sec = 0.0
+        self.max_queue_depth = 0
+        self.queue_depth_total = 0
+
+    def sample_depth(self, depth):
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+        self.queue_depth_total += depth
+
+    def as_dict(self):
+        return {
+            "stage": self.name,
+            "items": self.items,
+            "busy_sec": round(self.busy_sec, 3),
+            "input_stall_sec": round(self.input_stall_sec, 3),
+            "output_stall_sec": round(self.output_stall_sec, 3),
+            "avg_queue_depth": round(self.queue_depth_total / self.items, 2) if self.items else 0.0,
+            "max_queue_depth": self.max_queue_depth,
+        }
+
+def format_stage_stats(stats):
+    lines = [f"{'stage':<12} {'items':>5} {'busy s':>8} {'in-stall s':>10} {'out-stall s':>11} {'avg q':>6} {'max q':>6}"]
+    for s in stats:
+        d = s.as_dict()
+        lines.append(
+            f"{d['stage']:<12} {d['items']:>5} {d['busy_sec']:>8.1f} {d['input_stall_sec']:>10.1f} "
+            f"{d['output_stall_sec']:>11.1f} {d['avg_queue_depth']:>6.2f} {d['max_queue_depth']:>6}"
+        )
+    return "\n".join(lines)
+
+# ------------------ SEQUENTIAL ------------------
+
+def run_sequential(source, stages, stats=None):
+    # Same contract as run_pipelined, one item at a time through every stage
+    stats = stats if stats is not None else []
+    stats[:] = [StageStats("decode")] + [StageStats(name) for name, _ in stages]
+    iterator = iter(source)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        stats[0].busy_sec += time.perf_counter() - start
+        stats[0].items += 1
+        for (_, fn), stage_stats in zip(stages, stats[1:]):
+            start = time.perf_counter()
+            item = fn(item)
+            stage_stats.busy_sec += time.perf_counter() - start
+            stage_stats.items += 1
+        yield item
+
+# ------------------ PIPELINED ------------------
+
+_END = object()
+
+def _put(q, item, stop):
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _get(q, stop):
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _END
+
+def run_pipelined(source, stages, queue_size=2, stats=None):
+    # Each stage (and the source, as "decode") runs in its own thread, joined by bounded
+    # queues, so item i+1 is decoded while item i is in stage 1 and item i-1 in stage 2.
+    # Results come out in source order. `stats` (a list) is filled with one StageStats per stage.
+    stats = stats if stats is not None else []
+    stats[:] = [StageStats("decode")] + [StageStats(name) for name, _ in stages]
+    queues = [queue.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+    stop = threading.Event()
+    errors = []
+
+    def produce():
+        s = stats[0]
+        try:
+            iterator = iter(source)
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                s.busy_sec += time.perf_counter() - start
+                s.items += 1
+                start = time.perf_counter()
+                if not _put(queues[0], item, stop):
+                    return
+                s.output_stall_sec += time.perf_counter() - start
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        _put(queues[0], _END, stop)
+
+    def work(k, fn):
+        s = stats[k + 1]
+        inbox, outbox = queues[k], queues[k + 1]
+        try:
+            while True:
+                s.sample_depth(inbox.qsize())
+                start = time.perf_counter()
+                item = _get(inbox, stop)
+                s.input_stall_sec += time.perf_counter() - start
+                if item is _END:
+                    break
+                start = time.perf_counter()
+                result = fn(item)
+                s.busy_sec += time.perf_counter() - start
+                s.items += 1
+                start = time.perf_counter()
+                if not _put(outbox, result, stop):
+                    return
+                s.output_stall_sec += time.perf_counter() - start
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        _put(outbox, _END, stop)
+
+    # Stage threads run in a copy of the caller's context, so context variables (such as the
+    # recording metrics are attributed to) carry over
+    threads = [threading.Thread(target=contextvars.copy_context().run, args=(produce,), name="stage-decode", daemon=True)]
+    threads += [
+        threading.Thread(target=contextvars.copy_context().run, args=(work, k, fn), name=f"stage-{name}", daemon=True)
+        for k, (name, fn) in enumerate(stages)
+    ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        while True:
+            item = _get(queues[-1], stop)
+            if item is _END:
+                break
+            yield item
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        raise errors[0]
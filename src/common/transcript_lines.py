@@ -0,0 +1,21 @@
+# src/common/transcript_lines.py
+
+import re
+
+# The diarized transcript's line format, stdlib only, so the PDF export and the search
+# index can parse transcripts without importing numpy (via columnar_transcript)
+
+LINE = re.compile(r"^(?P<speaker>.+?) \[(?P<start>\d+(?:\.\d+)?) - (?P<end>\d+(?:\.\d+)?)\]: ?(?P<text>.*)$")
+
+def format_line(start, end, speaker, text):
+    # Same line format as transcribe_diarized_chunked.format_transcript
+    return f"{speaker} [{start:.2f} - {end:.2f}]: {text}"
+
+def parse_transcript(transcript):
+    # "SPEAKER_XX [start - end]: text" lines back into (start, end, speaker, text)
+    segments = []
+    for line in transcript.splitlines():
+        match = LINE.match(line.strip())
+        if match:
+            segments.append((float(match["start"]), float(match["end"]), match["speaker"], match["text"]))
+    return segments
@@ -0,0 +1,166 @@
+# src/common/vad.py
+
+from bisect import bisect_left, bisect_right
+import numpy as np
+
+from common.audio import SAMPLE_RATE
+
+# ------------------ CONFIG ------------------
+
+FRAME_MS = 30
+MIN_SILENCE_MS = 600       # shorter pauses stay in the audio
+MIN_SPEECH_MS = 250        # shorter bursts (clicks, coughs) are dropped
+PAD_MS = 200               # kept around every speech region so word edges aren't clipped
+NOISE_MARGIN_DB = 12       # speech must be this far above the window's noise floor...
+SILENCE_DB = -55           # ...and louder than this (digital silence / room tone)
+MAX_THRESHOLD_DB = -30     # ...but never has to be louder than this
+VAD_WINDOW_MS = 30 * 1000  # decode granularity when VAD is on
+
+# ------------------ ENERGY VAD ------------------
+
+def frame_energies_db(audio, sr=SAMPLE_RATE, frame_ms=FRAME_MS):
+    frame = sr * frame_ms // 1000
+    n_frames = -(-len(audio) // frame)
+    padded = np.zeros(n_frames * frame, dtype=np.float32)
+    padded[:len(audio)] = audio
+    rms = np.sqrt(np.mean(padded.reshape(n_frames, frame) ** 2, axis=1) + 1e-12)
+    return 20 * np.log10(rms)
+
+def _runs(mask):
+    # (start, end, value) runs of a boolean array
+    if len(mask) == 0:
+        return []
+    edges = np.flatnonzero(np.diff(mask.astype(np.int8))) + 1
+    bounds = np.concatenate([[0], edges, [len(mask)]])
+    return [(int(a), int(b), bool(mask[a])) for a, b in zip(bounds[:-1], bounds[1:])]
+
+def speech_regions(audio, sr=SAMPLE_RATE):
+    # Speech regions of `audio` as (start_sample, end_sample), sorted and non-overlapping
+    frame = sr * FRAME_MS // 1000
+    db = frame_energies_db(audio, sr)
+    if len(db) == 0:
+        return []
+    noise_floor = np.percentile(db, 10)
+    threshold = max(SILENCE_DB, min(noise_floor + NOISE_MARGIN_DB, MAX_THRESHOLD_DB))
+    speech = db > threshold
+
+    # Fill short pauses between speech, then drop short bursts
+    min_silence = MIN_SILENCE_MS // FRAME_MS
+    for start, end, value in _runs(speech):
+        if not value and start > 0 and end < len(speech) and end - start < min_silence:
+            speech[start:end] = True
+    min_speech = MIN_SPEECH_MS // FRAME_MS
+    for start, end, value in _runs(speech):
+        if value and end - start < min_speech:
+            speech[start:end] = False
+
+    pad = PAD_MS * sr // 1000
+    regions = []
+    for start, end, value in _runs(speech):
+        if not value:
+            continue
+        a, b = max(0, start * frame - pad), min(len(audio), end * frame + pad)
+        if regions and a <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], b)
+        else:
+            regions.append((a, b))
+    return regions
+
+# ------------------ OFFSET MAP ------------------
+
+class OffsetMap:
+    # Maps time inside a VAD chunk (speech pieces glued together) back to recording time
+
+    def __init__(self):
+        self.chunk_starts = []
+        self.global_starts = []
+        self.duration = 0.0
+
+    def add(self, global_start, duration):
+        # Pieces that continue where the previous one ended are merged
+        if self.global_starts and abs(self.global_starts[-1] + (self.duration - self.chunk_starts[-1]) - global_start) < 1e-6:
+            self.duration += duration
+            return
+        self.chunk_starts.append(self.duration)
+        self.global_starts.append(global_start)
+        self.duration += duration
+
+    def to_global(self, t, is_end=False):
+        # An end time exactly on a piece boundary belongs to the piece before the gap
+        i = bisect_left(self.chunk_starts, t) if is_end else bisect_right(self.chunk_starts, t)
+        i = max(0, i - 1)
+        return self.global_starts[i] + (t - self.chunk_starts[i])
+
+    @classmethod
+    def contiguous(cls, global_start, duration):
+        offset_map = cls()
+        offset_map.add(global_start, duration)
+        return offset_map
+
+# ------------------ SPEECH CHUNKER ------------------
+
+class SpeechChunker:
+    # Turns a stream of audio windows into speech-only chunks of about `target_sec`, cut in
+    # pauses: before a region that would overflow the target, once the chunk is at least half
+    # full. Chunks only run past `max_sec` (cut mid-speech) if nobody pauses for that long.
+
+    def __init__(self, target_sec, max_sec=None, sr=SAMPLE_RATE):
+        self.sr = sr
+        self.target = int(target_sec * sr)
+        self.max = int((max_sec or target_sec * 1.2) * sr)
+        self.position = 0
+        self.pieces = []
+        self.buffered = 0
+        self.last_end = None
+        self.total_samples = 0
+        self.speech_samples = 0
+
+    def _flush(self):
+        audio = np.concatenate([piece for _, piece in self.pieces])
+        offset_map = OffsetMap()
+        for start, piece in self.pieces:
+            offset_map.add(start / self.sr, len(piece) / self.sr)
+        self.pieces, self.buffered = [], 0
+        return audio, offset_map
+
+    def _append(self, start, piece):
+        self.pieces.append((start, piece))
+        self.buffered += len(piece)
+        self.last_end = start + len(piece)
+
+    def feed(self, window):
+        for a, b in speech_regions(window, self.sr):
+            start = self.position + a
+            is_pause = self.last_end is not None and start > self.last_end
+            if self.pieces and is_pause and self.buffered + (b - a) > self.target and self.buffered >= self.target // 2:
+                yield self._flush()
+            piece = window[a:b].copy()
+            while self.buffered + len(piece) > self.max:
+                head = self.max - self.buffered
+                self._append(start, piece[:head])
+                yield self._flush()
+                start, piece = start + head, piece[head:]
+            if len(piece):
+                self._append(start, piece)
+            self.speech_samples += b - a
+        self.position += len(window)
+        self.total_samples += len(window)
+
+    def finish(self):
+        if self.pieces:
+            yield self._flush()
+
+    def skipped_seconds(self):
+        return (self.total_samples - self.speech_samples) / self.sr
+
+    def summary(self):
+        total = self.total_samples / self.sr
+        skipped = self.skipped_seconds()
+        return f"🔇 VAD skipped {skipped:.1f}s of {total:.1f}s as non-speech ({skipped / total if total else 0:.0%})"
+
+def iter_speech_chunks(windows, target_sec, sr=SAMPLE_RATE, chunker=None):
+    # (chunk audio, OffsetMap) for every speech chunk in a stream of windows
+    chunker = chunker or SpeechChunker(target_sec, sr=sr)
+    for window in windows:
+        yield from chunker.feed(window)
+    yield from chunker.finish()
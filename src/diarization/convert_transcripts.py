@@ -0,0 +1,36 @@
+# src/diarization/convert_transcripts.py
+
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.columnar_transcript import columnar_path, convert, up_to_date
+
+# ------------------ CONFIG ------------------
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+TRANSCRIPT_DIR = BASE_DIR / "output" / "diarized_transcripts"
+
+# ------------------ ENTRY ------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write the columnar (.cols) file for existing *_diarized.txt transcripts.")
+    parser.add_argument("filenames", nargs="*", help="Transcript filenames (default: every *_diarized.txt in output/diarized_transcripts)")
+    parser.add_argument("--force", action="store_true", help="Rewrite .cols files that are already up to date")
+    args = parser.parse_args()
+
+    paths = [TRANSCRIPT_DIR / name for name in args.filenames] or sorted(TRANSCRIPT_DIR.glob("*_diarized.txt"))
+    converted = skipped = 0
+    for path in paths:
+        if not path.exists():
+            print(f"❌ File not found: {path}")
+            sys.exit(1)
+        if not args.force and up_to_date(path):
+            skipped += 1
+            continue
+        convert(path)
+        converted += 1
+        print(f"✅ {path.name} → {columnar_path(path).name}")
+
+    print(f"📦 {converted} converted, {skipped} already up to date")
@@ -0,0 +1,77 @@
+# src/diarization/global_speakers.py
+
+import numpy as np
+
+from common.audio import waveform_dict
+from common.chunk_cache import cached
+
+# ------------------ CONFIG ------------------
+
+# pyannote/speaker-diarization-3.1's own clustering threshold (centroid linkage on unit-norm embeddings)
+DEFAULT_CLUSTER_THRESHOLD = 0.7045654963945799
+
+# ------------------ PER-CHUNK DIARIZATION ------------------
+
+def diarize_chunk(pipeline, chunk, model_id, cache=None):
+    # Local turns (chunk-relative) plus one embedding per local speaker. With a ChunkCache,
+    # re-clustering with another threshold skips the neural forward passes.
+    def compute():
+        diarization, embeddings = pipeline(waveform_dict(chunk), return_embeddings=True)
+        turns = sorted(
+            (turn.start, turn.end, speaker)
+            for turn, _, speaker in diarization.itertracks(yield_label=True)
+        )
+        labels = diarization.labels()
+        return turns, labels, np.asarray(embeddings, dtype=np.float32)[:len(labels)]
+
+    return cached(cache, "diarization+embeddings", chunk, {"model": model_id}, compute)
+
+# ------------------ GLOBAL CLUSTERING ------------------
+
+class GlobalSpeakerClustering:
+    # Collects per-chunk speaker embeddings (a few KB each, no audio) and clusters them once
+    # over the whole recording, so labels are consistent from the first chunk to the last.
+
+    def __init__(self, threshold=DEFAULT_CLUSTER_THRESHOLD):
+        self.threshold = threshold
+        self.keys = []
+        self.embeddings = []
+
+    def add_chunk(self, chunk_idx, labels, embeddings):
+        for label, embedding in zip(labels, embeddings):
+            self.keys.append((chunk_idx, label))
+            self.embeddings.append(embedding)
+
+    def cluster(self):
+        # Returns {(chunk_idx, local_label): "SPEAKER_XX"}, numbered by first appearance
+        from scipy.cluster.hierarchy import fcluster, linkage
+
+        if not self.keys:
+            return {}
+
+        embeddings = np.stack(self.embeddings)
+        # pyannote returns NaN rows for speakers with too little clean speech to embed
+        valid = np.isfinite(embeddings).all(axis=1) & (np.linalg.norm(embeddings, axis=1) > 0)
+        clusters = np.zeros(len(self.keys), dtype=int)
+
+        if valid.sum() > 1:
+            normed = embeddings[valid] / np.linalg.norm(embeddings[valid], axis=1, keepdims=True)
+            tree = linkage(normed, method="centroid", metric="euclidean")
+            clusters[valid] = fcluster(tree, self.threshold, criterion="distance")
+
+        # Speakers without a usable embedding can't be matched, so each keeps a label of its own
+        next_id = clusters.max() + 1
+        for i in np.flatnonzero(~valid):
+            clusters[i] = next_id
+            next_id += 1
+
+        names = {}
+        mapping = {}
+        for key, cluster_id in zip(self.keys, clusters):
+            if cluster_id not in names:
+                names[cluster_id] = f"SPEAKER_{len(names):02d}"
+            mapping[key] = names[cluster_id]
+        return mapping
+
+def relabel_turns(turns, chunk_idx, mapping):
+    return [(start, end, mapping.get((chunk_idx, label), label)) for start, end, label in turns]
@@ -0,0 +1,78 @@
+# src/diarization/speaker_assignment.py
+
+UNKNOWN_SPEAKER = "Unknown"
+
+# ------------------ DIARIZATION TURNS ------------------
+
+def diarization_turns(diarization, offset=0.0):
+    # Flatten a pyannote Annotation into (start, end, speaker) tuples sorted by start
+    return sorted(
+        (turn.start + offset, turn.end + offset, speaker)
+        for turn, _, speaker in diarization.itertracks(yield_label=True)
+    )
+
+# ------------------ SWEEP LINE ------------------
+
+class SpeakerSweep:
+    # Answers "which speaker talks most inside [start, end]" for queries whose start never
+    # decreases. Each turn enters and leaves the active set once, so a full pass over n
+    # segments and m turns is O(n + m) (times the number of overlapping speakers).
+
+    def __init__(self, turns):
+        self.turns = turns
+        self.next_turn = 0
+        self.active = []
+
+    def dominant_speaker(self, start, end):
+        while self.next_turn < len(self.turns) and self.turns[self.next_turn][0] < end:
+            self.active.append(self.turns[self.next_turn])
+            self.next_turn += 1
+
+        # Later queries start no earlier, so turns that already ended can be dropped for good
+        self.active = [turn for turn in self.active if turn[1] > start]
+
+        overlap = {}
+        for turn_start, turn_end, speaker in self.active:
+            shared = min(end, turn_end) - max(start, turn_start)
+            if shared > 0:
+                overlap[speaker] = overlap.get(speaker, 0.0) + shared
+
+        return max(overlap, key=overlap.get) if overlap else UNKNOWN_SPEAKER
+
+# ------------------ ASSIGNMENT ------------------
+
+def _split_words(words, sweep, offset):
+    # Group consecutive words by their dominant speaker; words in gaps stay with the current speaker
+    pieces = []
+    for word in words:
+        speaker = sweep.dominant_speaker(word["start"], word["end"])
+        if pieces and pieces[-1][2] == UNKNOWN_SPEAKER:
+            pieces[-1][2] = speaker
+        if pieces and speaker in (pieces[-1][2], UNKNOWN_SPEAKER):
+            pieces[-1][1] = word["end"]
+            pieces[-1][3].append(word["word"])
+        else:
+            pieces.append([word["start"], word["end"], speaker, [word["word"]]])
+
+    return [
+        (offset + start, offset + end, speaker, "".join(text).strip())
+        for start, end, speaker, text in pieces
+    ]
+
+def assign_speakers(segments, turns, offset=0.0, split_on_speaker_change=False):
+    # Merge Whisper segments against diarization turns (both in the same time frame) in one
+    # pass. Returns (global_start, global_end, speaker, text) tuples shifted by `offset`.
+    # With split_on_speaker_change, segments carrying word timestamps are cut wherever the
+    # dominant speaker changes.
+    sweep = SpeakerSweep(turns)
+    assigned = []
+
+    for segment in sorted(segments, key=lambda s: s["start"]):
+        words = segment.get("words") if split_on_speaker_change else None
+        if words:
+            assigned.extend(_split_words(words, sweep, offset))
+        else:
+            speaker = sweep.dominant_speaker(segment["start"], segment["end"])
+            assigned.append((offset + segment["start"], offset + segment["end"], speaker, segment["text"].strip()))
+
+    return assigned
@@ -1,18 +1,33 @@
 import os
 import sys
-import whisper
-from tempfile import NamedTemporaryFile
-from pydub import AudioSegment
-from pyannote.audio import Pipeline
-from pyannote.core import Segment
+import argparse
+from math import ceil
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.audio import SAMPLE_RATE, iter_audio_windows, probe_duration, waveform_dict
+from common.asr_backends import ASR_BACKENDS, DEFAULT_ASR_BACKEND, asr_cache_params, load_asr
+from common.asr_process import WhisperProcess, close_asr
+from common.chunk_cache import ChunkCache, cached
+from common.columnar_transcript import columnar_path, parse_transcript, write_columnar
+from common.metrics import METRICS, run_id, span
+from common.search_index import index_outputs
+from common.models import MODELS
+from common.stages import format_stage_stats, run_pipelined, run_sequential
+from common.vad import VAD_WINDOW_MS, OffsetMap, SpeechChunker, iter_speech_chunks
+from diarization.speaker_assignment import assign_speakers, diarization_turns
+from diarization.global_speakers import (
+    DEFAULT_CLUSTER_THRESHOLD, GlobalSpeakerClustering, diarize_chunk, relabel_turns
+)
+from service import client as service_client
+
 # ------------------ CONFIG ------------------
 
-INPUT_DIR = Path("../../input/audio")
-OUTPUT_DIR = Path("../../output/diarized_transcripts")
+BASE_DIR = Path(__file__).resolve().parents[2]
+INPUT_DIR = BASE_DIR / "input" / "audio"
+OUTPUT_DIR = BASE_DIR / "output" / "diarized_transcripts"
 WHISPER_MODEL = "base"
-CHUNK_LENGTH_MS = 5 * 60 * 1000  
+CHUNK_LENGTH_MS = 5 * 60 * 1000
 HF_TOKEN = os.getenv("HF_TOKEN", None)
 PYANNOTE_MODEL_ID = "pyannote/speaker-diarization-3.1"
 
@@ -26,86 +41,217 @@ def find_file(filename: str, search_path: Path) -> Path:
         return files_found[0]
     return None
 
-# ------------------ CHECK ARGS ------------------
+# ------------------ LOAD MODELS ------------------
+
+def thread_budget(asr_threads=None, diarization_threads=None):
+    # Default: split the cores evenly between Whisper and pyannote
+    cores = os.cpu_count() or 1
+    asr_threads = asr_threads or max(1, cores // 2)
+    diarization_threads = diarization_threads or max(1, cores - asr_threads)
+    return asr_threads, diarization_threads
 
-if len(sys.argv) < 2:
-    print("\u274c Usage: python transcribe_diarized_chunked.py <audio_filename>")
-    sys.exit(1)
+def load_models(asr_threads=None, diarization_threads=None, asr_backend=DEFAULT_ASR_BACKEND):
+    # With thread budgets, Whisper runs in its own process so the two models never share
+    # torch's (process-wide) intra-op thread pool
+    print(f"🔁 Loading Whisper ({asr_backend}) and PyAnnote models...")
+    if asr_threads:
+        print(f"⚙️ Thread budget: Whisper {asr_threads} | pyannote {diarization_threads}")
+        with span("load_whisper", process=True, backend=asr_backend):
+            whisper_model = WhisperProcess(WHISPER_MODEL, asr_threads, asr_backend)
+    else:
+        whisper_model = load_asr(asr_backend, WHISPER_MODEL)
+    if diarization_threads:
+        import torch
+        torch.set_num_threads(diarization_threads)
+    return whisper_model, load_pyannote(PYANNOTE_MODEL_ID)
 
-filename = sys.argv[1]
+@MODELS.register("pyannote")
+def load_pyannote(model_id=PYANNOTE_MODEL_ID):
+    from pyannote.audio import Pipeline
+    return Pipeline.from_pretrained(model_id, use_auth_token=HF_TOKEN)
 
-print(f"🔍 Searching for '{filename}' inside '{INPUT_DIR}'...")
-audio_path = find_file(filename, INPUT_DIR)
+# ------------------ TRANSCRIBE + DIARIZE ------------------
 
-if audio_path is None or not audio_path.exists():
-    print(f"❌ File not found: {INPUT_DIR / filename}")
-    sys.exit(1)
+def transcribe_diarized(audio_path: Path, whisper_model, pipeline, split_on_speaker_change=False,
+                        global_speakers=False, cluster_threshold=DEFAULT_CLUSTER_THRESHOLD,
+                        pipelined=False, queue_size=2, stage_stats=None, vad=False, cache=None,
+                        asr_backend=DEFAULT_ASR_BACKEND):
+    print("🎧 Streaming audio (16 kHz mono) in 5-minute chunks...")
+    duration_sec = probe_duration(audio_path)
+    if vad:
+        chunk_count = "?"
+    elif duration_sec is not None:
+        chunk_count = ceil(duration_sec * 1000 / CHUNK_LENGTH_MS)
+        print(f"🕒 Total duration: {duration_sec / 60:.2f} min | Chunks: {chunk_count}")
+    else:
+        chunk_count = "?"
 
-print(f"✅ Found audio file at: {audio_path}")
+    all_segments = []
+    # With global speakers, per-chunk results wait (as text + turns, no audio) for one final clustering
+    clustering = GlobalSpeakerClustering(cluster_threshold) if global_speakers else None
+    pending = []
 
-base_name = audio_path.stem
+    def diarize(item):
+        i, chunk, offset_map = item
+        print(f"🧠 Chunk {i+1}/{chunk_count}: Performing speaker diarization...")
+        with span("diarization", chunk=i, audio_s=len(chunk) / SAMPLE_RATE):
+            if clustering is not None:
+                turns, labels, embeddings = diarize_chunk(pipeline, chunk, PYANNOTE_MODEL_ID, cache)
+            else:
+                turns = cached(cache, "diarization", chunk, {"model": PYANNOTE_MODEL_ID},
+                               lambda: diarization_turns(pipeline(waveform_dict(chunk))))
+                labels, embeddings = None, None
+        return i, chunk, offset_map, turns, labels, embeddings
 
-# ------------------ LOAD MODELS ------------------
+    def transcribe(item):
+        i, chunk, offset_map, turns, labels, embeddings = item
+        print(f"✍️ Chunk {i+1}/{chunk_count}: Transcribing with Whisper...")
+        options = {"language": "en", "fp16": False, "word_timestamps": split_on_speaker_change}
+        with span("whisper", chunk=i, audio_s=len(chunk) / SAMPLE_RATE):
+            segments = cached(cache, "whisper", chunk, {**asr_cache_params(asr_backend, WHISPER_MODEL), **options},
+                              lambda: whisper_model.transcribe(chunk, **options)["segments"])
+        return i, offset_map, segments, turns, labels, embeddings
 
-print("🔁 Loading Whisper and PyAnnote models...")
-whisper_model = whisper.load_model(WHISPER_MODEL)
-pipeline = Pipeline.from_pretrained(PYANNOTE_MODEL_ID, use_auth_token=HF_TOKEN)
+    # Pipelined: chunk i+1 decodes while chunk i is diarized and chunk i-1 transcribed
+    stages = [("diarize", diarize), ("transcribe", transcribe)]
+    # Every chunk carries an OffsetMap from chunk time to recording time (a single shift
+    # for fixed chunks, one piece per kept speech region with VAD)
+    if vad:
+        chunker = SpeechChunker(CHUNK_LENGTH_MS / 1000)
+        windows = iter_audio_windows(audio_path, VAD_WINDOW_MS)
+        speech = iter_speech_chunks(windows, CHUNK_LENGTH_MS / 1000, chunker=chunker)
+        chunks = ((i, audio, offset_map) for i, (audio, offset_map) in enumerate(speech))
+    else:
+        chunker = None
+        chunks = (
+            (i, chunk, OffsetMap.contiguous(i * CHUNK_LENGTH_MS / 1000, len(chunk) / SAMPLE_RATE))
+            for i, chunk in enumerate(iter_audio_windows(audio_path, CHUNK_LENGTH_MS))
+        )
+    chunks = METRICS.timed_iter("decode", chunks)
+    stage_stats = stage_stats if stage_stats is not None else []
+    if pipelined:
+        results = run_pipelined(chunks, stages, queue_size=queue_size, stats=stage_stats)
+    else:
+        results = run_sequential(chunks, stages, stats=stage_stats)
 
-# ------------------ SPLIT AUDIO ------------------
+    for i, offset_map, segments, turns, labels, embeddings in results:
+        if clustering is not None:
+            clustering.add_chunk(i, labels, embeddings)
+            pending.append((i, segments, turns, offset_map))
+        else:
+            all_segments.extend(to_recording_time(
+                assign_speakers(segments, turns, split_on_speaker_change=split_on_speaker_change), offset_map
+            ))
 
-print("🎧 Loading audio and splitting into 5-minute chunks...")
-audio = AudioSegment.from_file(audio_path)
-duration_ms = len(audio)
-chunk_count = (duration_ms + CHUNK_LENGTH_MS - 1) // CHUNK_LENGTH_MS
-print(f"🕒 Total duration: {duration_ms / 60000:.2f} min | Chunks: {chunk_count}")
+    print("📊 Stage stats:\n" + format_stage_stats(stage_stats))
+    if chunker is not None:
+        print(chunker.summary())
+    if cache is not None:
+        print(cache.summary())
 
-all_segments = []
+    if clustering is not None:
+        print(f"🧩 Clustering {len(clustering.keys)} chunk speaker(s) across the whole recording...")
+        mapping = clustering.cluster()
+        print(f"👥 Found {len(set(mapping.values()))} speaker(s)")
+        for i, segments, turns, offset_map in pending:
+            all_segments.extend(to_recording_time(assign_speakers(
+                segments, relabel_turns(turns, i, mapping), split_on_speaker_change=split_on_speaker_change
+            ), offset_map))
 
-for i in range(chunk_count):
-    chunk_start_ms = i * CHUNK_LENGTH_MS
-    chunk = audio[chunk_start_ms:chunk_start_ms + CHUNK_LENGTH_MS]
+    all_segments.sort(key=lambda x: x[0])
+    return all_segments
 
-    with NamedTemporaryFile(suffix=".wav", delete=False) as chunk_wav:
-        
-        chunk.set_channels(1).set_frame_rate(16000).export(chunk_wav.name, format="wav")
-        chunk_path = chunk_wav.name
+def to_recording_time(assigned, offset_map):
+    return [
+        (offset_map.to_global(start), offset_map.to_global(end, is_end=True), speaker, text)
+        for start, end, speaker, text in assigned
+    ]
 
-    print(f"🧠 Chunk {i+1}/{chunk_count}: Performing speaker diarization...")
-    diarization = pipeline(chunk_path)
+def format_transcript(segments):
+    output_lines = [
+        f"{speaker} [{start:.2f} - {end:.2f}]: {text}"
+        for start, end, speaker, text in segments
+    ]
+    return "\n".join(output_lines)
 
-    print(f"✍️ Chunk {i+1}/{chunk_count}: Transcribing with Whisper...")
-    whisper_result = whisper_model.transcribe(chunk_path, language="en", fp16=False)
-    segments = whisper_result["segments"]
+# ------------------ MAIN ------------------
 
-    for segment in segments:
-        start = segment["start"]
-        end = segment["end"]
-        text = segment["text"]
-        global_start = chunk_start_ms / 1000 + start
-        global_end = chunk_start_ms / 1000 + end
+def main(filename, split_on_speaker_change=False, global_speakers=False, cluster_threshold=DEFAULT_CLUSTER_THRESHOLD,
+         pipelined=False, queue_size=2, asr_threads=None, diarization_threads=None, vad=False,
+         use_cache=True, server=None, asr_backend=DEFAULT_ASR_BACKEND):
+    print(f"🔍 Searching for '{filename}' inside '{INPUT_DIR}'...")
+    audio_path = find_file(filename, INPUT_DIR)
 
-        diarization_seg = Segment(start, end)
-        speaker_label = diarization.crop(diarization_seg).labels()
+    if audio_path is None or not audio_path.exists():
+        print(f"❌ File not found: {INPUT_DIR / filename}")
+        sys.exit(1)
 
-        assigned_speaker = speaker_label[0] if speaker_label else "Unknown"
+    print(f"✅ Found audio file at: {audio_path}")
 
-        all_segments.append((global_start, global_end, assigned_speaker, text.strip()))
+    base_name = audio_path.stem
 
-    # Clean up temporary chunk file
-    os.remove(chunk_path)
+    client = service_client.connect(server)
+    if client is not None:
+        # The service already has Whisper and pyannote loaded
+        print(f"🛰️ Sending to the inference service at {client.address}...")
+        transcript = client.run("transcribe", {
+            "audio_path": str(audio_path.resolve()), "split_speakers": split_on_speaker_change,
+            "global_speakers": global_speakers, "cluster_threshold": cluster_threshold, "pipelined": pipelined,
+            "vad": vad, "use_cache": use_cache,
+        }, name=base_name)["transcript"]
+    else:
+        if pipelined:
+            asr_threads, diarization_threads = thread_budget(asr_threads, diarization_threads)
+        whisper_model, pipeline = load_models(asr_threads, diarization_threads, asr_backend)
+        try:
+            all_segments = transcribe_diarized(
+                audio_path, whisper_model, pipeline, split_on_speaker_change,
+                global_speakers=global_speakers, cluster_threshold=cluster_threshold,
+                pipelined=pipelined, queue_size=queue_size, vad=vad, cache=ChunkCache() if use_cache else None,
+                asr_backend=asr_backend
+            )
+        finally:
+            close_asr(whisper_model)
+        transcript = format_transcript(all_segments)
 
-# ------------------ SAVE OUTPUT ------------------
+    print("🗾 Saving final diarized transcript...")
+    output_path = OUTPUT_DIR / f"{base_name}_diarized.txt"
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(transcript)
+    write_columnar(parse_transcript(transcript), columnar_path(output_path))
 
-print("🗾 Saving final diarized transcript...")
-all_segments.sort(key=lambda x: x[0])
+    index_outputs([output_path], meeting_date=audio_path.stat().st_mtime)
+    print(f"✅ Done! Diarized transcript saved to: {output_path}")
+    METRICS.export(run_id(base_name))
 
-output_lines = [
-    f"{speaker} [{start:.2f} - {end:.2f}]: {text}"
-    for start, end, speaker, text in all_segments
-]
+# ------------------ ENTRY ------------------
 
-output_path = OUTPUT_DIR / f"{base_name}_diarized.txt"
-with open(output_path, "w", encoding="utf-8") as f:
-    f.write("\n".join(output_lines))
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Transcribe and diarize an audio file in chunks.")
+    parser.add_argument("filename", help="Audio filename inside input/audio")
+    parser.add_argument("--split-speakers", action="store_true",
+                        help="Split Whisper segments at speaker changes using word timestamps")
+    parser.add_argument("--global-speakers", action="store_true",
+                        help="Cluster speaker embeddings once over the whole recording for consistent labels")
+    parser.add_argument("--cluster-threshold", type=float, default=DEFAULT_CLUSTER_THRESHOLD,
+                        help="Distance threshold for --global-speakers clustering")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="Overlap decode, diarization and Whisper across chunks with bounded queues")
+    parser.add_argument("--queue-size", type=int, default=2, help="Max chunks waiting between pipelined stages")
+    parser.add_argument("--asr-threads", type=int, help="Torch threads for Whisper (own process; default: half the cores)")
+    parser.add_argument("--diarization-threads", type=int, help="Torch threads for pyannote (default: the other half)")
+    parser.add_argument("--vad", action="store_true",
+                        help="Skip non-speech and cut chunks at pauses near the target length")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Recompute every chunk instead of reusing cached Whisper / pyannote results")
+    parser.add_argument("--asr-backend", choices=ASR_BACKENDS, default=DEFAULT_ASR_BACKEND,
+                        help="whisper (fp32), whisper-int8 (dynamically quantized) or faster-whisper (CTranslate2 int8); "
+                             "with --server, the service's own backend is used")
+    parser.add_argument("--server", help=f"Run on a warm inference service (default: ${service_client.SERVER_ENV})")
+    args = parser.parse_args()
 
-print(f"✅ Done! Diarized transcript saved to: {output_path}")
+    main(args.filename, split_on_speaker_change=args.split_speakers,
+         global_speakers=args.global_speakers, cluster_threshold=args.cluster_threshold,
+         pipelined=args.pipelined, queue_size=args.queue_size,
+         asr_threads=args.asr_threads, diarization_threads=args.diarization_threads, vad=args.vad,
+         use_cache=not args.no_cache, server=args.server, asr_backend=args.asr_backend)
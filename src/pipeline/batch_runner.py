@@ -0,0 +1,307 @@
+# src/pipeline/batch_runner.py
+
+import os
+import sys
+import json
+import hashlib
+import logging
+import argparse
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.asr_backends import ASR_BACKENDS, DEFAULT_ASR_BACKEND
+from common.columnar_transcript import columnar_path
+from common.completion_cache import log_cache_stats
+from common.llm import MODEL_PATH
+from common.llm_process import LlamaPool, PooledLlama
+from common.metrics import METRICS, recording, run_id, span
+from common.search_index import index_outputs
+from action_extraction import structured_actions
+from report import export_pdf
+from pipeline.run_pipeline import (
+    MeetingPipeline, actions_path, diarization, report_timings, save_transcript, summary_path, transcript_path
+)
+
+# ------------------ CONFIG ------------------
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+AUDIO_DIR = diarization.INPUT_DIR
+MANIFEST_PATH = BASE_DIR / "output" / "batch_manifest.json"
+AUDIO_EXTENSIONS = {".wav", ".mp3", ".m4a", ".flac", ".ogg", ".opus", ".mp4", ".webm"}
+
+log = logging.getLogger(__name__)
+
+# ------------------ HASHING ------------------
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def combined_hash(*parts):
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+# ------------------ MANIFEST ------------------
+
+class Manifest:
+    # {recording: {"audio": {size, mtime_ns, sha256}, "stages": {stage: {input, outputs, finished_at}}}}
+    # A stage counts as done while its input hash is unchanged and its outputs still hash the
+    # same. The file is rewritten atomically after every stage, so a crash loses at most the
+    # stage that was running.
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.data = json.loads(self.path.read_text(encoding="utf-8")) if self.path.exists() else {}
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.data, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def audio_hash(self, key, audio_path):
+        # Hashing hundreds of MB of audio on every restart is avoidable: reuse the stored hash
+        # while size and mtime are unchanged
+        st = audio_path.stat()
+        with self.lock:
+            known = self.data.get(key, {}).get("audio", {})
+        if known.get("size") == st.st_size and known.get("mtime_ns") == st.st_mtime_ns:
+            return known["sha256"]
+        sha256 = file_hash(audio_path)
+        with self.lock:
+            self.data.setdefault(key, {})["audio"] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": sha256}
+            self._save()
+        return sha256
+
+    def is_done(self, key, stage, input_hash):
+        with self.lock:
+            entry = self.data.get(key, {}).get("stages", {}).get(stage)
+        if not entry or entry.get("input") != input_hash:
+            return False
+        return all(Path(p).exists() and file_hash(p) == h for p, h in entry["outputs"].items())
+
+    def mark_done(self, key, stage, input_hash, outputs):
+        entry = {
+            "input": input_hash,
+            "outputs": {str(p): file_hash(p) for p in outputs},
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        with self.lock:
+            self.data.setdefault(key, {}).setdefault("stages", {})[stage] = entry
+            self._save()
+
+    def mark_failed(self, key, stage, error):
+        with self.lock:
+            self.data.setdefault(key, {})["failed"] = {"stage": stage, "error": error}
+            self._save()
+
+    def clear_failure(self, key):
+        with self.lock:
+            if self.data.get(key, {}).pop("failed", None) is not None:
+                self._save()
+
+# ------------------ RUNNER ------------------
+
+class BatchRunner:
+    # Each recording walks transcribe -> summarize -> actions -> pdf. Up to `jobs` recordings
+    # are in flight, while per-stage limits keep the heavy stages from oversubscribing the
+    # CPU. The pipeline itself never lets two threads into one in-process model, so more than
+    # one LLM job at a time needs a pool of LLM processes (see __main__). With the defaults one
+    # recording is being transcribed while another is in the LLM stages.
+
+    def __init__(self, pipeline: MeetingPipeline, manifest: Manifest, jobs=2, asr_jobs=1, llm_jobs=1, pdf_jobs=2, force=False):
+        self.pipeline = pipeline
+        self.manifest = manifest
+        self.jobs = jobs
+        self.force = force
+        # Summaries and action items run on the same Llama, so they share one limit
+        llm_limit = threading.Semaphore(llm_jobs)
+        self.limits = {
+            "transcribe": threading.Semaphore(asr_jobs),
+            "summarize": llm_limit,
+            "actions": llm_limit,
+            "pdf": threading.Semaphore(pdf_jobs),
+        }
+
+    def _stage(self, key, name, input_hash, fn, outputs_of, meeting_date=None):
+        if not self.force and self.manifest.is_done(key, name, input_hash):
+            log.info(f"⏭️ {key}: {name} already done")
+            return
+        with self.limits[name], span(f"batch:{name}"):
+            fn()
+        outputs = outputs_of()
+        self.manifest.mark_done(key, name, input_hash, outputs)
+        index_outputs(outputs, meeting_date)
+
+    def process(self, audio_path: Path):
+        key = str(audio_path.relative_to(AUDIO_DIR))
+        base_name = audio_path.stem
+        timings = {}
+        settings = {
+            "split_speakers": self.pipeline.split_speakers,
+            "global_speakers": self.pipeline.global_speakers,
+            "vad": self.pipeline.vad,
+        }
+        if self.pipeline.asr_backend != DEFAULT_ASR_BACKEND:
+            # Only named when not the default, so existing manifests stay valid
+            settings["asr_backend"] = self.pipeline.asr_backend
+        meeting_date = audio_path.stat().st_mtime   # what search's date filters go by
+        self.manifest.clear_failure(key)
+        current = None
+        try:
+            current = "transcribe"
+            transcript_file = transcript_path(base_name)
+            self._stage(
+                key, "transcribe", combined_hash(self.manifest.audio_hash(key, audio_path), settings),
+                lambda: save_transcript(base_name, self.pipeline.transcribe(audio_path, timings)),
+                lambda: [transcript_file, columnar_path(transcript_file)], meeting_date,
+            )
+            transcript_hash = file_hash(transcript_file)
+
+            current = "summarize"
+            summary_file = summary_path(base_name)
+            self._stage(
+                key, "summarize", combined_hash(transcript_hash),
+                lambda: summary_file.write_text(
+                    self.pipeline.summarize(transcript_file.read_text(encoding="utf-8"), timings), encoding="utf-8"
+                ),
+                lambda: [summary_file], meeting_date,
+            )
+
+            current = "actions"
+            actions_file = actions_path(base_name)
+            jsonl_file = actions_file.with_suffix(".jsonl")
+
+            def extract():
+                actions, action_items = self.pipeline.extract_actions(transcript_file.read_text(encoding="utf-8"), timings)
+                actions_file.write_text(actions, encoding="utf-8")
+                if action_items is not None:
+                    structured_actions.write_jsonl(action_items, jsonl_file)
+
+            self._stage(
+                key, "actions", combined_hash(transcript_hash, {"json_actions": self.pipeline.json_actions}),
+                extract,
+                lambda: [actions_file] + ([jsonl_file] if self.pipeline.json_actions else []), meeting_date,
+            )
+
+            current = "pdf"
+            pdf_inputs = [summary_file, actions_file] + ([jsonl_file] if self.pipeline.json_actions else [])
+            self._stage(
+                key, "pdf", combined_hash(*[file_hash(p) for p in pdf_inputs]),
+                lambda: export_pdf.export_to_pdf(
+                    base_name,
+                    summary=summary_file.read_text(encoding="utf-8"),
+                    actions=actions_file.read_text(encoding="utf-8"),
+                    action_items=structured_actions.read_jsonl(jsonl_file) if self.pipeline.json_actions else None,
+                ),
+                lambda: [export_pdf.OUTPUT_DIR / f"{base_name}_report.pdf"],
+            )
+        except Exception as e:
+            log.exception(f"❌ {key}: {current} failed")
+            self.manifest.mark_failed(key, current, repr(e))
+            return False
+
+        if timings:
+            log.info(f"✅ {key} done")
+            report_timings(timings)
+        return True
+
+    def process_recording(self, audio_path: Path):
+        with recording(audio_path.stem):
+            return self.process(audio_path)
+
+    def run(self, audio_paths):
+        # Outputs are named by file stem, so two recordings with the same stem in different
+        # folders would overwrite each other's transcript, summary, actions and PDF
+        clashes = duplicate_stems(audio_paths)
+        if clashes:
+            raise ValueError("recordings share a name: " + "; ".join(
+                ", ".join(str(p.relative_to(AUDIO_DIR)) for p in paths) for paths in clashes
+            ))
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            results = list(pool.map(self.process_recording, audio_paths))
+        return results
+
+def duplicate_stems(audio_paths):
+    by_stem = {}
+    for path in audio_paths:
+        by_stem.setdefault(path.stem, []).append(path)
+    return [paths for paths in by_stem.values() if len(paths) > 1]
+
+def scan_audio(directory=AUDIO_DIR):
+    return sorted(p for p in directory.rglob("*") if p.is_file() and p.suffix.lower() in AUDIO_EXTENSIONS)
+
+# ------------------ ENTRY ------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process every recording in input/audio, resuming at the first incomplete stage.")
+    parser.add_argument("--jobs", type=int, default=2, help="Recordings in flight at once")
+    parser.add_argument("--asr-jobs", type=int, default=1, help="Recordings transcribed at once")
+    parser.add_argument("--llm-jobs", type=int, default=1,
+                        help="Recordings in the LLM stages at once (above 1: one LLM worker process each)")
+    parser.add_argument("--pdf-jobs", type=int, default=2, help="PDFs built at once")
+    parser.add_argument("--force", action="store_true", help="Re-run every stage, ignoring the manifest")
+    parser.add_argument("--split-speakers", action="store_true",
+                        help="Split Whisper segments at speaker changes using word timestamps")
+    parser.add_argument("--global-speakers", action="store_true",
+                        help="Cluster speaker embeddings once over the whole recording for consistent labels")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="Overlap decode, diarization and Whisper across chunks (separate thread budgets)")
+    parser.add_argument("--vad", action="store_true",
+                        help="Skip non-speech and cut chunks at pauses near the target length")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Recompute everything instead of reusing cached Whisper / pyannote results and LLM completions")
+    parser.add_argument("--json-actions", action="store_true",
+                        help="Extract action items as grammar-constrained JSON (saved as JSONL, rendered structured in the PDF)")
+    parser.add_argument("--asr-backend", choices=ASR_BACKENDS, default=DEFAULT_ASR_BACKEND,
+                        help="whisper (fp32), whisper-int8 (dynamically quantized) or faster-whisper (CTranslate2 int8)")
+    args = parser.parse_args()
+
+    if args.asr_jobs != 1:
+        log.warning("⚠️ Whisper and pyannote are loaded once and serve one recording at a time; --asr-jobs is capped at 1")
+        args.asr_jobs = 1
+
+    audio_paths = scan_audio()
+    if not audio_paths:
+        log.error(f"❌ No audio files found in {AUDIO_DIR}")
+        sys.exit(1)
+    if not MODEL_PATH.exists():
+        log.error(f"❌ Model not found: {MODEL_PATH}")
+        sys.exit(1)
+
+    log.info(f"📂 {len(audio_paths)} recording(s) in {AUDIO_DIR}")
+    meeting_pipeline = MeetingPipeline(
+        split_speakers=args.split_speakers, global_speakers=args.global_speakers, pipelined=args.pipelined,
+        vad=args.vad, use_cache=not args.no_cache, json_actions=args.json_actions, asr_backend=args.asr_backend
+    )
+    llm_pool = None
+    if args.llm_jobs > 1:
+        # One llama.cpp process per LLM job, sharing the mmap'd weights
+        llm_pool = LlamaPool(args.llm_jobs, use_cache=not args.no_cache)
+        meeting_pipeline.llm = PooledLlama(llm_pool)
+    runner = BatchRunner(
+        meeting_pipeline, Manifest(), jobs=args.jobs, asr_jobs=args.asr_jobs,
+        llm_jobs=args.llm_jobs, pdf_jobs=args.pdf_jobs, force=args.force
+    )
+    try:
+        results = runner.run(audio_paths)
+    except ValueError as e:
+        log.error(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        meeting_pipeline.close()
+        if llm_pool is not None:
+            llm_pool.close()
+    if meeting_pipeline.llm is not None:
+        log_cache_stats(meeting_pipeline.llm)
+    METRICS.export(run_id("batch"))
+
+    failed = results.count(False)
+    log.info(f"🏁 {len(results) - failed} recording(s) complete, {failed} failed (manifest: {MANIFEST_PATH})")
+    sys.exit(1 if failed else 0)
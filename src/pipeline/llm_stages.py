@@ -0,0 +1,43 @@
+# src/pipeline/llm_stages.py
+
+import sys
+import logging
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.llm import complete_with_shared_prefix, token_counter, transcript_block
+from summarization import summarize_diarized
+from action_extraction import extract_actions_diarized
+
+log = logging.getLogger(__name__)
+
+# ------------------ SHARED-PREFIX LLM STAGE ------------------
+
+def summarize_and_extract(transcript, llm, stats=None):
+    # Both tasks see the same chunk, so run them back to back on one evaluated transcript prefix.
+    # Chunks leave room for the longer of the two instructions.
+    count_tokens = token_counter()
+    instructions = [summarize_diarized.SUMMARY_INSTRUCTION, extract_actions_diarized.ACTIONS_INSTRUCTION]
+    chunks = summarize_diarized.split_chunks(transcript, count_tokens, instruction=max(instructions, key=count_tokens))
+    log.info(f"✂️ Split transcript into {len(chunks)} chunk(s)")
+
+    summaries, action_items = [], []
+    for idx, chunk in enumerate(chunks):
+        log.info(f"🔗 Summarizing + extracting chunk {idx + 1}/{len(chunks)}...")
+        summary_response, actions_response = complete_with_shared_prefix(
+            llm, transcript_block(chunk),
+            instructions, max_tokens=summarize_diarized.MAX_TOKENS, stats=stats
+        )
+        summaries.append(summarize_diarized.format_chunk_summary(idx, summary_response))
+        action_items.append(extract_actions_diarized.format_chunk_actions(idx, actions_response))
+
+    return "\n".join(summaries), "\n".join(action_items)
+
+def report_prompt_stats(stats):
+    if not stats.get("prompt_tokens"):
+        return
+    saved = stats["prompt_tokens"] - stats["evaluated_tokens"]
+    log.info(
+        f"🧮 Prompt tokens: {stats['prompt_tokens']} | evaluated: {stats['evaluated_tokens']} "
+        f"| reused from KV cache: {saved} ({saved / stats['prompt_tokens']:.0%})"
+    )
@@ -0,0 +1,259 @@
+# src/pipeline/run_pipeline.py
+
+import sys
+import time
+import logging
+import threading
+import argparse
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.asr_backends import ASR_BACKENDS, DEFAULT_ASR_BACKEND
+from common.asr_process import close_asr
+from common.chunk_cache import ChunkCache
+from common.columnar_transcript import columnar_path, parse_transcript, write_columnar
+from common.completion_cache import log_cache_stats
+from common.llm import MODEL_PATH, load_llm
+from common.metrics import METRICS, recording, run_id, span
+from common.search_index import index_outputs
+from diarization import transcribe_diarized_chunked as diarization
+from diarization.global_speakers import DEFAULT_CLUSTER_THRESHOLD
+from summarization import summarize_diarized
+from action_extraction import extract_actions_diarized, structured_actions
+from report import export_pdf
+from pipeline.llm_stages import report_prompt_stats, summarize_and_extract
+from service import client as service_client
+
+# ------------------ LOGGING ------------------
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+log = logging.getLogger(__name__)
+
+# ------------------ STAGE TIMING ------------------
+
+@contextmanager
+def stage(name, timings):
+    log.info(f"▶️ {name}...")
+    start = time.perf_counter()
+    try:
+        with span(f"stage:{name}"):
+            yield
+    finally:
+        timings[name] = time.perf_counter() - start
+        log.info(f"⏱️ {name} took {timings[name]:.1f}s")
+
+def report_timings(timings):
+    width = max(len(name) for name in timings)
+    total = sum(timings.values())
+    lines = [f"{name:<{width}}  {seconds:8.1f}s" for name, seconds in timings.items()]
+    lines.append(f"{'total':<{width}}  {total:8.1f}s")
+    log.info("📊 Stage wall times:\n" + "\n".join(lines))
+
+# ------------------ PIPELINE ------------------
+
+class MeetingPipeline:
+    # Models are loaded on first use and then reused for every recording
+
+    def __init__(self, shared_prefix=False, split_speakers=False, global_speakers=False, pipelined=False, vad=False,
+                 use_cache=True, json_actions=False, asr_backend=DEFAULT_ASR_BACKEND,
+                 cluster_threshold=DEFAULT_CLUSTER_THRESHOLD):
+        self.shared_prefix = shared_prefix
+        self.split_speakers = split_speakers
+        self.global_speakers = global_speakers
+        self.cluster_threshold = cluster_threshold
+        self.pipelined = pipelined
+        self.vad = vad
+        self.use_cache = use_cache
+        self.json_actions = json_actions
+        self.asr_backend = asr_backend
+        self.chunk_cache = ChunkCache() if use_cache else None
+        self.whisper_model = None
+        self.diarization_pipeline = None
+        self.llm = None
+        self.count_tokens = None   # default: the model's own tokenizer
+        self.asr_lock = threading.Lock()
+        self.llm_lock = threading.Lock()
+        # Held while a model runs: one in-process Whisper / pyannote / Llama can't serve two
+        # threads at once (a llama.cpp context has a single KV cache)
+        self.asr_busy = threading.Lock()
+        self.llm_busy = threading.Lock()
+
+    def asr_models(self, timings):
+        with self.asr_lock:
+            if self.whisper_model is None:
+                with stage("load whisper + pyannote", timings):
+                    budget = diarization.thread_budget() if self.pipelined else (None, None)
+                    self.whisper_model, self.diarization_pipeline = diarization.load_models(*budget, self.asr_backend)
+        return self.whisper_model, self.diarization_pipeline
+
+    def language_model(self, timings):
+        with self.llm_lock:
+            if self.llm is None:
+                with stage("load llm", timings):
+                    self.llm = load_llm(use_cache=self.use_cache)
+        return self.llm
+
+    def close(self):
+        # Stops Whisper's worker process when it was loaded with a thread budget (--pipelined)
+        with self.asr_lock:
+            close_asr(self.whisper_model)
+            self.whisper_model = None
+
+    def llm_guard(self, llm):
+        # A pool of worker processes takes concurrent calls; anything else is used one thread at a time
+        return nullcontext() if getattr(llm, "thread_safe", False) else self.llm_busy
+
+    # Single steps, shared by run() and the batch runner
+
+    def transcribe(self, audio_path: Path, timings):
+        whisper_model, pipeline = self.asr_models(timings)
+        with self.asr_busy, stage("transcribe + diarize", timings):
+            segments = diarization.transcribe_diarized(
+                audio_path, whisper_model, pipeline, self.split_speakers,
+                global_speakers=self.global_speakers, cluster_threshold=self.cluster_threshold,
+                pipelined=self.pipelined, vad=self.vad,
+                cache=self.chunk_cache, asr_backend=self.asr_backend
+            )
+            return diarization.format_transcript(segments)
+
+    def summarize(self, transcript, timings, stats=None):
+        llm = self.language_model(timings)
+        with self.llm_guard(llm), stage("summarize", timings):
+            return summarize_diarized.summarize_transcript(transcript, llm, stats=stats, count_tokens=self.count_tokens)
+
+    def extract_actions(self, transcript, timings, stats=None):
+        # (text, structured items or None)
+        llm = self.language_model(timings)
+        with self.llm_guard(llm), stage("extract actions", timings):
+            if self.json_actions:
+                action_items = extract_actions_diarized.extract_action_items_json(transcript, llm, self.count_tokens)
+                return structured_actions.format_action_items(action_items), action_items
+            return extract_actions_diarized.extract_actions_diarized(
+                transcript, llm, stats=stats, count_tokens=self.count_tokens
+            ), None
+
+    def run(self, audio_path: Path):
+        timings = {}
+        base_name = audio_path.stem
+
+        transcript = self.transcribe(audio_path, timings)
+
+        prompt_stats = {}
+        if self.shared_prefix and not self.json_actions:
+            llm = self.language_model(timings)
+            with self.llm_guard(llm), stage("summarize + extract actions", timings):
+                summary, actions = summarize_and_extract(transcript, llm, stats=prompt_stats)
+            action_items = None
+        else:
+            summary = self.summarize(transcript, timings, stats=prompt_stats)
+            actions, action_items = self.extract_actions(transcript, timings, stats=prompt_stats)
+        report_prompt_stats(prompt_stats)
+        log_cache_stats(self.llm)
+
+        with stage("save outputs", timings):
+            save_transcript(base_name, transcript)
+            summary_path(base_name).write_text(summary, encoding="utf-8")
+            actions_path(base_name).write_text(actions, encoding="utf-8")
+            if action_items is not None:
+                structured_actions.write_jsonl(action_items, actions_path(base_name).with_suffix(".jsonl"))
+            index_outputs(output_paths(base_name), meeting_date=audio_path.stat().st_mtime)
+
+        with stage("export pdf", timings):
+            export_pdf.export_to_pdf(base_name, summary=summary, actions=actions, action_items=action_items)
+
+        report_timings(timings)
+        return timings
+
+def transcript_path(base_name):
+    return diarization.OUTPUT_DIR / f"{base_name}_diarized.txt"
+
+def save_transcript(base_name, transcript):
+    # Text for reading, columns (.cols) for time-range / per-speaker lookups
+    transcript_path(base_name).write_text(transcript, encoding="utf-8")
+    write_columnar(parse_transcript(transcript), columnar_path(transcript_path(base_name)))
+
+def summary_path(base_name):
+    return summarize_diarized.OUTPUT_DIR / f"{base_name}_summary.txt"
+
+def actions_path(base_name):
+    return extract_actions_diarized.OUTPUT_DIR / f"{base_name}_action_items.txt"
+
+def output_paths(base_name):
+    # Everything the search index covers; files that weren't written are skipped
+    return [transcript_path(base_name), summary_path(base_name), actions_path(base_name),
+            actions_path(base_name).with_suffix(".jsonl")]
+
+# ------------------ ENTRY ------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run audio → diarized transcript → summary → action items → PDF in one process.")
+    parser.add_argument("filenames", nargs="+", help="Audio filename(s) inside input/audio")
+    parser.add_argument("--shared-prefix", action="store_true",
+                        help="Summarize and extract actions per chunk on one evaluated transcript prefix "
+                             "(llama.cpp KV reuse; not with --json-actions)")
+    parser.add_argument("--split-speakers", action="store_true",
+                        help="Split Whisper segments at speaker changes using word timestamps")
+    parser.add_argument("--global-speakers", action="store_true",
+                        help="Cluster speaker embeddings once over the whole recording for consistent labels")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="Overlap decode, diarization and Whisper across chunks (separate thread budgets)")
+    parser.add_argument("--vad", action="store_true",
+                        help="Skip non-speech and cut chunks at pauses near the target length")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Recompute everything instead of reusing cached Whisper / pyannote results and LLM completions")
+    parser.add_argument("--json-actions", action="store_true",
+                        help="Extract action items as grammar-constrained JSON (saved as JSONL, rendered structured in the PDF)")
+    parser.add_argument("--asr-backend", choices=ASR_BACKENDS, default=DEFAULT_ASR_BACKEND,
+                        help="whisper (fp32), whisper-int8 (dynamically quantized) or faster-whisper (CTranslate2 int8); "
+                             "with --server, the service's own backend is used")
+    parser.add_argument("--server", help=f"Run on a warm inference service (default: ${service_client.SERVER_ENV})")
+    args = parser.parse_args()
+    if args.shared_prefix and args.json_actions:
+        # The JSON extraction runs its own grammar-constrained prompts, so nothing would share the prefix
+        parser.error("--shared-prefix can't be combined with --json-actions")
+
+    audio_paths = []
+    for filename in args.filenames:
+        audio_path = diarization.find_file(filename, diarization.INPUT_DIR)
+        if audio_path is None:
+            log.error(f"❌ File not found: {diarization.INPUT_DIR / filename}")
+            sys.exit(1)
+        audio_paths.append(audio_path)
+
+    client = service_client.connect(args.server)
+    unsupported = service_client.local_only(client, shared_prefix=args.shared_prefix, no_cache=args.no_cache)
+    if unsupported:
+        log.error(f"❌ {', '.join(unsupported)} can't be used with the inference service at {client.address}; "
+                  f"run without --server / ${service_client.SERVER_ENV}")
+        sys.exit(1)
+    if client is not None:
+        # Models stay loaded in the service; this process only sends paths and options
+        for audio_path in audio_paths:
+            log.info(f"🛰️ Sending {audio_path.name} to the inference service at {client.address}...")
+            result = client.run("pipeline", {
+                "audio_path": str(audio_path.resolve()), "split_speakers": args.split_speakers,
+                "global_speakers": args.global_speakers, "pipelined": args.pipelined, "vad": args.vad,
+                "json_actions": args.json_actions,
+            }, name=audio_path.stem)
+            log.info(f"✅ Report saved to: {result['pdf_path']}")
+        sys.exit(0)
+
+    if not MODEL_PATH.exists():
+        log.error(f"❌ Model not found: {MODEL_PATH}")
+        sys.exit(1)
+
+    meeting_pipeline = MeetingPipeline(
+        shared_prefix=args.shared_prefix, split_speakers=args.split_speakers,
+        global_speakers=args.global_speakers, pipelined=args.pipelined, vad=args.vad,
+        use_cache=not args.no_cache, json_actions=args.json_actions, asr_backend=args.asr_backend
+    )
+    try:
+        for audio_path in audio_paths:
+            log.info(f"🎬 Processing: {audio_path.name}")
+            with recording(audio_path.stem):
+                meeting_pipeline.run(audio_path)
+            METRICS.export(run_id(audio_path.stem))
+            METRICS.reset()
+    finally:
+        meeting_pipeline.close()
@@ -1,64 +1,145 @@
 # src/pdf/export_pdf.py
 
+import os
 import sys
+import json
+import time
+import argparse
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+from xml.sax.saxutils import escape
 from pathlib import Path
 from reportlab.lib.pagesizes import A4
 from reportlab.platypus import (
     SimpleDocTemplate, Paragraph, Spacer, HRFlowable,
-    ListFlowable, ListItem
+    ListFlowable, ListItem, PageBreak
 )
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import cm
 from reportlab.lib.enums import TA_CENTER
 from reportlab.lib import colors
+from reportlab.pdfbase import pdfmetrics
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.transcript_lines import LINE
+from common.metrics import METRICS, peak_rss_mb, run_id, span
 
 # -------------------- PATH SETUP --------------------
 
 BASE_DIR = Path(__file__).resolve().parents[2]  
 SUMMARY_DIR = BASE_DIR / "output" / "summary"
+DIARIZED_SUMMARY_DIR = BASE_DIR / "output" / "summaries"
 ACTIONS_DIR = BASE_DIR / "output" / "action_items"
+TRANSCRIPT_DIR = BASE_DIR / "output" / "diarized_transcripts"
 OUTPUT_DIR = BASE_DIR / "output" / "reports"
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+APPENDIX_BATCH = 40   # transcript turns turned into flowables at a time, about a page
 
 # -------------------- Load Text --------------------
 
 def load_text(path):
     return path.read_text(encoding="utf-8") if path.exists() else "[Not Found]"
 
+def load_action_items(path, text_path):
+    # Structured items ({task, owner, deadline, source_time} per line), unless a later
+    # free-text extraction replaced them
+    if not path.exists() or (text_path.exists() and text_path.stat().st_mtime > path.stat().st_mtime):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def format_action_item(item):
+    minutes, seconds = divmod(int(item.get("source_time", 0)), 60)
+    text = f"<b>{escape(item['task'])}</b> — {escape(item.get('owner') or 'Unassigned')}"
+    if item.get("deadline"):
+        text += f" · due {escape(item['deadline'])}"
+    return text + f' <font color="grey">({minutes:02d}:{seconds:02d})</font>'
+
+def summary_file(audio_name):
+    # The distilBART summary, or the diarized one the pipeline writes
+    for directory in (SUMMARY_DIR, DIARIZED_SUMMARY_DIR):
+        path = directory / f"{audio_name}_summary.txt"
+        if path.exists():
+            return path
+    return SUMMARY_DIR / f"{audio_name}_summary.txt"
+
+def transcript_flowables(path, style):
+    # One paragraph per speaker turn, read from the file as the document asks for them
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            match = LINE.match(line.strip())
+            if not match:
+                continue
+            minutes, seconds = divmod(int(float(match["start"])), 60)
+            yield Paragraph(
+                f'<font color="#2A6592"><b>{escape(match["speaker"])}</b></font> '
+                f'<font color="grey">{minutes:02d}:{seconds:02d}</font> {escape(match["text"])}', style
+            )
+
+def feed_in_batches(doc, flowables, source, batch=APPENDIX_BATCH):
+    # reportlab drops each flowable from the list once it is laid out; top the list up from
+    # `source` as it runs low, so a 3-hour transcript never exists as flowables all at once
+    def on_progress(kind, value):
+        if kind == "PROGRESS" and len(flowables) < batch:
+            flowables.extend(islice(source, batch))
+    doc.setProgressCallBack(on_progress)
+
+# -------------------- Styles --------------------
+
+@lru_cache(maxsize=None)
+def report_styles():
+    # Built once per process and shared by every report it renders
+    styles = getSampleStyleSheet()
+    return {
+        "normal": styles['Normal'],
+        "title": ParagraphStyle(
+            name='TitleCenter', parent=styles['Title'],
+            alignment=TA_CENTER, fontSize=18, spaceAfter=14
+        ),
+        "timestamp": ParagraphStyle(
+            name='Timestamp', parent=styles['Normal'],
+            fontSize=9, textColor=colors.grey, alignment=TA_CENTER
+        ),
+        "heading": ParagraphStyle(
+            name='SectionHeading', parent=styles['Heading2'],
+            textColor=colors.HexColor("#2A6592"), spaceBefore=12, spaceAfter=6
+        ),
+        "bullet": ParagraphStyle(
+            name='BulletPoint', parent=styles['Normal'],
+            leftIndent=18, bulletIndent=6, spaceBefore=4, spaceAfter=4
+        ),
+        "transcript": ParagraphStyle(
+            name='TranscriptLine', parent=styles['Normal'],
+            fontSize=8.5, leading=11, spaceAfter=2
+        ),
+    }
+
 # -------------------- PDF Builder --------------------
 
-def export_to_pdf(audio_name):
-    summary_path = SUMMARY_DIR / f"{audio_name}_summary.txt"
+def export_to_pdf(audio_name, summary=None, actions=None, action_items=None, transcript_appendix=False):
+    summary_path = summary_file(audio_name)
     actions_path = ACTIONS_DIR / f"{audio_name}_action_items.txt"
+    transcript_path = TRANSCRIPT_DIR / f"{audio_name}_diarized.txt"
     output_path = OUTPUT_DIR / f"{audio_name}_report.pdf"
 
-    summary = load_text(summary_path)
-    actions = load_text(actions_path)
+    # Text passed in memory (e.g. from the end-to-end pipeline) skips the file lookup
+    if summary is None:
+        summary = load_text(summary_path)
+    if action_items is None and actions is None:
+        action_items = load_action_items(actions_path.with_suffix(".jsonl"), actions_path)
+    if actions is None and action_items is None:
+        actions = load_text(actions_path)
 
     doc = SimpleDocTemplate(str(output_path), pagesize=A4,
                             rightMargin=2*cm, leftMargin=2*cm,
                             topMargin=2*cm, bottomMargin=2*cm)
 
-    styles = getSampleStyleSheet()
-
-    # Custom Styles
-    title_style = ParagraphStyle(
-        name='TitleCenter', parent=styles['Title'],
-        alignment=TA_CENTER, fontSize=18, spaceAfter=14
-    )
-    timestamp_style = ParagraphStyle(
-        name='Timestamp', parent=styles['Normal'],
-        fontSize=9, textColor=colors.grey, alignment=TA_CENTER
-    )
-    heading_style = ParagraphStyle(
-        name='SectionHeading', parent=styles['Heading2'],
-        textColor=colors.HexColor("#2A6592"), spaceBefore=12, spaceAfter=6
-    )
-    bullet_style = ParagraphStyle(
-        name='BulletPoint', parent=styles['Normal'],
-        leftIndent=18, bulletIndent=6, spaceBefore=4, spaceAfter=4
-    )
+    styles = report_styles()
+    title_style, timestamp_style = styles["title"], styles["timestamp"]
+    heading_style, bullet_style = styles["heading"], styles["bullet"]
 
     elements = []
 
@@ -73,7 +154,7 @@ def export_to_pdf(audio_name):
     elements.append(Paragraph("📝 Summary", heading_style))
     for line in summary.strip().splitlines():
         if line.strip():
-            elements.append(Paragraph(line.strip(), styles['Normal']))
+            elements.append(Paragraph(line.strip(), styles['normal']))
     elements.append(Spacer(1, 0.6 * cm))
     elements.append(HRFlowable(color=colors.grey, thickness=0.5))
     elements.append(Spacer(1, 0.6 * cm))
@@ -81,22 +162,102 @@ def export_to_pdf(audio_name):
     # Action Items
     elements.append(Paragraph("📌 Action Items", heading_style))
     bullet_items = []
-    for line in actions.strip().splitlines():
-        if line.strip():
-            bullet_items.append(ListItem(Paragraph(line.strip(), bullet_style)))
+    if action_items is not None:
+        for item in action_items:
+            bullet_items.append(ListItem(Paragraph(format_action_item(item), bullet_style)))
+    else:
+        for line in actions.strip().splitlines():
+            if line.strip():
+                bullet_items.append(ListItem(Paragraph(line.strip(), bullet_style)))
 
     if bullet_items:
         elements.append(ListFlowable(bullet_items, bulletType='bullet', start='circle', leftIndent=12))
     else:
-        elements.append(Paragraph("No action items found.", styles['Normal']))
+        elements.append(Paragraph("No action items found.", styles['normal']))
+
+    # Transcript appendix
+    turns = None
+    if transcript_appendix and transcript_path.exists():
+        elements.append(PageBreak())
+        elements.append(Paragraph("🗣️ Transcript", heading_style))
+        turns = transcript_flowables(transcript_path, styles["transcript"])
+        elements.extend(islice(turns, APPENDIX_BATCH))
+        feed_in_batches(doc, elements, turns)
 
-    doc.build(elements)
+    with span("pdf_build", flowables=len(elements)):
+        try:
+            doc.build(elements)
+        finally:
+            if turns is not None:
+                turns.close()
     print(f"✅ Styled PDF saved to: {output_path}")
+    return output_path
+
+# -------------------- Bulk Export --------------------
+
+def init_pdf_worker():
+    # Styles and the standard font metrics, once per worker instead of once per report
+    styles = report_styles()
+    for font in {style.fontName for style in styles.values()}:
+        pdfmetrics.getFont(font)
+
+def export_in_worker(audio_name, transcript_appendix):
+    start = time.perf_counter()
+    path = export_to_pdf(audio_name, transcript_appendix=transcript_appendix)
+    return {
+        "name": audio_name, "path": str(path), "seconds": time.perf_counter() - start,
+        "pid": os.getpid(), "peak_rss_mb": peak_rss_mb(),
+    }
+
+def export_many(audio_names, workers=None, transcript_appendix=False):
+    # Reports rendered on a pool of processes; per-report results in input order
+    workers = workers or os.cpu_count() or 1
+    with span("pdf_bulk", reports=len(audio_names), workers=workers):
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_pdf_worker) as pool:
+            futures = [pool.submit(export_in_worker, name, transcript_appendix) for name in audio_names]
+            return [f.result() for f in futures]
+
+def report_bulk(results, wall):
+    by_worker = defaultdict(list)
+    for result in results:
+        by_worker[result["pid"]].append(result)
+    print(f"📚 {len(results)} report(s) in {wall:.1f}s → {len(results) / wall:.2f} reports/s")
+    for pid, worker_results in sorted(by_worker.items()):
+        print(f"   worker {pid}: {len(worker_results)} report(s), "
+              f"peak RSS {max(r['peak_rss_mb'] for r in worker_results):.0f} MB")
+
+def meetings_with_summaries(since=None):
+    # Every meeting that has a summary, optionally only those summarized since a date
+    names = set()
+    for directory in (SUMMARY_DIR, DIARIZED_SUMMARY_DIR):
+        for path in directory.glob("*_summary.txt"):
+            if since is None or path.stat().st_mtime >= since:
+                names.add(path.name[:-len("_summary.txt")])
+    return sorted(names)
 
 # -------------------- CLI --------------------
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("❌ Usage: python export_pdf.py <audio_name>")
+    parser = argparse.ArgumentParser(description="Render meeting reports (summary + action items) as styled PDFs.")
+    parser.add_argument("names", nargs="*", help="Meeting base filename(s)")
+    parser.add_argument("--all", action="store_true", help="Every meeting that has a summary")
+    parser.add_argument("--since", help="With --all: only meetings summarized on or after this date (YYYY-MM-DD)")
+    parser.add_argument("--workers", type=int, default=1, help="Render reports on N processes")
+    parser.add_argument("--transcript", action="store_true", help="Append the full diarized transcript")
+    args = parser.parse_args()
+
+    names = list(args.names)
+    if args.all:
+        since = datetime.fromisoformat(args.since).timestamp() if args.since else None
+        names += [name for name in meetings_with_summaries(since) if name not in names]
+    if not names:
+        parser.error("give meeting name(s) or --all")
+
+    start = time.perf_counter()
+    if args.workers > 1 and len(names) > 1:
+        results = export_many(names, args.workers, args.transcript)
     else:
-        export_to_pdf(sys.argv[1])
+        # Same per-report record as a pool worker, so both paths print comparable throughput / RSS
+        results = [export_in_worker(name, args.transcript) for name in names]
+    report_bulk(results, time.perf_counter() - start)
+    METRICS.export(run_id(names[0] if len(names) == 1 else "pdf"))
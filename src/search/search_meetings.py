@@ -0,0 +1,77 @@
+# src/search/search_meetings.py
+
+import sys
+import json
+import time
+import logging
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.search_index import SEARCH_INDEX_PATH, SearchIndex, parse_date
+
+# ------------------ LOGGING ------------------
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+log = logging.getLogger(__name__)
+
+# ------------------ OUTPUT ------------------
+
+def format_hit(hit):
+    date = datetime.fromtimestamp(hit["date"]).strftime("%Y-%m-%d")
+    if hit["start"] is None:
+        where = ""
+    elif hit["end"] is None:
+        where = f" [{hit['start']:.2f}]"   # action items only carry the time they came up
+    else:
+        where = f" [{hit['start']:.2f} - {hit['end']:.2f}]"
+    speaker = f" {hit['speaker']}" if hit["speaker"] else ""
+    return f"{date}  {hit['meeting']}  {hit['kind']}{speaker}{where}\n    {hit['snippet']}"
+
+# ------------------ ENTRY ------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search transcripts, summaries and action items across meetings.")
+    parser.add_argument("query", nargs="?", help="Words to find (all of them must occur)")
+    parser.add_argument("--phrase", action="store_true", help="Match the words as one phrase, in order")
+    parser.add_argument("--speaker", help="Only rows by / assigned to this speaker (e.g., SPEAKER_01)")
+    parser.add_argument("--kind", nargs="+", choices=["segment", "summary", "action"], help="Only these kinds of rows")
+    parser.add_argument("--meeting", help="Only this meeting (base filename)")
+    parser.add_argument("--since", help="Meetings on or after this date (YYYY-MM-DD)")
+    parser.add_argument("--until", help="Meetings before this date (YYYY-MM-DD)")
+    parser.add_argument("--start", type=float, help="Rows ending after this many seconds into the meeting")
+    parser.add_argument("--end", type=float, help="Rows starting before this many seconds into the meeting")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--update", action="store_true",
+                        help="Index new / changed files under output/ first (the pipeline does this as it writes)")
+    parser.add_argument("--index", type=Path, default=SEARCH_INDEX_PATH, help="Index file")
+    parser.add_argument("--json", action="store_true", help="Print hits as JSON lines")
+    args = parser.parse_args()
+
+    if not args.query and not args.update:
+        parser.error("give a query, --update, or both")
+
+    index = SearchIndex(args.index)
+    if args.update:
+        start = time.perf_counter()
+        indexed, removed = index.update()
+        log.info(f"🔎 {indexed} file(s) indexed, {removed} removed in {time.perf_counter() - start:.1f}s: {index.stats()}")
+    if not args.query:
+        sys.exit(0)
+
+    start = time.perf_counter()
+    try:
+        hits = index.search(
+            args.query, phrase=args.phrase, speaker=args.speaker, kinds=args.kind, meeting=args.meeting,
+            since=parse_date(args.since), until=parse_date(args.until), start=args.start, end=args.end,
+            limit=args.limit,
+        )
+    except ValueError as e:
+        log.error(f"❌ {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+
+    for hit in hits:
+        print(json.dumps(hit, ensure_ascii=False) if args.json else format_hit(hit))
+    log.info(f"🔎 {len(hits)} hit(s) in {elapsed * 1000:.1f}ms")
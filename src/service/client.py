@@ -0,0 +1,95 @@
+# src/service/client.py
+
+import os
+import json
+import time
+import socket
+from http.client import HTTPConnection
+from urllib.parse import urlparse
+
+# ------------------ CONFIG ------------------
+
+SERVER_ENV = "MEETING_MINUTES_SERVER"   # e.g. http://127.0.0.1:8765 or unix:/tmp/meeting-minutes.sock
+POLL_SECONDS = 30                       # long-poll interval while waiting for a job
+
+class ServiceError(RuntimeError):
+    pass
+
+# ------------------ TRANSPORT ------------------
+
+class UnixHTTPConnection(HTTPConnection):
+    def __init__(self, socket_path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+# ------------------ CLIENT ------------------
+
+class ServiceClient:
+    # Thin client for src/service/server.py: no model imports, just JSON over HTTP
+
+    def __init__(self, address):
+        self.address = address
+
+    def _connection(self, timeout):
+        if self.address.startswith("unix:"):
+            return UnixHTTPConnection(self.address[len("unix:"):], timeout=timeout)
+        url = urlparse(self.address if "://" in self.address else f"http://{self.address}")
+        return HTTPConnection(url.hostname, url.port or 80, timeout=timeout)
+
+    def _request(self, method, path, payload=None, timeout=10):
+        connection = self._connection(timeout)
+        try:
+            body = json.dumps(payload).encode("utf-8") if payload is not None else None
+            headers = {"Content-Type": "application/json"} if body is not None else {}
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            data = json.loads(response.read() or b"{}")
+        except (OSError, ValueError) as e:
+            raise ServiceError(f"Service at {self.address} unreachable: {e}") from e
+        finally:
+            connection.close()
+        if response.status >= 400:
+            raise ServiceError(data.get("error", f"HTTP {response.status}"))
+        return data
+
+    def health(self):
+        return self._request("GET", "/health")
+
+    def submit(self, kind, params, priority=0, name=None):
+        return self._request("POST", "/jobs", {"kind": kind, "params": params, "priority": priority, "name": name})["id"]
+
+    def status(self, job_id, wait=0):
+        return self._request("GET", f"/jobs/{job_id}?wait={wait}", timeout=wait + 10)
+
+    def wait(self, job_id, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = POLL_SECONDS if deadline is None else min(POLL_SECONDS, deadline - time.monotonic())
+            if remaining <= 0:
+                raise ServiceError(f"Job {job_id} still running after {timeout}s")
+            job = self.status(job_id, wait=remaining)
+            if job["status"] == "done":
+                return job
+            if job["status"] == "failed":
+                raise ServiceError(f"Job {job_id} failed: {job['error']}")
+
+    def run(self, kind, params, priority=0, name=None, timeout=None):
+        # Submit and block until the result is back
+        return self.wait(self.submit(kind, params, priority, name), timeout)["result"]
+
+def local_only(client, **options):
+    # Flags among `options` that were given but only apply when this process runs the
+    # models itself. Callers refuse to run rather than quietly drop them.
+    if client is None:
+        return []
+    return ["--" + name.replace("_", "-") for name, value in options.items() if value]
+
+def connect(address=None):
+    # Client for --server, or $MEETING_MINUTES_SERVER; None when neither is set
+    address = address or os.getenv(SERVER_ENV)
+    return ServiceClient(address) if address else None
@@ -0,0 +1,407 @@
+# src/service/server.py
+
+import os
+import sys
+import json
+import time
+import uuid
+import heapq
+import logging
+import argparse
+import itertools
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+from urllib.parse import parse_qs, urlparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.asr_backends import ASR_BACKENDS, DEFAULT_ASR_BACKEND
+from common.asr_process import close_asr
+from common.metrics import METRICS, recording, run_id, span
+from common.search_index import index_outputs
+from common.llm import MODEL_PATH, load_llm
+from common.llm_process import LlamaPool, PooledLlama
+from action_extraction import structured_actions
+from diarization.global_speakers import DEFAULT_CLUSTER_THRESHOLD
+from report import export_pdf
+from pipeline.run_pipeline import (
+    MeetingPipeline, actions_path, diarization, output_paths, save_transcript, summary_path, transcript_path
+)
+
+# ------------------ CONFIG ------------------
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+KEEP_FINISHED_JOBS = 1000     # finished jobs kept for clients to collect
+KEEP_METRIC_SPANS = 100_000   # the service never exits, so old spans are dropped
+
+log = logging.getLogger(__name__)
+
+# ------------------ JOBS ------------------
+
+class Job:
+    def __init__(self, kind, params, priority=0, name=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.params = params
+        self.priority = priority
+        self.name = name or self.id
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.timings = {}
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.done = threading.Event()
+
+    def as_dict(self):
+        return {
+            "id": self.id, "kind": self.kind, "name": self.name, "priority": self.priority,
+            "status": self.status, "result": self.result, "error": self.error, "timings": self.timings,
+            "submitted_at": self.submitted_at, "started_at": self.started_at, "finished_at": self.finished_at,
+        }
+
+class JobQueue:
+    # Highest priority first, first come first served within a priority
+
+    def __init__(self):
+        self.heap = []
+        self.counter = itertools.count()
+        self.cond = threading.Condition()
+        self.closed = False
+
+    def put(self, job):
+        with self.cond:
+            heapq.heappush(self.heap, (-job.priority, next(self.counter), job))
+            self.cond.notify()
+
+    def get(self):
+        # Next job, or None once the queue is closed
+        with self.cond:
+            while not self.heap and not self.closed:
+                self.cond.wait()
+            return heapq.heappop(self.heap)[2] if self.heap else None
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.heap.clear()
+            self.cond.notify_all()
+
+    def __len__(self):
+        with self.cond:
+            return len(self.heap)
+
+# ------------------ SERVICE ------------------
+
+REQUIRED_PARAMS = {
+    "transcribe": ("audio_path",),
+    "summarize": ("transcript",),
+    "actions": ("transcript",),
+    "pdf": ("name",),
+    "pipeline": ("audio_path",),
+}
+
+class InferenceService:
+    # Whisper, pyannote and the LLM stay loaded for the life of the process. `concurrency`
+    # jobs run at once; Whisper / pyannote serve one job at a time, and LLM work runs either
+    # on one in-process Llama (one job at a time) or on a pool of `llm_workers` processes
+    # that share the mmap'd GGUF, with up to that many LLM jobs in flight.
+
+    def __init__(self, concurrency=2, llm_workers=0, use_cache=True, asr_backend=DEFAULT_ASR_BACKEND):
+        self.concurrency = concurrency
+        self.use_cache = use_cache
+        self.asr_backend = asr_backend
+        self.queue = JobQueue()
+        self.jobs = {}
+        self.lock = threading.Lock()
+        # Model loads take their own locks, so the queue and /health stay responsive meanwhile
+        self.asr_lock = threading.Lock()
+        self.llm_lock = threading.Lock()
+        self.running = 0
+        self.threads = []
+        self.asr_slot = threading.Semaphore(1)
+        self.llm_slots = threading.Semaphore(max(1, llm_workers))
+        self.pool = LlamaPool(llm_workers, use_cache=use_cache) if llm_workers else None
+        self.llm = PooledLlama(self.pool) if self.pool else None
+        self.whisper_model = None
+        self.diarization_pipeline = None
+        self.count_tokens = None
+
+    # Models
+
+    def asr_models(self):
+        with self.asr_lock:
+            if self.whisper_model is None:
+                self.whisper_model, self.diarization_pipeline = diarization.load_models(asr_backend=self.asr_backend)
+        return self.whisper_model, self.diarization_pipeline
+
+    def language_model(self):
+        with self.llm_lock:
+            if self.llm is None:
+                self.llm = load_llm(use_cache=self.use_cache)
+        return self.llm
+
+    def warm(self):
+        log.info("🔥 Loading models...")
+        self.asr_models()
+        if self.pool is not None:
+            log.info(f"🔥 LLM workers ready: pids {self.pool.warm()}")
+        else:
+            getattr(self.language_model(), "llm", None)
+
+    def pipeline_for(self, params):
+        # Per-job options on top of the shared, already loaded models
+        meeting_pipeline = MeetingPipeline(
+            split_speakers=params.get("split_speakers", False), global_speakers=params.get("global_speakers", False),
+            cluster_threshold=params.get("cluster_threshold", DEFAULT_CLUSTER_THRESHOLD),
+            pipelined=params.get("pipelined", False), vad=params.get("vad", False),
+            # A job can turn the chunk cache off, not on when the service runs without it
+            use_cache=self.use_cache and params.get("use_cache", True),
+            json_actions=params.get("json_actions", False), asr_backend=self.asr_backend
+        )
+        meeting_pipeline.count_tokens = self.count_tokens
+        return meeting_pipeline
+
+    # Handlers
+
+    def transcribe(self, params, timings):
+        meeting_pipeline = self.pipeline_for(params)
+        with self.asr_slot:
+            meeting_pipeline.whisper_model, meeting_pipeline.diarization_pipeline = self.asr_models()
+            return {"transcript": meeting_pipeline.transcribe(Path(params["audio_path"]), timings)}
+
+    def summarize(self, params, timings):
+        meeting_pipeline = self.pipeline_for(params)
+        meeting_pipeline.llm = self.language_model()
+        with self.llm_slots:
+            return {"summary": meeting_pipeline.summarize(params["transcript"], timings)}
+
+    def extract_actions(self, params, timings):
+        meeting_pipeline = self.pipeline_for(params)
+        meeting_pipeline.llm = self.language_model()
+        with self.llm_slots:
+            actions, action_items = meeting_pipeline.extract_actions(params["transcript"], timings)
+        return {"actions": actions, "action_items": action_items}
+
+    def export_pdf(self, params, timings):
+        path = export_pdf.export_to_pdf(
+            params["name"], summary=params.get("summary"), actions=params.get("actions"),
+            action_items=params.get("action_items")
+        )
+        return {"path": str(path)}
+
+    def run_pipeline(self, params, timings):
+        # Same outputs as run_pipeline.py, written by the service
+        base_name = Path(params["audio_path"]).stem
+        transcript = self.transcribe(params, timings)["transcript"]
+        summary = self.summarize({**params, "transcript": transcript}, timings)["summary"]
+        actions = self.extract_actions({**params, "transcript": transcript}, timings)
+
+        save_transcript(base_name, transcript)
+        summary_path(base_name).write_text(summary, encoding="utf-8")
+        actions_path(base_name).write_text(actions["actions"], encoding="utf-8")
+        if actions["action_items"] is not None:
+            structured_actions.write_jsonl(actions["action_items"], actions_path(base_name).with_suffix(".jsonl"))
+        index_outputs(output_paths(base_name), meeting_date=Path(params["audio_path"]).stat().st_mtime)
+        pdf = self.export_pdf({"name": base_name, "summary": summary, **actions}, timings)
+        return {
+            "transcript_path": str(transcript_path(base_name)), "summary_path": str(summary_path(base_name)),
+            "actions_path": str(actions_path(base_name)), "pdf_path": pdf["path"],
+        }
+
+    HANDLERS = {
+        "transcribe": transcribe,
+        "summarize": summarize,
+        "actions": extract_actions,
+        "pdf": export_pdf,
+        "pipeline": run_pipeline,
+    }
+
+    # Queue
+
+    def submit(self, kind, params, priority=0, name=None):
+        if kind not in self.HANDLERS:
+            raise ValueError(f"Unknown job kind '{kind}' (expected one of {', '.join(self.HANDLERS)})")
+        missing = [p for p in REQUIRED_PARAMS[kind] if p not in params]
+        if missing:
+            raise ValueError(f"'{kind}' jobs need: {', '.join(missing)}")
+        if "audio_path" in params and not Path(params["audio_path"]).exists():
+            raise ValueError(f"Audio file not found: {params['audio_path']}")
+
+        job = Job(kind, params, priority, name)
+        with self.lock:
+            self.jobs[job.id] = job
+            finished = [j for j in self.jobs.values() if j.done.is_set()]
+            for old in sorted(finished, key=lambda j: j.finished_at)[:max(0, len(finished) - KEEP_FINISHED_JOBS)]:
+                del self.jobs[old.id]
+        self.queue.put(job)
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def _work(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+            with self.lock:
+                self.running += 1
+            job.status, job.started_at = "running", time.time()
+            try:
+                with recording(job.name), span(f"job:{job.kind}", priority=job.priority):
+                    job.result = self.HANDLERS[job.kind](self, job.params, job.timings)
+                job.status = "done"
+            except Exception as e:
+                log.exception(f"❌ Job {job.id} ({job.kind}) failed")
+                job.status, job.error = "failed", repr(e)
+            finally:
+                job.finished_at = time.time()
+                with self.lock:
+                    self.running -= 1
+                job.done.set()
+                self._export_metrics(job)
+
+    def _export_metrics(self, job):
+        # The service never exits, so each job writes its own trace and updates the .prom
+        # totals; old spans are then dropped
+        with METRICS.lock:
+            spans = [s for s in METRICS.spans if s["recording"] == job.name and s["ended_at"] >= job.started_at]
+        try:
+            METRICS.write_trace(run_id(job.name), spans=spans, started_at=job.started_at)
+            METRICS.write_prometheus()
+        except OSError as e:
+            log.warning(f"⚠️ Could not write metrics for job {job.id}: {e}")
+        METRICS.trim(KEEP_METRIC_SPANS)
+
+    def start(self):
+        for i in range(self.concurrency):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        self.queue.close()
+        for thread in self.threads:
+            thread.join()
+        with self.asr_lock:
+            close_asr(self.whisper_model)
+            self.whisper_model = None
+        if self.pool is not None:
+            self.pool.close()
+
+    def health(self):
+        with self.lock:
+            running = self.running
+        return {
+            "queued": len(self.queue), "running": running, "concurrency": self.concurrency,
+            "llm_workers": self.pool.workers if self.pool else 0,
+            "asr_backend": self.asr_backend, "asr_loaded": self.whisper_model is not None,
+            "llm_loaded": self.llm is not None,
+        }
+
+# ------------------ HTTP ------------------
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    # POST /jobs {"kind", "params", "priority", "name"} -> 202 {"id"}
+    # GET  /jobs/<id>[?wait=<seconds>]                  -> job (waits until finished, up to the timeout)
+    # GET  /health                                      -> queue and model state
+    service = None
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/health":
+            return self._send(HTTPStatus.OK, self.service.health())
+        if url.path.startswith("/jobs/"):
+            job = self.service.get(url.path[len("/jobs/"):])
+            if job is None:
+                return self._send(HTTPStatus.NOT_FOUND, {"error": "unknown job"})
+            try:
+                wait = float(parse_qs(url.query).get("wait", ["0"])[0])
+            except ValueError:
+                return self._send(HTTPStatus.BAD_REQUEST, {"error": "wait must be a number of seconds"})
+            if wait > 0:
+                job.done.wait(wait)
+            return self._send(HTTPStatus.OK, job.as_dict())
+        self._send(HTTPStatus.NOT_FOUND, {"error": "not found"})
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/jobs":
+            return self._send(HTTPStatus.NOT_FOUND, {"error": "not found"})
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            job = self.service.submit(
+                request.get("kind"), request.get("params", {}), int(request.get("priority", 0)), request.get("name")
+            )
+        except (ValueError, TypeError) as e:
+            return self._send(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+        self._send(HTTPStatus.ACCEPTED, {"id": job.id})
+
+    def log_message(self, format, *args):
+        log.debug(format % args)
+
+class UnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        # BaseHTTPRequestHandler expects a (host, port) client address
+        request, _ = super().get_request()
+        return request, ("local", 0)
+
+def make_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None):
+    handler = type("Handler", (ServiceHandler,), {"service": service})
+    if socket_path:
+        Path(socket_path).unlink(missing_ok=True)
+        return UnixHTTPServer(str(socket_path), handler)
+    return ThreadingHTTPServer((host, port), handler)
+
+# ------------------ ENTRY ------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep the models loaded and serve transcription / LLM / PDF jobs locally.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Interface to listen on (default: loopback only)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--socket", help="Listen on this Unix socket instead of TCP")
+    parser.add_argument("--concurrency", type=int, default=2, help="Jobs running at once")
+    parser.add_argument("--llm-workers", type=int, default=0,
+                        help="LLM worker processes sharing the mmap'd GGUF (0: one in-process model)")
+    parser.add_argument("--no-warm", action="store_true", help="Load models on the first job instead of at startup")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Recompute everything instead of reusing cached Whisper / pyannote results and LLM completions")
+    parser.add_argument("--asr-backend", choices=ASR_BACKENDS, default=DEFAULT_ASR_BACKEND,
+                        help="whisper (fp32), whisper-int8 (dynamically quantized) or faster-whisper (CTranslate2 int8)")
+    args = parser.parse_args()
+
+    if not MODEL_PATH.exists():
+        log.error(f"❌ Model not found: {MODEL_PATH}")
+        sys.exit(1)
+
+    service = InferenceService(args.concurrency, args.llm_workers, use_cache=not args.no_cache, asr_backend=args.asr_backend)
+    if not args.no_warm:
+        service.warm()
+    service.start()
+    server = make_server(service, args.host, args.port, args.socket)
+    log.info(f"🛰️ Serving on {('unix:' + args.socket) if args.socket else f'http://{args.host}:{args.port}'} "
+             f"({args.concurrency} concurrent job(s), pid {os.getpid()})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        log.info("🛑 Shutting down...")
+    finally:
+        server.server_close()
+        service.stop()
+        if args.socket:
+            Path(args.socket).unlink(missing_ok=True)
@@ -1,11 +1,20 @@
 # src/summarization/summarize_diarized.py
 
 import os
-import textwrap
 import logging
+import sys
 import argparse
 from pathlib import Path
-from llama_cpp import Llama
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.completion_cache import log_cache_stats
+from common.chunking import pack_by_tokens, speaker_lines
+from common.columnar_transcript import read_window, window_tag
+from common.metrics import METRICS, run_id
+from common.search_index import index_outputs
+from common.llm_process import LlamaPool
+from common.llm import chunk_token_budget, complete, load_llm, token_counter, transcript_block
+from service import client as service_client
 
 # ------------------ LOGGING ------------------
 
@@ -17,18 +26,13 @@ log = logging.getLogger(__name__)
 BASE_DIR = Path(__file__).resolve().parents[2]
 TRANSCRIPT_DIR = BASE_DIR / "output" / "diarized_transcripts"
 OUTPUT_DIR = BASE_DIR / "output" / "summaries"
-MODEL_PATH = BASE_DIR / "input" / "models" / "mistral-7b-instruct-v0.3-gguf" / "mistral-7b-instruct-v0.3.Q4_K_M.gguf"
 
-MAX_CHARS_PER_CHUNK = 3500
+MAX_TOKENS = 1024
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
 # ------------------ PROMPT TEMPLATE ------------------
 
-def format_prompt(text):
-    return f"""### Transcript:
-{text}
-
-### Instruction:
+SUMMARY_INSTRUCTION = """### Instruction:
 Summarize this meeting segment. Group content by each speaker. Include:
 - Topics discussed
 - Key points per speaker
@@ -37,44 +41,132 @@ Summarize this meeting segment. Group content by each speaker. Include:
 ### Summary:
 """
 
+REDUCE_INSTRUCTION = """### Instruction:
+The summaries above cover consecutive parts of one meeting, in order. Merge them into a single summary of the whole meeting. Group content by each speaker. Include:
+- Topics discussed
+- Key points per speaker
+- Decisions made (if any)
+
+### Summary:
+"""
+
+def format_prompt(text):
+    return transcript_block(text) + SUMMARY_INSTRUCTION
+
+def format_reduce_prompt(summaries):
+    return f"""### Partial Summaries:
+{summaries}
+
+""" + REDUCE_INSTRUCTION
+
 # ------------------ SUMMARIZER ------------------
 
-def summarize_diarized_transcript(input_path: Path, output_path: Path):
-    transcript = input_path.read_text(encoding="utf-8")
-    log.info(f"📄 Loaded transcript: {len(transcript)} characters")
+def split_chunks(transcript, count_tokens=None, instruction=SUMMARY_INSTRUCTION):
+    # Whole speaker lines, packed into the context left by the prompt template and the answer
+    count_tokens = count_tokens or token_counter()
+    budget = chunk_token_budget(transcript_block("") + instruction, MAX_TOKENS, count_tokens)
+    return pack_by_tokens(speaker_lines(transcript), count_tokens, budget)
+
+def format_chunk_summary(idx, response):
+    if isinstance(response, dict) and "choices" in response:
+        output_text = response["choices"][0]["text"].strip()
+    else:
+        output_text = "[⚠️ LLM failed to generate valid output]"
 
+    return f"🔹 Chunk {idx+1} Summary:\n{output_text}\n"
+
+def summarize_transcript(transcript, llm, stats=None, n_parallel=None, count_tokens=None):
     # Chunk transcript
 
-    chunks = textwrap.wrap(transcript, MAX_CHARS_PER_CHUNK, break_long_words=False, break_on_hyphens=False)
+    chunks = split_chunks(transcript, count_tokens)
     log.info(f"✂️ Split transcript into {len(chunks)} chunk(s)")
 
-    # Load model
-
-    log.info("🧠 Loading local Mistral model via llama-cpp...")
-    llm = Llama(
-        model_path=str(MODEL_PATH),
-        n_ctx=4096,
-        n_threads=8,
-        n_batch=512,
-        temperature=0.3,
-        stop=["</s>"],
-        verbose=False
-    )
+    if n_parallel:
+        from common.llm_batch import complete_batch   # numpy + llama.cpp's low-level API
+        log.info(f"📝 Summarizing {len(chunks)} chunk(s) as up to {n_parallel} parallel sequences...")
+        responses = complete_batch(llm, [format_prompt(chunk) for chunk in chunks], MAX_TOKENS, n_parallel)
+        return "\n".join(format_chunk_summary(idx, response) for idx, response in enumerate(responses))
 
     final_summary = []
     for idx, chunk in enumerate(chunks):
         log.info(f"📝 Summarizing chunk {idx + 1}/{len(chunks)}...")
-        prompt = format_prompt(chunk)
-        response = llm(prompt, max_tokens=1024)
-
-        if isinstance(response, dict) and "choices" in response:
-            output_text = response["choices"][0]["text"].strip()
-        else:
-            output_text = "[⚠️ LLM failed to generate valid output]"
-
-        final_summary.append(f"🔹 Chunk {idx+1} Summary:\n{output_text}\n")
+        response = complete(llm, format_prompt(chunk), max_tokens=MAX_TOKENS, stats=stats)
+        final_summary.append(format_chunk_summary(idx, response))
+
+    return "\n".join(final_summary)
+
+# ------------------ MAP-REDUCE ------------------
+
+def _run_level(pool, prompts, stats):
+    responses = pool.map(prompts, max_tokens=MAX_TOKENS)
+    for response in responses:
+        usage = response.get("usage", {})
+        stats["llm_calls"] = stats.get("llm_calls", 0) + 1
+        stats["prompt_tokens"] = stats.get("prompt_tokens", 0) + usage.get("prompt_tokens", 0)
+        stats["completion_tokens"] = stats.get("completion_tokens", 0) + usage.get("completion_tokens", 0)
+    return [response["choices"][0]["text"].strip() for response in responses]
+
+def map_reduce_summary(transcript, pool, stats=None):
+    # Map: every chunk is summarized concurrently on the pool. Reduce: consecutive partial
+    # summaries are packed into prompts that fit the context and merged, level by level,
+    # until one summary of the whole meeting is left. Summaries are at most MAX_TOKENS long
+    # and the budget holds well over two of them, so every level shrinks the list.
+    stats = stats if stats is not None else {}
+    count_tokens = token_counter()
+    chunks = split_chunks(transcript, count_tokens)
+    log.info(f"🗺️ Map: summarizing {len(chunks)} chunk(s) on {pool.workers} worker(s)...")
+    summaries = _run_level(pool, [format_prompt(chunk) for chunk in chunks], stats)
+
+    budget = chunk_token_budget(format_reduce_prompt(""), MAX_TOKENS, count_tokens)
+    level = 0
+    while len(summaries) > 1:
+        level += 1
+        groups = pack_by_tokens(summaries, count_tokens, budget, sep="\n\n")
+        log.info(f"🧮 Reduce level {level}: merging {len(summaries)} summaries into {len(groups)}...")
+        summaries = _run_level(pool, [format_reduce_prompt(group) for group in groups], stats)
+
+    stats["reduce_levels"] = level
+    return summaries[0] if summaries else ""
+
+def format_meeting_summary(summary):
+    return f"🧾 Meeting Summary:\n{summary}\n"
+
+# ------------------ FILE ENTRY ------------------
+
+def summarize_diarized_transcript(input_path: Path, output_path: Path, llm=None, workers=None, n_parallel=None,
+                                  server=None, start=None, end=None, speaker=None):
+    # start / end (seconds) and speaker restrict the summary to that part of the meeting
+    transcript = read_window(input_path, start, end, speaker)
+    log.info(f"📄 Loaded transcript: {len(transcript)} characters")
 
-    output_path.write_text("\n".join(final_summary), encoding="utf-8")
+    client = service_client.connect(server)
+    unsupported = service_client.local_only(client, map_reduce=workers, parallel=n_parallel)
+    if unsupported:
+        log.error(f"❌ {', '.join(unsupported)} can't be used with the inference service at {client.address}; "
+                  f"run without --server / ${service_client.SERVER_ENV}")
+        sys.exit(1)
+    if client is not None:
+        log.info(f"🛰️ Sending to the inference service at {client.address}...")
+        summary = client.run("summarize", {"transcript": transcript}, name=input_path.stem)["summary"]
+        output_path.write_text(summary, encoding="utf-8")
+        log.info(f"✅ Done! Summary saved to: {output_path}")
+        return
+
+    if workers:
+        pool = LlamaPool(workers)
+        try:
+            summary = format_meeting_summary(map_reduce_summary(transcript, pool))
+        finally:
+            pool.close()
+        output_path.write_text(summary, encoding="utf-8")
+        log.info(f"✅ Done! Summary saved to: {output_path}")
+        return
+
+    if llm is None:
+        llm = load_llm()
+
+    output_path.write_text(summarize_transcript(transcript, llm, n_parallel=n_parallel), encoding="utf-8")
+    log_cache_stats(llm)
     log.info(f"✅ Done! Summary saved to: {output_path}")
 
 # ------------------ ENTRY POINT ------------------
@@ -82,6 +174,17 @@ def summarize_diarized_transcript(input_path: Path, output_path: Path):
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Summarize a diarized transcript")
     parser.add_argument("filename", help="Diarized transcript filename (e.g., sample_diarized.txt)")
+    parser.add_argument("--map-reduce", type=int, metavar="K", dest="workers",
+                        help="Summarize chunks on K llama.cpp processes and merge them into one meeting summary")
+    parser.add_argument("--parallel", type=int, metavar="N",
+                        help="Decode up to N chunk prompts together as parallel sequences of one llama.cpp context")
+    parser.add_argument("--server", help=f"Run on a warm inference service (default: ${service_client.SERVER_ENV})")
+    parser.add_argument("--start", type=float, help="Only the part of the meeting from this many seconds in")
+    parser.add_argument("--end", type=float, help="Only the part of the meeting before this many seconds in")
+    parser.add_argument("--speaker", help="Only this speaker's turns (e.g., SPEAKER_01)")
+    parser.add_argument("--output", type=Path,
+                        help="Write the summary here (default: <name>_summary.txt, or <name>_summary.<window>.txt "
+                             "with --start / --end / --speaker)")
     args = parser.parse_args()
 
     input_path = TRANSCRIPT_DIR / args.filename
@@ -90,6 +193,10 @@ if __name__ == "__main__":
         exit(1)
 
     base_name = args.filename.replace("_diarized", "")
-    output_path = OUTPUT_DIR / f"{base_name}_summary.txt"
+    tag = window_tag(args.start, args.end, args.speaker)
+    output_path = args.output or OUTPUT_DIR / (f"{base_name}_summary.{tag}.txt" if tag else f"{base_name}_summary.txt")
 
-    summarize_diarized_transcript(input_path, output_path)
+    summarize_diarized_transcript(input_path, output_path, workers=args.workers, n_parallel=args.parallel,
+                                  server=args.server, start=args.start, end=args.end, speaker=args.speaker)
+    index_outputs([output_path])
+    METRICS.export(run_id(output_path.stem))
@@ -1,64 +1,128 @@
 import os
 import sys
+import time
+import argparse
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from math import ceil
 from pathlib import Path
-from pydub import AudioSegment
-import whisper
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.audio import SAMPLE_RATE, iter_audio_windows, probe_duration
+from common.asr_backends import ASR_BACKENDS, DEFAULT_ASR_BACKEND, asr_cache_params, load_asr
+from common.asr_process import init_whisper_worker, transcribe_in_worker
+from common.chunk_cache import ChunkCache, cached
+from common.metrics import METRICS, run_id, span
+from common.vad import VAD_WINDOW_MS, SpeechChunker, iter_speech_chunks
 
 # ----- Constants -----
 
-AUDIO_DIR = Path("../../input/audio") 
-CHUNK_OUTPUT_DIR = Path("../../output/audio_chunks")  
-OUTPUT_DIR = Path("../../output/transcripts")         
+BASE_DIR = Path(__file__).resolve().parents[2]
+AUDIO_DIR = BASE_DIR / "input" / "audio"
+OUTPUT_DIR = BASE_DIR / "output" / "transcripts"
 CHUNK_LENGTH_MS = 10 * 60 * 1000  
 
-os.makedirs(CHUNK_OUTPUT_DIR, exist_ok=True)
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 # ----- Split audio into chunks -----
 
-def split_audio(audio_path):
-    ext = audio_path.suffix.lower().replace(".", "")
-    try:
-        audio = AudioSegment.from_file(audio_path, format=ext)
-    except Exception as e:
-        print(f"❌ Failed to load audio file: {e}")
-        sys.exit(1)
+def split_audio(audio_path, chunker=None):
+    # Chunks are streamed one at a time, so memory stays flat however long the recording is.
+    # With a SpeechChunker, non-speech is dropped and chunks are cut in pauses instead.
+    duration_sec = probe_duration(audio_path)
+    if duration_sec is not None:
+        mins, secs = divmod(int(duration_sec), 60)
+        num_chunks = ceil(duration_sec * 1000 / CHUNK_LENGTH_MS)
+        print(f"📊 Audio Duration: {mins} min {secs} sec")
+        print(f"🔪 Chunking into {num_chunks} chunk(s) of {CHUNK_LENGTH_MS // 60000} min each...")
+    else:
+        num_chunks = None
+        print(f"🔪 Streaming {CHUNK_LENGTH_MS // 60000}-min chunks (duration unknown)...")
 
-    total_duration_sec = len(audio) // 1000
-    mins, secs = divmod(total_duration_sec, 60)
-    num_chunks = ceil(len(audio) / CHUNK_LENGTH_MS)
+    if chunker is not None:
+        windows = iter_audio_windows(audio_path, VAD_WINDOW_MS)
+        chunks = (audio for audio, _ in iter_speech_chunks(windows, CHUNK_LENGTH_MS / 1000, chunker=chunker))
+        return METRICS.timed_iter("decode", chunks), None
 
-    print(f"📊 Audio Duration: {mins} min {secs} sec")
-    print(f"🔪 Chunking into {num_chunks} chunk(s) of {CHUNK_LENGTH_MS // 60000} min each...")
+    return METRICS.timed_iter("decode", iter_audio_windows(audio_path, CHUNK_LENGTH_MS)), num_chunks
 
-    chunks = []
-    chunk_folder = CHUNK_OUTPUT_DIR / f"{audio_path.stem}_chunks"
-    os.makedirs(chunk_folder, exist_ok=True)
+# ----- Transcribe chunks using Whisper -----
 
-    for i in range(num_chunks):
-        chunk = audio[i * CHUNK_LENGTH_MS: (i + 1) * CHUNK_LENGTH_MS]
-        chunk_path = chunk_folder / f"{audio_path.stem}_chunk{i}.wav"
-        chunk.export(chunk_path, format="wav")
-        chunks.append(chunk_path)
+def count_audio(chunks, stats):
+    # Pass chunks through while adding up their duration (for the real-time factor)
+    for chunk in chunks:
+        stats["audio_sec"] = stats.get("audio_sec", 0.0) + len(chunk) / SAMPLE_RATE
+        yield chunk
 
-    return chunks
+def transcribe_chunks(chunks, model_name="base", num_chunks=None, workers=1, cache=None, backend=DEFAULT_ASR_BACKEND):
+    if workers > 1:
+        return transcribe_chunks_parallel(chunks, model_name, num_chunks, workers, cache, backend)
 
-# ----- Transcribe chunks using Whisper -----
-
-def transcribe_chunks(chunk_paths, model_name="base"):
-    model = whisper.load_model(model_name)
+    model = None
     all_text = ""
-    for i, chunk_path in enumerate(chunk_paths):
-        print(f"🔍 Transcribing chunk {i+1}/{len(chunk_paths)}: {chunk_path.name}")
-        result = model.transcribe(str(chunk_path))
-        all_text += f"\n--- Chunk {i+1} ---\n{result['text'].strip()}\n"
-        os.remove(chunk_path)  
+    for i, chunk in enumerate(chunks):
+        print(f"🔍 Transcribing chunk {i+1}/{num_chunks or '?'}")
+
+        def transcribe():
+            nonlocal model
+            # Loaded on the first cache miss, so a fully cached re-run never loads Whisper
+            if model is None:
+                model = load_asr(backend, model_name)
+            with span("whisper", chunk=i, audio_s=len(chunk) / SAMPLE_RATE):
+                return model.transcribe(chunk)["text"]
+
+        text = cached(cache, "whisper", chunk, asr_cache_params(backend, model_name), transcribe)
+        all_text += f"\n--- Chunk {i+1} ---\n{text.strip()}\n"
     return all_text.strip()
 
+# ----- Parallel transcription (one Whisper model per worker process) -----
+
+def transcribe_chunk_in_worker(chunk, i):
+    # The worker's recorder is never exported, so the whisper span (and the model load, on
+    # the first call) goes back to the parent with the text
+    with span("whisper", chunk=i, audio_s=len(chunk) / SAMPLE_RATE):
+        text = transcribe_in_worker(chunk)["text"]
+    return text, METRICS.take()
+
+def transcribe_chunks_parallel(chunks, model_name="base", num_chunks=None, workers=2, cache=None,
+                               backend=DEFAULT_ASR_BACKEND):
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    print(f"⚙️ {workers} worker process(es) × {threads} thread(s)")
+
+    texts = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_whisper_worker,
+                             initargs=(model_name, threads, backend)) as pool:
+        in_flight = {}
+
+        def collect(futures):
+            for future in futures:
+                i, key = in_flight.pop(future)
+                text, spans = future.result()
+                METRICS.merge(spans)
+                if cache is not None:
+                    cache.put(key, text)
+                texts[i] = text.strip()
+                print(f"🔍 Transcribed chunk {i+1}/{num_chunks or '?'}")
+
+        for i, chunk in enumerate(chunks):
+            # Cache lookups happen here; only misses are sent to the workers
+            key = cache.key("whisper", chunk, asr_cache_params(backend, model_name)) if cache is not None else None
+            text = cache.get(key) if cache is not None else None
+            if text is not None:
+                texts[i] = text.strip()
+                print(f"💾 Chunk {i+1}/{num_chunks or '?'} from cache")
+                continue
+            in_flight[pool.submit(transcribe_chunk_in_worker, chunk, i)] = i, key
+            # At most two chunks per worker are decoded ahead, so memory stays bounded
+            if len(in_flight) >= 2 * workers:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+        collect(list(in_flight))
+
+    return "".join(f"\n--- Chunk {i+1} ---\n{texts[i]}\n" for i in sorted(texts)).strip()
+
 # ----- Main -----
 
-def main(filename):
+def main(filename, workers=1, vad=False, use_cache=True, backend=DEFAULT_ASR_BACKEND):
     audio_path = AUDIO_DIR / filename
     if not audio_path.exists():
         print(f"❌ Audio file not found: {audio_path}")
@@ -70,18 +134,45 @@ def main(filename):
     output_path = output_folder / f"{base_name}_transcript.txt"
 
     print(f"🔄 Splitting audio: {filename}")
-    chunk_paths = split_audio(audio_path)
+    chunker = SpeechChunker(CHUNK_LENGTH_MS / 1000) if vad else None
+    chunks, num_chunks = split_audio(audio_path, chunker)
 
-    print(f"🧠 Transcribing {len(chunk_paths)} chunks...")
-    full_transcript = transcribe_chunks(chunk_paths)
+    print(f"🧠 Transcribing {num_chunks or 'all'} chunks ({backend})...")
+    cache = ChunkCache() if use_cache else None
+    stats = {}
+    start = time.perf_counter()
+    try:
+        full_transcript = transcribe_chunks(count_audio(chunks, stats), num_chunks=num_chunks, workers=workers,
+                                            cache=cache, backend=backend)
+    except RuntimeError as e:
+        print(f"❌ Failed to load audio file: {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+    if cache is not None:
+        print(cache.summary())
+    if chunker is not None:
+        print(chunker.summary())
+        stats["audio_sec"] = chunker.total_samples / SAMPLE_RATE
+    if stats.get("audio_sec"):
+        print(f"⏱️ {elapsed:.1f}s for {stats['audio_sec']:.0f}s of audio | RTF {elapsed / stats['audio_sec']:.3f} ({workers} worker(s))")
 
     with open(output_path, "w", encoding="utf-8") as f:
         f.write(full_transcript)
 
     print(f"✅ Transcript saved to: {output_path}")
+    METRICS.export(run_id(base_name))
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python transcribe_chunked.py <audio_filename>")
-    else:
-        main(sys.argv[1])
+    parser = argparse.ArgumentParser(description="Transcribe an audio file in chunks with Whisper.")
+    parser.add_argument("filename", help="Audio filename inside input/audio")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Transcribe chunks in N worker processes, each with cores // N torch threads")
+    parser.add_argument("--vad", action="store_true",
+                        help="Skip non-speech and cut chunks at pauses near the target length")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Recompute every chunk instead of reusing cached Whisper results")
+    parser.add_argument("--asr-backend", choices=ASR_BACKENDS, default=DEFAULT_ASR_BACKEND,
+                        help="whisper (fp32), whisper-int8 (dynamically quantized) or faster-whisper (CTranslate2 int8)")
+    args = parser.parse_args()
+
+    main(args.filename, workers=args.workers, vad=args.vad, use_cache=not args.no_cache, backend=args.asr_backend)